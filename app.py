@@ -1,7 +1,18 @@
+import sqlite3
+from datetime import date
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-from scripts import run_bootstrap, run_bayes_scipy, run_bayes_beta, run_metrics_analysis
+# Só o necessário para a Home: cada página importa sua análise (scipy, matplotlib,
+# seaborn) no primeiro acesso, e o matplotlib é configurado na primeira figura
+from scripts.preprocessing import get_experiment_frame, get_frame_slice
+from scripts.cache import clear_analysis_cache
+from scripts.jobs import jobs_em_andamento
+from scripts.plotting import BACKENDS
+from scripts.loader import FORMATOS, load_experiment_file
+from scripts.incremental import append_daily, list_experiments, load_incremental_frame
+from scripts.store import (list_saved_experiments, load_saved_frame, remove_results,
+                           remove_saved_experiment, save_experiment)
+from scripts.streaming import (LIMITE_STREAMING_MB, build_experiment_frame_streaming,
+                               hash_source, supports_streaming)
 
 # Configuração da página
 st.set_page_config(
@@ -14,18 +25,6 @@ st.set_page_config(
 if 'theme' not in st.session_state:
     st.session_state.theme = 'dark'
 
-# Configuração global para melhorar a qualidade dos gráficos
-plt.rcParams['figure.dpi'] = 150
-plt.rcParams['savefig.dpi'] = 150
-plt.rcParams['font.size'] = 12
-plt.rcParams['axes.labelsize'] = 12
-plt.rcParams['axes.titlesize'] = 14
-plt.rcParams['xtick.labelsize'] = 10
-plt.rcParams['ytick.labelsize'] = 10
-plt.rcParams['legend.fontsize'] = 10
-plt.rcParams['figure.titlesize'] = 16
-plt.style.use('seaborn-v0_8-whitegrid')
-
 # Função para alternar tema
 def toggle_theme():
     st.session_state.theme = 'light' if st.session_state.theme == 'dark' else 'dark'
@@ -177,6 +176,13 @@ if 'page' not in st.session_state:
     st.session_state.page = 'home'
 if 'data' not in st.session_state:
     st.session_state.data = None
+if 'frame' not in st.session_state:
+    st.session_state.frame = None
+if 'fonte' not in st.session_state:
+    st.session_state.fonte = None
+# Id do experimento no histórico (scripts.store); None para experimentos incrementais
+if 'experimento_salvo' not in st.session_state:
+    st.session_state.experimento_salvo = None
 
 # Funções para navegação
 def go_to_home():
@@ -194,6 +200,47 @@ def go_to_bayes_beta():
 def go_to_metrics_analysis():
     st.session_state.page = 'metrics_analysis'
 
+def go_to_sequential():
+    st.session_state.page = 'sequential'
+
+def go_to_ratio():
+    st.session_state.page = 'ratio'
+
+def go_to_power():
+    st.session_state.page = 'power'
+
+def go_to_compound():
+    st.session_state.page = 'compound'
+
+# Modo incremental: carrega um experimento salvo sem novo upload
+def abrir_experimento(experimento):
+    try:
+        st.session_state.frame = load_incremental_frame(experimento)
+    except ValueError as e:
+        st.session_state.erro_incremental = str(e)
+        return
+    st.session_state.data = None
+    st.session_state.fonte = None
+    st.session_state.arquivo_hash = None
+    st.session_state.experimento_salvo = None
+
+# Histórico: reabre um experimento já analisado, com os resultados salvos
+def abrir_do_historico(experimento):
+    try:
+        st.session_state.frame = load_saved_frame(experimento)
+    except (ValueError, OSError) as e:
+        st.session_state.erro_historico = str(e)
+        return
+    st.session_state.data = None
+    st.session_state.fonte = None
+    st.session_state.arquivo_hash = None
+    st.session_state.experimento_salvo = experimento
+
+def remover_do_historico(experimento):
+    remove_saved_experiment(experimento)
+    if st.session_state.experimento_salvo == experimento:
+        st.session_state.experimento_salvo = None
+
 # Cabeçalho principal
 st.markdown('<div class="main-header">Análises de Experimentos A/B</div>', unsafe_allow_html=True)
 st.caption("Developed by LF Corporations")
@@ -214,7 +261,7 @@ if st.sidebar.button("🏠 Home", key="home_btn", help="Voltar para a página in
 st.sidebar.markdown('<div class="sidebar-header">🧪 Escolha uma análise:</div>', unsafe_allow_html=True)
 
 # Verifica se há dados carregados
-dados_carregados = st.session_state.data is not None
+dados_carregados = st.session_state.frame is not None
 
 # Botões de análise (desabilitados se não houver dados)
 if st.sidebar.button("📈 Bootstrapping Diário", key="bootstrap_btn", 
@@ -232,52 +279,207 @@ if st.sidebar.button("🧮 Bayesiano", key="bayes_beta_btn",
                     help="Carregue dados primeiro" if not dados_carregados else "Análise bayesiana simples"):
     go_to_bayes_beta()
 
+if st.sidebar.button("🛒 Bayesiano Composto (Conversão × Ticket)", key="compound_btn",
+                    disabled=not dados_carregados,
+                    help="Carregue dados primeiro" if not dados_carregados else "RPV como taxa de conversão × valor do pedido"):
+    go_to_compound()
+
 if st.sidebar.button("📊 Métricas Básicas", key="metrics_btn", 
                     disabled=not dados_carregados,
                     help="Carregue dados primeiro" if not dados_carregados else "Análise de métricas básicas"):
     go_to_metrics_analysis()
 
+if st.sidebar.button("⏱️ Análise Sequencial", key="sequential_btn",
+                    disabled=not dados_carregados,
+                    help="Carregue dados primeiro" if not dados_carregados else "Acompanhamento diário com parada antecipada"):
+    go_to_sequential()
+
+if st.sidebar.button("📐 Métricas de Razão (Delta + CUPED)", key="ratio_btn",
+                    disabled=not dados_carregados,
+                    help="Carregue dados primeiro" if not dados_carregados else "RPV e conversão como razão de somas, com redução de variância"):
+    go_to_ratio()
+
+if st.sidebar.button("🗓️ Planejamento (Poder e Duração)", key="power_btn",
+                    disabled=not dados_carregados,
+                    help="Carregue dados primeiro" if not dados_carregados else "Quantos dias um novo teste precisa para detectar um lift de RPV"):
+    go_to_power()
+
 # Adicionar mensagem informativa quando não houver dados
 if not dados_carregados:
     st.sidebar.info("⚠️ Faça upload de dados na página inicial para habilitar as análises")
 
+# Os resultados ficam em cache por dados/parâmetros; este botão força o recálculo
+if st.sidebar.button("🧹 Limpar cache de resultados", key="clear_cache_btn",
+                     help="Descarta os resultados memoizados (e os salvos no histórico) e recalcula as análises"):
+    clear_analysis_cache()
+    if st.session_state.experimento_salvo:
+        remove_results(st.session_state.experimento_salvo)
+
+# As análises rodam em segundo plano: trocar de página não descarta o cálculo
+em_andamento = jobs_em_andamento()
+if em_andamento:
+    st.sidebar.caption(f"⏳ {em_andamento} análise(s) em andamento no servidor")
+
+# Matplotlib gera imagens estáticas; Plotly envia só os bins/curvas para gráficos interativos
+st.sidebar.radio("🎨 Gráficos", options=list(BACKENDS.values()), key="backend_graficos")
+
+# Segmento analisado: a fatia sai do cubo (dia x variante x segmento), sem reagrupar as linhas
+frame = st.session_state.frame
+if dados_carregados and frame.dimensoes:
+    segmentos = ["Todos os dados"] + [f"{dimensao} = {valor}" for dimensao in frame.dimensoes
+                                      for valor in frame.segmentos(dimensao)]
+    if st.session_state.get('segmento') not in segmentos:
+        st.session_state.segmento = segmentos[0]
+    segmento = st.sidebar.selectbox("🧩 Segmento", options=segmentos, key="segmento",
+                                    help="As análises usam apenas os dados do segmento escolhido")
+    if segmento != segmentos[0]:
+        dimensao, valor = segmento.split(" = ", 1)
+        try:
+            frame = get_frame_slice(frame, ((dimensao, valor),))
+        except ValueError as e:
+            st.sidebar.error(f"❌ {e}")
+            frame = st.session_state.frame
+
 # Página Home
 if st.session_state.page == 'home':
     # Instruções
     with st.expander("ℹ️ Como usar esta ferramenta", expanded=False):
         st.markdown("""
-        1. Faça upload de um arquivo Excel contendo as colunas: `data`, `variante`, `receita`, `sessoes`
+        1. Faça upload de um arquivo (Excel, CSV, CSV.gz, Parquet ou Arrow) contendo as colunas: `data`, `variante`, `receita`, `sessoes`
         2. Selecione um método de análise no menu lateral
         3. Visualize os resultados e interpretações para o método escolhido
+        4. Para testes em andamento, marque "Anexar a um experimento em andamento" e envie só os dias novos
+        5. Para planejar um novo teste, envie dados históricos no mesmo formato e abra "Planejamento" para ver quantos dias ele precisa rodar
         
         **Formato esperado do arquivo:**
         - `data`: Data da observação (AAAA-MM-DD)
-        - `variante`: Nome da variante ("Controle" ou "Nova")
+        - `variante`: Nome da variante ("Controle", "Nova", ...). Testes A/B/n com qualquer número de variantes são suportados; cada variante é comparada com o "Controle" (ou, na ausência dele, com a primeira em ordem alfabética)
         - `receita`: Valor da receita gerada (Apenas números)
         - `sessoes`: Número de sessões/visitas
+        - `receita_pre` (opcional): Receita da mesma unidade antes do teste, usada no ajuste CUPED
+        - Colunas de texto adicionais (opcional, ex.: `dispositivo`, `pais`, `canal`): viram segmentos, com análise por segmento na barra lateral
         """)
 
     # Upload de arquivo
-    uploaded_file = st.file_uploader("📂 Envie o arquivo Excel com colunas: data, variante, receita, sessoes", 
-                                    type=["xlsx", "xls"])
+    uploaded_file = st.file_uploader("📂 Envie o arquivo com colunas: data, variante, receita, sessoes", 
+                                    type=FORMATOS)
+    modo_streaming = st.checkbox("📦 Ler em blocos (arquivos grandes)", value=False,
+                                 help=f"Agrega o arquivo bloco a bloco sem mantê-lo inteiro em memória. "
+                                      f"Ativado automaticamente acima de {LIMITE_STREAMING_MB} MB (CSV, Parquet e Arrow)")
+
+    # Modo incremental: o arquivo traz só os dias novos de um experimento já salvo
+    modo_incremental = st.checkbox("📅 Anexar a um experimento em andamento", value=False,
+                                   help="Envie apenas os dias novos: as estatísticas diárias e as posteriores "
+                                        "salvas do experimento são atualizadas sem reprocessar o histórico")
+    experimento = None
+    if modo_incremental:
+        salvos = list_experiments()
+        if salvos:
+            st.caption("Experimentos salvos: " + ", ".join(
+                f"{e['experimento']} ({e['dias']} dias, até {e['ultimo_dia']})" for e in salvos))
+        experimento = st.text_input("Nome do experimento", key="experimento_incremental").strip() or None
+        if experimento and not uploaded_file:
+            # Callback: o frame já está carregado quando a barra lateral é desenhada
+            st.button("📂 Abrir experimento salvo", on_click=abrir_experimento, args=(experimento,))
+            if st.session_state.get('erro_incremental'):
+                st.error(f"❌ {st.session_state.pop('erro_incremental')}")
+
+    # Histórico: experimentos já enviados, reabertos sem novo upload nem recálculo
+    historico = list_saved_experiments()
+    if not historico.empty and not uploaded_file:
+        with st.expander(f"📚 Experimentos anteriores ({len(historico)})", expanded=False):
+            col1, col2 = st.columns(2)
+            variantes = sorted({v for lista in historico["variantes"] for v in lista.split(",")})
+            variante = col1.selectbox("Variante", options=["Todas"] + variantes, key="variante_historico")
+            periodo = col2.date_input(
+                "Período com dados", key="periodo_historico",
+                value=(date.fromisoformat(historico["inicio"].min()), date.fromisoformat(historico["fim"].max())))
+            desde, ate = (periodo if len(periodo) == 2 else (None, None))
+            filtrados = list_saved_experiments(variante=None if variante == "Todas" else variante,
+                                               desde=desde, ate=ate)
+            if filtrados.empty:
+                st.info("Nenhum experimento salvo com esses filtros.")
+            else:
+                opcoes = {
+                    f"{e.nome} · {e.inicio} a {e.fim} · {e.variantes.replace(',', ', ')} · "
+                    f"{e.resultados} resultado(s)": e.id
+                    for e in filtrados.itertuples()
+                }
+                escolhido = opcoes[st.selectbox("Experimento", options=list(opcoes), key="escolha_historico")]
+                col1, col2 = st.columns(2)
+                col1.button("📂 Abrir", key="abrir_historico", on_click=abrir_do_historico, args=(escolhido,),
+                            help="Carrega as estatísticas salvas; as análises já calculadas são exibidas sem recálculo")
+                col2.button("🗑️ Remover do histórico", key="remover_historico",
+                            on_click=remover_do_historico, args=(escolhido,))
+            if st.session_state.get('erro_historico'):
+                st.error(f"❌ {st.session_state.pop('erro_historico')}")
 
     if uploaded_file:
-        df = pd.read_excel(uploaded_file)
-        st.session_state.data = df
+        # Só relê o arquivo quando ele muda; reruns com o mesmo upload reaproveitam o estado
+        arquivo_hash = hash_source(uploaded_file)
+        chave_arquivo = f"{arquivo_hash}:{experimento}" if modo_incremental else arquivo_hash
+        novo_arquivo = st.session_state.get('arquivo_hash') != chave_arquivo
+        if novo_arquivo:
+            usar_streaming = supports_streaming(uploaded_file) and (
+                modo_streaming or uploaded_file.size > LIMITE_STREAMING_MB * 1024 ** 2
+            )
+            # Validação e pré-processamento feitos uma única vez; as análises leem o frame compartilhado
+            try:
+                if usar_streaming:
+                    df = None
+                    frame = build_experiment_frame_streaming(uploaded_file)
+                else:
+                    df = load_experiment_file(uploaded_file)
+                    frame = get_experiment_frame(df)
+                if modo_incremental:
+                    if not experimento:
+                        st.warning("Informe o nome do experimento para anexar os novos dias.")
+                        st.stop()
+                    append_daily(experimento, frame.daily, arquivo_hash)
+                    df = None
+                    frame = load_incremental_frame(experimento)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                st.stop()
+            # Salva no histórico (os experimentos incrementais têm o próprio armazenamento)
+            st.session_state.experimento_salvo = None
+            if not modo_incremental:
+                try:
+                    st.session_state.experimento_salvo = save_experiment(frame, uploaded_file.name)
+                except (OSError, sqlite3.Error) as e:
+                    st.warning(f"⚠️ Não foi possível salvar o experimento no histórico: {e}")
+            st.session_state.data = df
+            st.session_state.frame = frame
+            # Lido em blocos: o arquivo é relido no bootstrap por sessão, que precisa das linhas
+            st.session_state.fonte = uploaded_file if frame.raw is None and not modo_incremental else None
+            st.session_state.arquivo_hash = chave_arquivo
+        df = st.session_state.data
+        frame = st.session_state.frame
         
         # Exibir preview dos dados
         st.markdown('<div class="sub-header">🔍 Preview dos dados carregados</div>', unsafe_allow_html=True)
-        st.dataframe(df.head(10), height=300)
-        st.info(f"Total de {len(df)} registros carregados.")
+        if df is not None:
+            st.dataframe(df.head(10), height=300)
+            st.info(f"Total de {len(df)} registros carregados.")
+        else:
+            # Leitura em blocos: apenas as estatísticas diárias ficam em memória
+            st.dataframe(frame.daily.head(10), height=300)
+            st.info(f"Total de {int(frame.daily['linhas'].sum())} registros agregados em "
+                    f"{len(frame.daily)} combinações de dia e variante.")
         
         # Instruções para continuar
         st.success("✅ Dados carregados com sucesso! Selecione um método de análise no menu lateral.")
         
         # Força o rerun da aplicação para atualizar os botões na sidebar
-        st.rerun()
+        if novo_arquivo:
+            st.rerun()
 
 # Página Bootstrapping
 elif st.session_state.page == 'bootstrap':
+    from scripts.run_bootstrap import run_bootstrap
+    from scripts.parallel import workers_disponiveis
+    from scripts.resampling import PESOS
+
     st.markdown('<div class="sub-header">📊 Resultado Bootstrapping Diário</div>', unsafe_allow_html=True)
     
     # Expander logo após o título
@@ -291,18 +493,48 @@ elif st.session_state.page == 'bootstrap':
         
         3. **Intervalos de Confiança**: Calculamos o intervalo de confiança de 90% para a média do RPV de cada variante
         
-        4. **Diferença**: Calculamos a diferença entre as médias de RPV das variantes em cada amostra bootstrap
+        4. **Diferença**: Calculamos a diferença entre as médias de RPV de cada variante e do Controle em cada amostra bootstrap, e a probabilidade de cada variante ser a melhor
         
         5. **P-valor**: Estimamos o p-valor como a proporção de amostras onde a diferença é menor que zero
         
         6. **Lift**: Calculamos o lift percentual como (RPV_nova / RPV_controle - 1) * 100
         
         Esta abordagem é robusta a outliers e não assume normalidade dos dados, sendo ideal para análises de testes A/B com dados diários.
+
+        **Bootstrap por sessão:** com o nível "Por sessão", cada linha do arquivo (sessão ou usuário) é reamostrada
+        em vez do RPV médio de cada dia. Cada linha recebe um peso Poisson(1) ou de Dirichlet (bootstrap bayesiano) em
+        cada réplica e as somas ponderadas são acumuladas em uma única passada pelos dados, sem montar as
+        reamostragens em memória — viável para milhões de linhas.
         """)
     
+    # Número de processos usados nas reamostragens (não altera o resultado)
+    n_workers = st.sidebar.slider("⚙️ Núcleos para o bootstrap", min_value=1,
+                                  max_value=workers_disponiveis(), value=1,
+                                  help="As reamostragens são divididas entre processos; o resultado é o mesmo para qualquer número de núcleos")
+
+    # Nível da reamostragem: por sessão só quando as linhas brutas (ou o arquivo) estão disponíveis
+    sessao_disponivel = frame.raw is not None or st.session_state.fonte is not None
+    niveis = {"Diário (RPV médio por dia)": "diario", "Por sessão (linhas do arquivo)": "sessao"}
+    nivel = niveis[st.sidebar.radio("🔁 Nível da reamostragem", options=list(niveis), key="nivel_bootstrap",
+                                    disabled=not sessao_disponivel,
+                                    help="Por sessão reamostra cada linha do arquivo em uma única passada" if sessao_disponivel
+                                    else "Indisponível para experimentos incrementais ou reabertos do histórico: envie o arquivo completo")]
+    if not sessao_disponivel:
+        nivel = "diario"
+    parametros = {}
+    if nivel == "sessao":
+        rotulos_pesos = {rotulo: chave for chave, rotulo in PESOS.items()}
+        parametros["pesos"] = rotulos_pesos[st.sidebar.selectbox(
+            "Pesos", options=list(rotulos_pesos), key="pesos_bootstrap",
+            help="Os pesos de Dirichlet (bootstrap bayesiano) são bem mais rápidos de sortear")]
+        parametros["num_samples"] = st.sidebar.select_slider(
+            "Réplicas", options=[200, 500, 1000, 2000, 5000], value=1000, key="replicas_bootstrap",
+            help="O custo cresce com réplicas x linhas; a memória só com o número de réplicas")
+
     # Conteúdo da análise
     with st.container():
-        run_bootstrap(st.session_state.data)
+        run_bootstrap(frame, n_workers=n_workers, nivel=nivel,
+                      fonte=st.session_state.fonte, **parametros)
         
         st.markdown("""
         🔍 **O que foi feito?** A análise de bootstrapping calcula a média da receita por visita (RPV) para cada grupo
@@ -313,11 +545,13 @@ elif st.session_state.page == 'bootstrap':
 
 # Página Bayes Scipy
 elif st.session_state.page == 'bayes_scipy':
+    from scripts.run_bayes_scipy import TEXTO_PRIOR_EMPIRICA, run_bayes_scipy, sidebar_empirical_prior
+
     st.markdown('<div class="sub-header">📊 Resultado Bayesiano com Beta (RPV Escalado)</div>', unsafe_allow_html=True)
     
     # Expander logo após o título
     with st.expander("ℹ️ Como o cálculo foi feito", expanded=False):
-        st.markdown("""
+        st.markdown(f"""
         ### Metodologia Bayesiana com Distribuição Beta (RPV Escalado)
         
         1. **Cálculo do RPV**: Para cada dia e variante, calculamos a Receita Por Visita (RPV = receita / sessões)
@@ -328,18 +562,23 @@ elif st.session_state.page == 'bayes_scipy':
         
         4. **Posterior**: Calculamos a distribuição posterior combinando o prior com os dados observados
         
-        5. **Simulação Monte Carlo**: Geramos 10.000 amostras da distribuição posterior para cada variante
+        5. **Probabilidade exata**: Calculamos P(Nova > Controle) diretamente das posteriores Beta, sem ruído de simulação: pela soma em forma fechada com duas variantes e α inteiro, senão por integração numérica em uma grade comum a todas as variantes
         
-        6. **Probabilidade**: Calculamos a probabilidade da variante Nova ser melhor que o Controle como a proporção de amostras onde Nova > Controle
+        6. **Intervalos**: Os intervalos de credibilidade de 90% vêm dos quantis (ppf) de cada posterior; os gráficos mostram a densidade exata (pdf) de cada posterior, sem amostragem
         
         7. **Reescalamento**: Convertemos os resultados de volta para a escala original de RPV
         
+        {TEXTO_PRIOR_EMPIRICA}
+
         Esta abordagem bayesiana permite quantificar diretamente a probabilidade de uma variante ser superior à outra, incorporando incerteza de forma natural.
         """)
-    
+
+    # Prior empírica do lift, ajustada nos experimentos salvos no histórico
+    prior_lift = sidebar_empirical_prior(st.session_state.page, st.session_state.experimento_salvo)
+
     # Conteúdo da análise
     with st.container():
-        run_bayes_scipy(st.session_state.data)
+        run_bayes_scipy(frame, prior_lift=prior_lift)
         
         st.markdown("""
         🔍 **O que foi feito?** A análise bayesiana utiliza distribuições beta para modelar a incerteza sobre a RPV,
@@ -350,31 +589,41 @@ elif st.session_state.page == 'bayes_scipy':
 
 # Página Bayes Beta
 elif st.session_state.page == 'bayes_beta':
+    from scripts.run_bayes_beta import run_bayes_beta
+    from scripts.run_bayes_scipy import TEXTO_PRIOR_EMPIRICA, sidebar_empirical_prior
+
     st.markdown('<div class="sub-header">📊 Resultado Bayesiano</div>', unsafe_allow_html=True)
     
     # Expander logo após o título
     with st.expander("ℹ️ Como o cálculo foi feito", expanded=False):
-        st.markdown("""
+        st.markdown(f"""
         ### Metodologia Bayesiana com Distribuição Normal
         
         1. **Cálculo do RPV**: Para cada dia e variante, calculamos a Receita Por Visita (RPV = receita / sessões)
         
-        2. **Modelagem Bayesiana**: Assumimos que o RPV médio de cada variante segue uma distribuição Normal
+        2. **Modelagem Bayesiana**: Assumimos que o RPV diário de cada variante segue uma distribuição Normal com média e variância desconhecidas
+        
+        3. **Prior**: Utilizamos a prior conjugada Normal-Gama-Inversa, comum a todas as variantes, centrada na média e na variância do RPV diário de todo o teste e com peso equivalente a um dia de dados
         
-        3. **Prior**: Utilizamos priors baseados nos dados observados, com média igual à média amostral e desvio padrão proporcional ao erro padrão
+        4. **Posterior**: A posterior sai em forma fechada de apenas três números por variante (dias, soma e soma dos quadrados do RPV), e a média do RPV segue uma distribuição t de Student. Como essas somas se acumulam, o resultado é o mesmo com dados incrementais ou lidos em blocos
         
-        4. **Simulação Monte Carlo**: Geramos 10.000 amostras da distribuição posterior para cada variante
+        5. **Densidades**: Os gráficos mostram a densidade exata (pdf) da posterior de cada variante, sem amostragem
         
-        5. **Probabilidade**: Calculamos a probabilidade da variante Nova ser melhor que o Controle como a proporção de amostras onde Nova > Controle
+        6. **Probabilidade**: Calculamos a probabilidade exata da variante Nova ser melhor que o Controle por integração numérica das posteriores t (sem simulação)
         
-        6. **Intervalo de Credibilidade**: Calculamos o intervalo de 90% de credibilidade para o RPV de cada variante
+        7. **Intervalo de Credibilidade**: Calculamos o intervalo de 90% de credibilidade para o RPV de cada variante pelos quantis da posterior
         
-        Esta abordagem bayesiana é mais direta que a versão com Beta e não requer normalização dos dados, sendo adequada quando os valores de RPV seguem aproximadamente uma distribuição normal.
+        {TEXTO_PRIOR_EMPIRICA}
+
+        Esta abordagem bayesiana é mais direta que a versão com Beta e não requer normalização dos dados (nem mínimo e máximo do RPV), sendo adequada quando a média diária do RPV segue aproximadamente uma distribuição normal.
         """)
-    
+
+    # Prior empírica do lift, ajustada nos experimentos salvos no histórico
+    prior_lift = sidebar_empirical_prior(st.session_state.page, st.session_state.experimento_salvo)
+
     # Conteúdo da análise
     with st.container():
-        run_bayes_beta(st.session_state.data)
+        run_bayes_beta(frame, prior_lift=prior_lift)
         
         st.markdown("""
         🔍 **O que foi feito?** A análise bayesiana com distribuição normal modela diretamente a receita por visita,
@@ -385,6 +634,8 @@ elif st.session_state.page == 'bayes_beta':
 
 # Página Métricas Básicas
 elif st.session_state.page == 'metrics_analysis':
+    from scripts.run_metrics_analysis import run_metrics_analysis
+
     st.markdown('<div class="sub-header">📊 Métricas Básicas</div>', unsafe_allow_html=True)
     
     # Expander logo após o título
@@ -405,17 +656,27 @@ elif st.session_state.page == 'metrics_analysis':
         4. **Comparação Simples**: Calculamos o lift percentual como (Métrica_nova / Métrica_controle - 1) * 100
         
         5. **Sample Ratio Mismatch (SRM)**:
-           - Verificamos se a distribuição de tráfego entre as variantes está conforme o esperado (geralmente 50/50)
+           - Verificamos se a distribuição de tráfego entre as variantes está conforme a alocação planejada (por padrão, divisão igual; ajustável na barra lateral)
            - Calculamos a proporção observada de sessões para cada variante
-           - Realizamos um teste binomial para verificar se a diferença entre a proporção observada e a esperada é estatisticamente significativa
+           - Realizamos um teste qui-quadrado de aderência para verificar se a diferença entre a proporção observada e a esperada é estatisticamente significativa
            - Um p-valor < 0.05 indica que a distribuição não é aleatória, sugerindo um problema na alocação de tráfego que pode comprometer os resultados do teste
+           - O mesmo teste é aplicado a cada dia e a cada valor das colunas de segmento (ex.: dispositivo, país), com correção de Benjamini-Hochberg para múltiplos testes, destacando onde a alocação foi quebrada
         
         Esta análise fornece uma visão geral descritiva do desempenho das variantes, sem inferência estatística avançada, sendo útil para uma primeira avaliação dos resultados do teste.
         """)
     
+    # Alocação planejada do tráfego, em %, na ordem das variantes (Controle primeiro)
+    variantes = frame.ordem_variantes
+    st.sidebar.markdown("⚖️ Alocação planejada (%)")
+    alocacao = tuple(
+        st.sidebar.number_input(nome, min_value=0.0, max_value=100.0, value=round(100 / len(variantes), 2),
+                                step=1.0, key=f"alocacao_{nome}")
+        for nome in variantes
+    )
+
     # Conteúdo da análise
     with st.container():
-        run_metrics_analysis(st.session_state.data)
+        run_metrics_analysis(frame, alocacao=alocacao)
         
         st.markdown("""
         🔍 **O que foi feito?** Análise das métricas básicas do teste, incluindo receita por sessão,
@@ -423,3 +684,186 @@ elif st.session_state.page == 'metrics_analysis':
 
         ✅ Fornece uma visão geral do desempenho das variantes sem inferência estatística avançada.
         """)
+
+# Página Análise Sequencial
+elif st.session_state.page == 'sequential':
+    from scripts.run_sequential import run_sequential
+    from scripts.sequential import GASTOS
+
+    st.markdown('<div class="sub-header">📊 Análise Sequencial</div>', unsafe_allow_html=True)
+
+    # Expander logo após o título
+    with st.expander("ℹ️ Como o cálculo foi feito", expanded=False):
+        st.markdown("""
+        ### Metodologia de Testes Sequenciais
+
+        1. **Estatísticas acumuladas**: Para cada dia, acumulamos a contagem, a média e a variância do RPV de cada variante desde o início do teste (uma única passada de somas acumuladas)
+
+        2. **mSPRT (sempre-válido)**: Comparamos cada variante com o Controle por uma razão de verossimilhança de mistura, com prior Normal centrada em zero para a diferença. O p-valor e o intervalo resultantes continuam válidos não importa quantas vezes o teste seja consultado
+
+        3. **Grupo sequencial**: A estatística Z acumulada é comparada a fronteiras que gastam o alfa aos poucos ao longo dos dias planejados (O'Brien-Fleming é conservador no início; Pocock gasta o alfa de forma uniforme)
+
+        4. **Parada antecipada**: Quando uma fronteira é cruzada, o teste pode ser encerrado e o tráfego liberado
+
+        Diferente das análises de resultado final, estas estatísticas podem ser acompanhadas diariamente sem inflar a taxa de falsos positivos.
+        """)
+
+    # Parâmetros do desenho sequencial
+    alpha = st.sidebar.select_slider("⚙️ Nível de significância (α)", options=[0.01, 0.05, 0.10], value=0.05)
+    rotulo_gasto = st.sidebar.selectbox("⚙️ Função de gasto de alfa", options=list(GASTOS.values()))
+    gasto = next(chave for chave, rotulo in GASTOS.items() if rotulo == rotulo_gasto)
+    dias_planejados = st.sidebar.number_input("⚙️ Dias planejados", min_value=1,
+                                              value=int(frame.daily['data'].nunique()),
+                                              help="Duração prevista do teste; define a fração de informação de cada dia")
+    efeito_relativo = st.sidebar.slider("⚙️ Efeito esperado (mSPRT)", min_value=0.01, max_value=0.50,
+                                        value=0.05, format="%.2f",
+                                        help="Escala da prior da diferença, como fração da média do Controle")
+
+    # Conteúdo da análise
+    with st.container():
+        run_sequential(frame, alpha=alpha, gasto=gasto,
+                       dias_planejados=int(dias_planejados), efeito_relativo=efeito_relativo)
+
+        st.markdown("""
+        🔍 **O que foi feito?** A análise sequencial acompanha, dia a dia, a diferença de RPV entre cada variante
+        e o Controle com testes que permitem consultas frequentes.
+
+        ✅ Indica se o teste já pode ser encerrado com segurança ou se deve continuar coletando dados.
+        """)
+
+# Página Métricas de Razão
+elif st.session_state.page == 'ratio':
+    from scripts.run_ratio_analysis import run_ratio_analysis
+
+    st.markdown('<div class="sub-header">📊 Métricas de Razão (Método Delta + CUPED)</div>', unsafe_allow_html=True)
+
+    # Expander logo após o título
+    with st.expander("ℹ️ Como o cálculo foi feito", expanded=False):
+        st.markdown("""
+        ### Metodologia de Métricas de Razão
+
+        1. **Razão de somas**: O RPV é calculado como receita total / sessões totais de cada variante (e a conversão como conversões / sessões), em vez da média das razões diárias, que é enviesada e mais ruidosa
+
+        2. **Método delta**: A variância da razão vem das somas, somas de quadrados e produtos cruzados de receita e sessões por linha, em forma fechada e sem reamostragem
+
+        3. **CUPED**: Quando o arquivo traz a coluna `receita_pre`, a razão é ajustada pela covariável do período anterior ao teste. A parte da variação explicada pelo histórico de cada unidade é removida, o que estreita os intervalos sem introduzir viés
+
+        4. **Comparação**: Diferença absoluta e lift relativo de cada variante contra o Controle, com intervalo de confiança e p-valor do teste Z
+
+        A redução de variância do CUPED equivale à fração de tráfego economizada: com 30% de redução, a mesma precisão é atingida com cerca de 30% menos dias de teste.
+        """)
+
+    alpha = st.sidebar.select_slider("⚙️ Nível de significância (α)", options=[0.01, 0.05, 0.10], value=0.05,
+                                     key="alpha_razao")
+
+    # Conteúdo da análise
+    with st.container():
+        run_ratio_analysis(frame, alpha=alpha)
+
+        st.markdown("""
+        🔍 **O que foi feito?** RPV e conversão foram analisados como razões de somas, com intervalos pelo método delta
+        e, quando há dados do período anterior, com o ajuste CUPED.
+
+        ✅ Indica se cada variante é superior, inferior ou inconclusiva, geralmente com menos dias de tráfego que as demais análises.
+        """)
+
+# Página Bayesiano Composto
+elif st.session_state.page == 'compound':
+    from scripts.run_compound import run_compound
+    from scripts.compound import MODELOS_VALOR, PRECISAO_PADRAO
+
+    st.markdown('<div class="sub-header">📊 Bayesiano Composto: Conversão × Valor do Pedido</div>', unsafe_allow_html=True)
+
+    # Expander logo após o título
+    with st.expander("ℹ️ Como o cálculo foi feito", expanded=False):
+        st.markdown("""
+        ### Metodologia do Modelo Composto
+
+        1. **Decomposição**: A receita por sessão é zero na maioria das sessões e tem cauda longa nas que compram. Por isso o RPV é modelado como taxa de conversão × valor médio do pedido, em vez de diretamente
+
+        2. **Conversão**: A taxa de conversão (sessões com receita / sessões) de cada variante tem posterior Beta, a partir de uma prior Beta(1,1) (modelo Beta-Binomial)
+
+        3. **Valor do pedido**: A receita das sessões que converteram segue uma Lognormal (o log do valor é Normal, com prior conjugada Normal-Gama-Inversa) ou uma Gama (com prior conjugada na taxa). A média da Lognormal, exp(μ + σ²/2), leva em conta a cauda dos pedidos grandes
+
+        4. **Amostragem conjunta**: Conversão e valor do pedido são sorteados juntos das posteriores, e o RPV de cada amostra é o produto dos dois. As amostras são geradas em lotes que dobram até o erro de Monte Carlo das probabilidades e das médias ficar abaixo da precisão escolhida: resultados claros precisam de poucas amostras, resultados apertados recebem mais
+
+        5. **Probabilidade e intervalos**: P(variante > Controle), o lift do RPV e os intervalos de 90% saem das amostras do RPV
+
+        Tudo vem das somas por variante (conversões, sessões, receita e log da receita), então o modelo funciona igual com arquivos grandes lidos em blocos e com o modo incremental. A conversão é contada por linha, então o arquivo precisa ter uma linha por sessão (sessoes = 1 em todas as linhas); arquivos agregados, com várias sessões por linha, são recusados.
+        """)
+
+    rotulo_modelo = st.sidebar.selectbox("⚙️ Valor do pedido", options=list(MODELOS_VALOR.values()), key="modelo_valor")
+    modelo_valor = next(chave for chave, rotulo in MODELOS_VALOR.items() if rotulo == rotulo_modelo)
+    precisao = st.sidebar.select_slider("⚙️ Erro de Monte Carlo", options=[0.01, PRECISAO_PADRAO, 0.0025, 0.001],
+                                        value=PRECISAO_PADRAO, key="precisao_composto",
+                                        help="Erro máximo das probabilidades e das médias (relativo); "
+                                             "menores exigem mais amostras")
+
+    # Conteúdo da análise
+    with st.container():
+        run_compound(frame, modelo_valor=modelo_valor, precisao=precisao)
+
+        st.markdown("""
+        🔍 **O que foi feito?** O RPV de cada variante foi decomposto em taxa de conversão e valor do pedido, cada um
+        com sua posterior, e as duas partes foram amostradas juntas.
+
+        ✅ Mostra a probabilidade da variante ser melhor e se a diferença vem da conversão ou do valor do pedido.
+        """)
+
+# Página Planejamento
+elif st.session_state.page == 'power':
+    from scripts.run_power import run_power
+    from scripts.parallel import workers_disponiveis
+    from scripts.power import METODOS_PODER
+
+    st.markdown('<div class="sub-header">📊 Planejamento: Poder e Duração do Teste</div>', unsafe_allow_html=True)
+
+    # Expander logo após o título
+    with st.expander("ℹ️ Como o cálculo foi feito", expanded=False):
+        st.markdown("""
+        ### Metodologia de Planejamento
+
+        1. **Histórico**: O RPV diário do Controle nos dados enviados (ex.: um teste anterior ou um período sem teste) define a média e a variação dia a dia esperadas para cada variante, com o mesmo tráfego por variante
+
+        2. **Teste Z (analítico)**: Para cada lift e duração, o poder do teste unilateral da diferença das médias diárias sai em forma fechada, assim como o número exato de dias para atingir o poder alvo
+
+        3. **Simulação (bootstrap e bayesiano)**: Milhares de testes são simulados sorteando dias do histórico com reposição, com o lift aplicado à variante. Cada teste simulado é decidido pela mesma regra da página correspondente (p-valor do bootstrap abaixo de α, ou P(variante > Controle) acima de 1 - α). Todos os lifts e testes de um bloco são calculados em uma única operação de arrays, e os blocos são divididos entre os núcleos
+
+        4. **Poder**: A fração dos testes simulados em que o lift foi detectado
+
+        A simulação capta a assimetria e as caudas do RPV diário e o comportamento real de cada método com poucos dias; o teste Z serve de referência (linhas pontilhadas no gráfico).
+        """)
+
+    # Grade de lifts e durações e regra de decisão
+    rotulo_metodo = st.sidebar.selectbox("⚙️ Método", options=list(METODOS_PODER.values()), key="metodo_poder")
+    metodo = next(chave for chave, rotulo in METODOS_PODER.items() if rotulo == rotulo_metodo)
+    lifts = st.sidebar.multiselect("⚙️ Lifts de RPV (%)", options=[1, 2, 3, 5, 7.5, 10, 15, 20, 30],
+                                   default=[2, 5, 10, 15, 20], key="lifts_poder")
+    duracao_maxima = st.sidebar.slider("⚙️ Duração máxima (dias)", min_value=14, max_value=112, value=56, step=7,
+                                       key="duracao_poder", help="As durações avaliadas vão de 7 em 7 dias até este limite")
+    poder = st.sidebar.select_slider("⚙️ Poder alvo", options=[0.7, 0.8, 0.9, 0.95], value=0.8, key="alvo_poder")
+    alpha = st.sidebar.select_slider("⚙️ Nível de significância (α)", options=[0.01, 0.05, 0.10], value=0.05,
+                                     key="alpha_poder")
+    parametros = {}
+    if metodo != "analitico":
+        parametros["num_simulacoes"] = st.sidebar.select_slider(
+            "Simulações por célula", options=[200, 500, 1000, 2000], value=500, key="simulacoes_poder",
+            help="Mais simulações reduzem o ruído das curvas; o custo cresce na mesma proporção")
+        parametros["n_workers"] = st.sidebar.slider(
+            "⚙️ Núcleos para a simulação", min_value=1, max_value=workers_disponiveis(), value=1,
+            key="nucleos_poder", help="O resultado é o mesmo para qualquer número de núcleos")
+
+    # Conteúdo da análise
+    with st.container():
+        if not lifts:
+            st.info("Escolha ao menos um lift na barra lateral.")
+        else:
+            run_power(frame, lifts=[lift / 100 for lift in lifts], duracoes=range(7, duracao_maxima + 1, 7),
+                      alpha=alpha, poder=poder, metodo=metodo, **parametros)
+
+        st.markdown("""
+        🔍 **O que foi feito?** A partir da variação diária do RPV no histórico, estimamos a probabilidade de cada
+        lift ser detectado conforme a duração do teste, de forma analítica e por simulação.
+
+        ✅ Indica quantos dias um novo teste precisa rodar antes do lançamento, e qual o menor lift detectável no prazo disponível.
+        """)
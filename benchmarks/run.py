@@ -0,0 +1,345 @@
+# benchmarks/run.py
+"""
+Benchmarks das análises sobre experimentos sintéticos de vários tamanhos.
+
+Uso:
+    python -m benchmarks.run --tamanhos pequeno medio --saida benchmarks/baselines/atual.json
+    python -m benchmarks.run --comparar benchmarks/baselines/atual.json
+    python -m benchmarks.run --partida --metodos
+
+Cada combinação de tamanho e método roda em um processo novo, para que o pico
+de RSS seja só daquele caso. As fases medidas são:
+- ingest: leitura do arquivo CSV pelo loader
+- aggregate: construção do ExperimentFrame (estatísticas por dia e variante)
+- sample: cálculo da análise (compute_*)
+- plot: geração dos gráficos e da página (render_*), fora do servidor Streamlit
+
+O tempo e o RSS vêm de uma primeira passada; as alocações (pico do tracemalloc)
+de uma segunda, porque o tracemalloc deixa a execução bem mais lenta. Com
+`--comparar`, fases mais lentas ou que usam mais memória que a baseline além
+da tolerância são listadas e o comando termina com código 1.
+
+Com `--partida`, também mede a partida a frio do app, em um processo novo com
+`python -X importtime`: a execução da Home (via AppTest) e o primeiro acesso a
+cada página de análise (import do módulo da página depois da Home). Cada
+medição traz os pacotes que mais pesaram no import.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import generate_experiment
+
+# Tamanhos pré-definidos: (dias, variantes, linhas por dia e variante)
+TAMANHOS = {
+    "pequeno": (14, 2, 1),
+    "medio": (30, 3, 1_000),
+    "grande": (60, 4, 10_000),
+}
+
+FASES = ("ingest", "aggregate", "sample", "plot")
+
+# Sessões por dia e variante, no mínimo, no arquivo por sessão do modelo composto
+SESSOES_COMPOSTO = 1_000
+METODOS = ("bootstrap", "bootstrap_sessao", "bayes_scipy", "bayes_beta", "metrics", "sequential", "ratio", "power", "compound")
+
+# Partida a frio: a Home e o módulo importado no primeiro acesso a cada página
+PAGINAS = {
+    "home": None,
+    "bootstrap": "scripts.run_bootstrap",
+    "bayes_scipy": "scripts.run_bayes_scipy",
+    "bayes_beta": "scripts.run_bayes_beta",
+    "metrics": "scripts.run_metrics_analysis",
+    "sequential": "scripts.run_sequential",
+    "ratio": "scripts.run_ratio_analysis",
+    "power": "scripts.run_power",
+    "compound": "scripts.run_compound",
+}
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_MARCA_PAGINA = "@@pagina"
+_CODIGO_PARTIDA = """
+import importlib, logging, sys, time
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+inicio = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+AppTest.from_file("app.py", default_timeout=120).run()
+home = time.perf_counter() - inicio
+print("{marca}", file=sys.stderr, flush=True)
+inicio = time.perf_counter()
+if {modulo!r}:
+    importlib.import_module({modulo!r})
+print(home, time.perf_counter() - inicio)
+"""
+
+# Diferenças abaixo destes valores absolutos não contam como regressão (ruído de medição)
+MINIMO_TEMPO_S = 0.05
+MINIMO_MEMORIA_MB = 5.0
+
+
+def _funcoes(metodo):
+    from scripts.run_bootstrap import compute_bootstrap, compute_session_bootstrap, render_bootstrap
+    from scripts.run_bayes_scipy import compute_bayes_scipy, render_bayes_scipy
+    from scripts.run_bayes_beta import compute_bayes_beta, render_bayes_beta
+    from scripts.run_metrics_analysis import compute_metrics_analysis, render_metrics_analysis
+    from scripts.run_sequential import compute_sequential, render_sequential
+    from scripts.run_ratio_analysis import compute_ratio_analysis, render_ratio_analysis
+    from scripts.run_power import compute_power, render_power
+    from scripts.run_compound import compute_compound, render_compound
+    return {
+        "bootstrap": (compute_bootstrap, render_bootstrap),
+        "bootstrap_sessao": (compute_session_bootstrap, render_bootstrap),
+        "bayes_scipy": (compute_bayes_scipy, render_bayes_scipy),
+        "bayes_beta": (compute_bayes_beta, render_bayes_beta),
+        "metrics": (compute_metrics_analysis, render_metrics_analysis),
+        "sequential": (compute_sequential, render_sequential),
+        "ratio": (compute_ratio_analysis, render_ratio_analysis),
+        "power": (compute_power, render_power),
+        "compound": (compute_compound, render_compound),
+    }[metodo]
+
+
+def _pico_rss_mb():
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 ** 2 if sys.platform == "darwin" else pico / 1024
+
+
+def _fases(caminho, metodo):
+    """Gera (fase, função) na ordem de execução; cada função recebe o resultado da anterior."""
+    import matplotlib.pyplot as plt
+    from scripts.loader import load_experiment_path
+    from scripts.preprocessing import build_experiment_frame
+
+    compute, render = _funcoes(metodo)
+
+    def plot(result):
+        render(result)
+        plt.close("all")
+
+    return [
+        ("ingest", lambda _: load_experiment_path(caminho)),
+        ("aggregate", build_experiment_frame),
+        ("sample", compute),
+        ("plot", plot),
+    ]
+
+
+def _executar_caso(caminho, metodo):
+    """Mede as fases de um método sobre um arquivo; roda em um processo próprio."""
+    import matplotlib
+    matplotlib.use("Agg")
+    # Sem servidor, cada chamada st.* avisa que não há ScriptRunContext
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    warnings.simplefilter("ignore", FutureWarning)
+
+    medicoes = {fase: {} for fase in FASES}
+
+    valor = None
+    for fase, funcao in _fases(caminho, metodo):
+        inicio = time.perf_counter()
+        valor = funcao(valor)
+        medicoes[fase]["tempo_s"] = time.perf_counter() - inicio
+        medicoes[fase]["pico_rss_mb"] = _pico_rss_mb()
+
+    valor = None
+    tracemalloc.start()
+    for fase, funcao in _fases(caminho, metodo):
+        tracemalloc.reset_peak()
+        valor = funcao(valor)
+        medicoes[fase]["pico_alocado_mb"] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    tracemalloc.stop()
+
+    return medicoes
+
+
+def run_benchmarks(tamanhos, metodos, assimetrias=(1.0,), seed=0):
+    """Executa todos os casos e devolve uma linha por (tamanho, assimetria, método, fase)."""
+    contexto = multiprocessing.get_context("spawn")
+    linhas = []
+    with tempfile.TemporaryDirectory() as pasta:
+        for nome in tamanhos:
+            dias, variantes, linhas_por_dia = TAMANHOS[nome]
+            for assimetria in assimetrias:
+                df = generate_experiment(dias, variantes, linhas_por_dia, assimetria, seed=seed)
+                caminho = os.path.join(pasta, f"{nome}_{assimetria}.csv")
+                df.to_csv(caminho, index=False)
+                tamanho_mb = os.path.getsize(caminho) / 1024 ** 2
+                arquivos = {metodo: (caminho, df, tamanho_mb) for metodo in metodos}
+
+                if "compound" in metodos:
+                    # O modelo composto recusa linhas com várias sessões: usa uma
+                    # exportação por sessão, com ao menos SESSOES_COMPOSTO linhas
+                    # por dia e variante para haver conversões em todas as variantes
+                    df_sessao = generate_experiment(dias, variantes, max(linhas_por_dia, SESSOES_COMPOSTO),
+                                                    assimetria, sessoes_por_linha=1, seed=seed)
+                    caminho_sessao = os.path.join(pasta, f"{nome}_{assimetria}_sessao.csv")
+                    df_sessao.to_csv(caminho_sessao, index=False)
+                    arquivos["compound"] = (caminho_sessao, df_sessao, os.path.getsize(caminho_sessao) / 1024 ** 2)
+
+                for metodo in metodos:
+                    caminho, df, tamanho_mb = arquivos[metodo]
+                    with contexto.Pool(1) as pool:
+                        medicoes = pool.apply(_executar_caso, (caminho, metodo))
+                    for fase in FASES:
+                        linhas.append({
+                            "caso": f"{nome}/assimetria={assimetria}",
+                            "metodo": metodo,
+                            "fase": fase,
+                            "dias": dias,
+                            "variantes": variantes,
+                            "linhas_por_dia": linhas_por_dia,
+                            "assimetria": assimetria,
+                            "linhas": len(df),
+                            "arquivo_mb": round(tamanho_mb, 3),
+                            **{k: round(v, 4) for k, v in medicoes[fase].items()},
+                        })
+                    print(f"{nome:>8} assimetria={assimetria:<4} {metodo:<12} "
+                          + " ".join(f"{fase}={medicoes[fase]['tempo_s']:.3f}s" for fase in FASES),
+                          file=sys.stderr)
+    return pd.DataFrame(linhas)
+
+
+def _imports_por_pacote(saida):
+    """Tempo acumulado (s) por pacote de primeiro nível na saída do `-X importtime`."""
+    tempos = {}
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, modulo = linha.split("|")
+        # Só os imports de primeiro nível: os aninhados já estão no acumulado
+        if modulo.startswith("  "):
+            continue
+        pacote = modulo.strip().split(".")[0]
+        tempos[pacote] = tempos.get(pacote, 0.0) + int(acumulado) / 1e6
+    return dict(sorted(tempos.items(), key=lambda item: -item[1]))
+
+
+def measure_startup(paginas=tuple(PAGINAS), maiores=5):
+    """
+    Partida a frio de cada página, cada uma em um processo novo. Devolve uma
+    linha por página (fase "import") no formato das demais medições, com os
+    `maiores` pacotes importados e seus tempos.
+    """
+    linhas = []
+    for pagina in paginas:
+        codigo = _CODIGO_PARTIDA.format(marca=_MARCA_PAGINA, modulo=PAGINAS[pagina])
+        processo = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=RAIZ,
+                                  capture_output=True, text=True, check=True)
+        home, primeiro_acesso = (float(x) for x in processo.stdout.split()[-2:])
+        antes, _, depois = processo.stderr.partition(_MARCA_PAGINA)
+        pacotes = _imports_por_pacote(antes if pagina == "home" else depois)
+        tempo = home if pagina == "home" else primeiro_acesso
+        linhas.append({
+            "caso": "partida",
+            "metodo": pagina,
+            "fase": "import",
+            "tempo_s": round(tempo, 4),
+            "maiores_imports": ", ".join(f"{p}={t:.3f}s" for p, t in list(pacotes.items())[:maiores]),
+        })
+        print(f"partida {pagina:<12} {tempo:.3f}s  ({linhas[-1]['maiores_imports']})", file=sys.stderr)
+    return pd.DataFrame(linhas)
+
+
+def _ambiente():
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "processador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def save_baseline(resultados, saida):
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump({
+            "gerado_em": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "ambiente": _ambiente(),
+            "resultados": resultados.to_dict("records"),
+        }, arquivo, ensure_ascii=False, indent=2)
+
+
+def load_baseline(caminho):
+    with open(caminho, encoding="utf-8") as arquivo:
+        return pd.DataFrame(json.load(arquivo)["resultados"])
+
+
+def compare(atual, baseline, tolerancia=0.2):
+    """
+    Compara cada (caso, método, fase) com a baseline. Uma métrica regrediu se
+    passou da baseline por mais de `tolerancia` (relativa) e do mínimo absoluto.
+    """
+    chaves = ["caso", "metodo", "fase"]
+    juntos = atual.merge(baseline, on=chaves, suffixes=("", "_base"))
+    regressoes = []
+    for metrica, minimo in (("tempo_s", MINIMO_TEMPO_S), ("pico_rss_mb", MINIMO_MEMORIA_MB),
+                            ("pico_alocado_mb", MINIMO_MEMORIA_MB)):
+        base = juntos[f"{metrica}_base"]
+        piorou = (juntos[metrica] > base * (1 + tolerancia)) & (juntos[metrica] - base > minimo)
+        for linha in juntos[piorou].itertuples(index=False):
+            linha = linha._asdict()
+            regressoes.append({
+                **{k: linha[k] for k in chaves},
+                "metrica": metrica,
+                "baseline": linha[f"{metrica}_base"],
+                "atual": linha[metrica],
+                "variacao_pct": (linha[metrica] / linha[f"{metrica}_base"] - 1) * 100,
+            })
+    return pd.DataFrame(regressoes, columns=chaves + ["metrica", "baseline", "atual", "variacao_pct"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks das análises de testes A/B")
+    parser.add_argument("--tamanhos", nargs="+", choices=list(TAMANHOS), default=["pequeno", "medio"])
+    parser.add_argument("--metodos", nargs="*", choices=METODOS, default=list(METODOS),
+                        help="Sem nenhum método, só a partida (com --partida) é medida")
+    parser.add_argument("--assimetrias", nargs="+", type=float, default=[1.0],
+                        help="Sigma da lognormal do valor dos pedidos")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--partida", action="store_true",
+                        help="Mede também a partida a frio do app (Home e primeiro acesso a cada página)")
+    parser.add_argument("--saida", help="Grava os resultados (.json) para usar como baseline")
+    parser.add_argument("--comparar", help="Baseline .json de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="Piora relativa aceita antes de acusar regressão (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    resultados = pd.DataFrame()
+    if args.metodos:
+        resultados = run_benchmarks(args.tamanhos, args.metodos, args.assimetrias, seed=args.seed)
+        print(resultados.pivot_table(index=["caso", "metodo"], columns="fase", values="tempo_s")[list(FASES)]
+              .round(3).to_string())
+    if args.partida:
+        partida = measure_startup()
+        print(partida[["metodo", "tempo_s", "maiores_imports"]].to_string(index=False))
+        resultados = pd.concat([resultados, partida], ignore_index=True)
+
+    if args.saida:
+        save_baseline(resultados, args.saida)
+        print(f"Resultados gravados em {args.saida}")
+
+    if args.comparar:
+        regressoes = compare(resultados, load_baseline(args.comparar), args.tolerancia)
+        if not regressoes.empty:
+            print("\nRegressões em relação à baseline:")
+            print(regressoes.round(3).to_string(index=False))
+            return 1
+        print("\nNenhuma regressão em relação à baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+# benchmarks/synthetic.py
+import numpy as np
+import pandas as pd
+
+
+def generate_experiment(dias=14, variantes=2, linhas_por_dia=1, assimetria=1.0,
+                        taxa_conversao=0.05, lift=0.02, sessoes_por_linha=1000, seed=0):
+    """
+    Gera um experimento sintético no formato data/variante/receita/sessoes.
+
+    - dias, variantes: tamanho do teste (a primeira variante se chama "Controle")
+    - linhas_por_dia: linhas por (dia, variante); 1 reproduz o arquivo diário
+      agregado, valores altos simulam exportações por sessão/usuário
+    - assimetria: sigma da lognormal do valor dos pedidos (cauda da receita)
+    - lift: aumento relativo da receita esperada de cada variante sobre a anterior
+    - sessoes_por_linha: média de sessões por linha; 1 gera exatamente uma
+      sessão por linha (exportação por sessão, exigida pelo modelo composto)
+    """
+    rng = np.random.default_rng(seed)
+    nomes = ["Controle"] + [f"Variante {i}" for i in range(1, variantes)]
+
+    datas = pd.date_range("2024-01-01", periods=dias)
+    n = dias * variantes * linhas_por_dia
+    idx_dia = np.repeat(np.arange(dias), variantes * linhas_por_dia)
+    idx_variante = np.tile(np.repeat(np.arange(variantes), linhas_por_dia), dias)
+
+    if sessoes_por_linha == 1:
+        sessoes = np.ones(n, dtype=int)
+    else:
+        sessoes = rng.poisson(sessoes_por_linha, size=n).clip(min=1)
+    conversoes = rng.binomial(sessoes, taxa_conversao)
+    ticket = rng.lognormal(mean=4.0, sigma=assimetria, size=n) * (1 + lift) ** idx_variante
+    receita = np.round(conversoes * ticket, 2)
+
+    return pd.DataFrame({
+        "data": datas[idx_dia],
+        "variante": pd.Categorical.from_codes(idx_variante, nomes),
+        "receita": receita,
+        "sessoes": sessoes.astype(float),
+    })
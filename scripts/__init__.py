@@ -1,5 +1,18 @@
 # Make modules available for import
-from .run_bootstrap import run_bootstrap
-from .run_bayes_scipy import run_bayes_scipy
-from .run_bayes_beta import run_bayes_beta
-from .run_metrics_analysis import run_metrics_analysis
\ No newline at end of file
+# As páginas de análise (e suas dependências pesadas: scipy, matplotlib,
+# seaborn) só são importadas no primeiro acesso a `scripts.run_*`. O app
+# importa a função de cada página no ramo da página, ex.:
+# `from scripts.run_bootstrap import run_bootstrap`
+import importlib
+
+_ANALISES = ("run_bootstrap", "run_bayes_scipy", "run_bayes_beta", "run_metrics_analysis",
+             "run_sequential", "run_ratio_analysis", "run_power", "run_compound")
+
+__all__ = list(_ANALISES)
+
+
+def __getattr__(nome):
+    if nome not in _ANALISES:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    # O import vincula o submódulo no pacote: os próximos acessos não passam por aqui
+    return importlib.import_module(f".{nome}", __name__)
@@ -0,0 +1,217 @@
+# scripts/batch.py
+"""
+Execução em lote (sem interface) das análises sobre vários experimentos.
+
+Uso:
+    python -m scripts.batch <diretório|manifesto> --metodos bootstrap bayes_beta \\
+        --saida resultados.json --workers 8
+
+O manifesto pode ser um JSON (lista de {"arquivo": ..., "experimento": ...}) ou
+um CSV com as colunas `arquivo` e `experimento`. Com um diretório, cada arquivo
+suportado é um experimento identificado pelo nome do arquivo. A saída é JSON ou
+Parquet (pela extensão), com uma linha por experimento, método e variante.
+Com `--por-segmento`, cada método também roda em cada segmento das colunas
+de dimensão (as fatias saem do cubo do experimento). Com `--prior-empirica`,
+a prior do lift é ajustada nos próprios experimentos do lote e todos os lifts
+dos métodos bayesianos recebem a posterior encolhida (scripts.empirical_bayes).
+"""
+import argparse
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+from scripts.empirical_bayes import METODOS_PRIOR, fit_lift_prior, shrink_lifts
+from scripts.loader import FORMATOS, load_experiment_path
+from scripts.parallel import map_paralelo, workers_disponiveis
+from scripts.preprocessing import build_experiment_frame
+from scripts.streaming import LIMITE_STREAMING_MB, build_experiment_frame_streaming, supports_streaming
+from scripts.run_bootstrap import compute_bootstrap
+from scripts.run_bayes_scipy import compute_bayes_scipy
+from scripts.run_bayes_beta import compute_bayes_beta
+from scripts.run_metrics_analysis import compute_metrics_analysis
+from scripts.run_sequential import compute_sequential
+from scripts.run_ratio_analysis import compute_ratio_analysis
+from scripts.run_compound import compute_compound
+
+# Mesmas funções de cálculo usadas pelas páginas do Streamlit
+METODOS = {
+    "bootstrap": compute_bootstrap,
+    "bayes_scipy": compute_bayes_scipy,
+    "bayes_beta": compute_bayes_beta,
+    "metrics": compute_metrics_analysis,
+    "sequential": compute_sequential,
+    "ratio": compute_ratio_analysis,
+    "compound": compute_compound,
+}
+
+# Métodos que usam amostragem e recebem a semente
+COM_SEMENTE = {"bootstrap", "bayes_scipy", "bayes_beta", "compound"}
+
+# Métodos cujas linhas trazem `lift` e `erro_lift` para a prior empírica
+BAYESIANOS = ("bayes_scipy", "bayes_beta")
+
+
+def _suportado(nome):
+    return nome.lower().endswith(tuple(f".{ext}" for ext in FORMATOS))
+
+
+def _id_experimento(caminho):
+    nome = os.path.basename(caminho)
+    for sufixo in (".csv.gz",) + tuple(f".{ext}" for ext in FORMATOS):
+        if nome.lower().endswith(sufixo):
+            return nome[: -len(sufixo)]
+    return nome
+
+
+def discover_experiments(origem):
+    """Lista de (experimento, caminho) a partir de um diretório ou de um manifesto JSON/CSV."""
+    if os.path.isdir(origem):
+        return [
+            (_id_experimento(nome), os.path.join(origem, nome))
+            for nome in sorted(os.listdir(origem)) if _suportado(nome)
+        ]
+
+    base = os.path.dirname(os.path.abspath(origem))
+    if origem.lower().endswith(".json"):
+        with open(origem, encoding="utf-8") as arquivo:
+            entradas = json.load(arquivo)
+    elif origem.lower().endswith(".csv"):
+        entradas = pd.read_csv(origem).to_dict("records")
+    else:
+        raise ValueError("Informe um diretório ou um manifesto .json/.csv")
+
+    experimentos = []
+    for entrada in entradas:
+        caminho = os.path.join(base, entrada["arquivo"])
+        experimentos.append((entrada.get("experimento") or _id_experimento(caminho), caminho))
+    return experimentos
+
+
+def load_frame(caminho):
+    """ExperimentFrame de um arquivo em disco (em blocos para arquivos grandes)."""
+    if supports_streaming(caminho) and os.path.getsize(caminho) > LIMITE_STREAMING_MB * 1024 ** 2:
+        return build_experiment_frame_streaming(caminho)
+    return build_experiment_frame(load_experiment_path(caminho))
+
+
+def _fatias(frame, por_segmento):
+    yield {}, frame
+    if por_segmento:
+        for dimensao in frame.dimensoes:
+            for valor in frame.segmentos(dimensao):
+                yield {"dimensao": dimensao, "segmento": valor}, ((dimensao, valor),)
+
+
+def analyze_experiment(experimento, caminho, metodos, seed=42, por_segmento=False):
+    """Executa os métodos pedidos sobre um experimento (e seus segmentos) e devolve as linhas de resultado."""
+    try:
+        frame = load_frame(caminho)
+    except (ValueError, OSError) as e:
+        return [{"experimento": experimento, "arquivo": caminho, "erro": str(e)}]
+
+    linhas = []
+    for chave, fatia in _fatias(frame, por_segmento):
+        base = {"experimento": experimento, "arquivo": caminho, **chave}
+        try:
+            alvo = fatia if not chave else frame.fatia(fatia)
+        except ValueError as e:
+            linhas.append({**base, "erro": str(e)})
+            continue
+        for metodo in metodos:
+            compute = METODOS[metodo]
+            params = {"seed": seed} if metodo in COM_SEMENTE else {}
+            try:
+                result = compute(alvo, **params)
+            except ValueError as e:
+                linhas.append({**base, "metodo": metodo, "erro": str(e)})
+                continue
+            for registro in result.records():
+                linhas.append({**base, "metodo": metodo, **registro})
+    return linhas
+
+
+def run_batch(experimentos, metodos, n_workers=1, seed=42, por_segmento=False):
+    """Analisa todos os experimentos em um pool de processos (um experimento por tarefa)."""
+    tarefas = [(experimento, caminho, tuple(metodos), seed, por_segmento) for experimento, caminho in experimentos]
+    partes = map_paralelo(analyze_experiment, tarefas, n_workers=n_workers)
+    return pd.DataFrame([linha for parte in partes for linha in parte])
+
+
+def apply_empirical_prior(resultados, metodo="verossimilhanca"):
+    """
+    Ajusta a prior do lift nos experimentos do lote (linhas dos tratamentos dos
+    métodos bayesianos, sem as fatias por segmento) e atualiza de uma vez a
+    posterior de todos esses lifts, inclusive os dos segmentos.
+    """
+    if "metodo" not in resultados or "lift" not in resultados:
+        return resultados
+    resultados = resultados.copy()
+    segmento = resultados["segmento"].notna() if "segmento" in resultados else False
+    for metodo_analise in BAYESIANOS:
+        linhas = (resultados["metodo"] == metodo_analise) & resultados["controle"].eq(False)
+        if not linhas.any():
+            continue
+        prior = fit_lift_prior(resultados.loc[linhas & ~segmento, "lift"].astype(float),
+                               resultados.loc[linhas & ~segmento, "erro_lift"].astype(float), metodo)
+        media, desvio, prob = shrink_lifts(resultados.loc[linhas, "lift"].astype(float),
+                                           resultados.loc[linhas, "erro_lift"].astype(float), prior)
+        resultados.loc[linhas, "lift_encolhido"] = media
+        resultados.loc[linhas, "erro_encolhido"] = desvio
+        resultados.loc[linhas, "prob_lift_positivo"] = prob
+        resultados.loc[linhas, "prior_media"] = prior.media
+        resultados.loc[linhas, "prior_desvio"] = prior.desvio
+        resultados.loc[linhas, "prior_erro_media"] = prior.erro_media
+    return resultados
+
+
+def _json_default(valor):
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, pd.Timestamp):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor)}")
+
+
+def write_results(resultados, saida):
+    if saida.lower().endswith(".parquet"):
+        resultados.to_parquet(saida, index=False)
+    else:
+        registros = resultados.astype(object).where(resultados.notna(), None).to_dict("records")
+        with open(saida, "w", encoding="utf-8") as arquivo:
+            json.dump(registros, arquivo, ensure_ascii=False, indent=2, default=_json_default)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Análise em lote de experimentos A/B")
+    parser.add_argument("origem", help="Diretório com os arquivos ou manifesto .json/.csv")
+    parser.add_argument("--metodos", nargs="+", choices=sorted(METODOS), default=sorted(METODOS))
+    parser.add_argument("--saida", default="resultados.json", help="Arquivo .json ou .parquet")
+    parser.add_argument("--workers", type=int, default=workers_disponiveis())
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--por-segmento", action="store_true",
+                        help="Também analisa cada segmento das colunas de dimensão")
+    parser.add_argument("--prior-empirica", choices=sorted(METODOS_PRIOR),
+                        help="Ajusta a prior do lift nos experimentos do lote e encolhe os lifts bayesianos")
+    args = parser.parse_args(argv)
+
+    experimentos = discover_experiments(args.origem)
+    if not experimentos:
+        parser.error(f"Nenhum arquivo de experimento encontrado em {args.origem}")
+
+    resultados = run_batch(experimentos, args.metodos, n_workers=args.workers, seed=args.seed,
+                           por_segmento=args.por_segmento)
+    if args.prior_empirica:
+        try:
+            resultados = apply_empirical_prior(resultados, args.prior_empirica)
+        except ValueError as e:
+            print(f"Prior empírica não aplicada: {e}", file=sys.stderr)
+    write_results(resultados, args.saida)
+
+    erros = resultados.loc[resultados["erro"].notna(), "experimento"].nunique() if "erro" in resultados else 0
+    print(f"{len(experimentos)} experimentos analisados ({erros} com erro) -> {args.saida}")
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+# scripts/bayes_exact.py
+import numpy as np
+from scipy.special import betaln
+from scipy.stats import beta, norm, t
+
+# Prior Beta(2, 2) do RPV diário escalado
+PRIOR_BETA = (2, 2)
+
+# Prior Normal-Gama-Inversa do RPV diário: (κ0, α0). A média μ0 e a escala β0 =
+# α0·s² saem das estatísticas agrupadas de todas as variantes, então a prior é
+# a mesma para todas e pesa o equivalente a um dia de dados
+PRIOR_NIG = (1.0, 1.0)
+
+
+def beta_escalada(resumo, variantes, prior=PRIOR_BETA):
+    """
+    Parâmetros (alphas, betas) da posterior Beta do RPV diário escalado para
+    [0, 1] pelo mínimo e máximo de todas as variantes. Como
+    Σ (x - min) / (max - min) = (soma - dias·min) / (max - min), basta o resumo
+    acumulado por variante (`ExperimentFrame.resumo_rpv`), sem reler os dias.
+    """
+    resumo = resumo.loc[list(variantes)]
+    minimo, maximo = resumo["minimo"].min(), resumo["maximo"].max()
+    soma_scaled = ((resumo["soma"] - resumo["dias"] * minimo) / (maximo - minimo)).to_numpy()
+    alphas = prior[0] + soma_scaled
+    betas = prior[1] + resumo["dias"].to_numpy() - soma_scaled
+    return alphas, betas
+
+
+def normal_media(resumo, variantes):
+    """Média e erro padrão do RPV diário por variante (aproximação Normal), a partir do resumo."""
+    resumo = resumo.loc[list(variantes)]
+    n = resumo["dias"].to_numpy()
+    media = resumo["soma"].to_numpy() / n
+    variancia = (resumo["soma_quad"].to_numpy() - n * media ** 2) / np.maximum(n - 1, 1)
+    return media, np.sqrt(np.maximum(variancia, 0) / n)
+
+
+def normal_gama_inversa(resumo, variantes, prior=PRIOR_NIG):
+    """
+    Parâmetros (mu, kappa, alpha, beta) da posterior Normal-Gama-Inversa da
+    média e da variância do RPV diário de cada variante, em forma fechada a
+    partir de (dias, soma, soma dos quadrados) do resumo. São só somas: os
+    resumos de partes do experimento (incremental, leitura em blocos) se
+    combinam sem reler as linhas, e o resultado não depende de mínimo/máximo.
+    """
+    resumo = resumo.loc[list(variantes)]
+    n = resumo["dias"].to_numpy(dtype=float)
+    soma = resumo["soma"].to_numpy(dtype=float)
+    soma_quad = resumo["soma_quad"].to_numpy(dtype=float)
+
+    # Prior comum, centrada nas estatísticas agrupadas
+    kappa0, alpha0 = prior
+    mu0 = soma.sum() / n.sum()
+    var_agrupada = (soma_quad.sum() - n.sum() * mu0 ** 2) / max(n.sum() - 1, 1)
+    beta0 = alpha0 * max(var_agrupada, 0.0)
+
+    media = soma / n
+    quadrados = np.maximum(soma_quad - n * media ** 2, 0.0)
+    kappa = kappa0 + n
+    mu = (kappa0 * mu0 + soma) / kappa
+    alpha = alpha0 + n / 2
+    beta_ = beta0 + quadrados / 2 + kappa0 * n * (media - mu0) ** 2 / (2 * kappa)
+    return mu, kappa, alpha, beta_
+
+
+def posterior_t(mu, kappa, alpha, beta_):
+    """
+    Posterior marginal da média de cada variante sob a Normal-Gama-Inversa:
+    Student-t com 2α graus de liberdade, locação μ e escala √(β / (α·κ)),
+    congelada com parâmetros em formato (variantes, 1).
+    """
+    escala = np.sqrt(beta_ / (alpha * kappa))
+    return t(2 * alpha[:, None], loc=mu[:, None], scale=escala[:, None])
+
+
+def _inteiro(x):
+    return np.isclose(x, np.round(x)) and x >= 1
+
+
+def prob_beta_superior(a_nova, b_nova, a_controle, b_controle):
+    """
+    P(X_nova > X_controle) exata para X_nova ~ Beta(a_nova, b_nova) e
+    X_controle ~ Beta(a_controle, b_controle), com `a_nova` inteiro:
+    Σ_{i<a_nova} B(a_c + i, b_c + b_n) / ((b_n + i)·B(1 + i, b_n)·B(a_c, b_c)).
+    """
+    if not _inteiro(a_nova):
+        raise ValueError(f"A soma fechada exige a_nova inteiro (recebido {a_nova})")
+    i = np.arange(int(round(a_nova)))
+    termos = (
+        betaln(a_controle + i, b_controle + b_nova)
+        - np.log(b_nova + i)
+        - betaln(1 + i, b_nova)
+        - betaln(a_controle, b_controle)
+    )
+    return float(np.clip(np.exp(termos).sum(), 0.0, 1.0))
+
+
+def prob_normal_superior(media_nova, dp_nova, media_controle, dp_controle):
+    """P(X_nova > X_controle) para duas Normais independentes."""
+    return float(norm.cdf((media_nova - media_controle) / np.hypot(dp_nova, dp_controle)))
+
+
+def _forma_fechada(posterior):
+    # P(X_1 > X_controle) exata com duas variantes: Beta com α da variante
+    # inteiro ou Normal. None quando não há forma fechada
+    if posterior.dist.name not in ("beta", "norm"):
+        return None
+    formas, loc, escala = posterior.dist._parse_args(*posterior.args, **posterior.kwds)
+    parametros = [np.ravel(p) for p in np.broadcast_arrays(*formas, loc, escala)]
+    if len(parametros[0]) != 2:
+        return None
+    if posterior.dist.name == "norm":
+        loc, escala = parametros
+        return prob_normal_superior(loc[1], escala[1], loc[0], escala[0])
+    a, b, loc, escala = parametros
+    if not (np.all(loc == 0) and np.all(escala == 1) and _inteiro(a[1])):
+        return None
+    return prob_beta_superior(a[1], b[1], a[0], b[0])
+
+
+def posterior_rpv(resumo, variantes, familia="beta_escalada"):
+    """
+    Posterior do RPV diário de cada variante como distribuição congelada com
+    parâmetros em formato (variantes, 1), a partir do resumo acumulado:
+    - "beta_escalada": Beta do RPV escalado (prior Beta(2, 2), `beta_escalada`)
+    - "normal_gama_inversa": Student-t da média sob a Normal-Gama-Inversa
+    """
+    if familia == "beta_escalada":
+        alphas, betas = beta_escalada(resumo, variantes)
+        return beta(alphas[:, None], betas[:, None])
+    if familia == "normal_gama_inversa":
+        return posterior_t(*normal_gama_inversa(resumo, variantes))
+    raise ValueError(f"Família de posterior desconhecida: {familia}")
+
+
+def credible_interval(dist, nivel=0.90):
+    """Intervalo de credibilidade central a partir da `ppf` de uma distribuição congelada do SciPy."""
+    cauda = (1 - nivel) / 2
+    return dist.ppf([cauda, 1 - cauda])
+
+
+def _grade(posterior, num_pontos, cauda=1e-9):
+    # Uma grade por variante, cobrindo o suporte efetivo de cada posterior, unidas e ordenadas
+    limites = posterior.ppf(np.array([cauda, 1 - cauda]))
+    grades = np.linspace(limites[:, 0], limites[:, 1], num_pontos, axis=1)
+    return np.unique(grades)
+
+
+def compare_posteriors(posterior, num_pontos=2001):
+    """
+    Compara todas as variantes de uma vez a partir de uma distribuição
+    congelada do SciPy com parâmetros em formato (variantes, 1), controle na
+    linha 0 — ex.: `beta(alphas[:, None], betas[:, None])`.
+
+    Retorna dois vetores (um valor por variante):
+    - P(X_i > X_controle) = ∫ f_i(x) F_controle(x) dx
+    - P(X_i é a maior)    = ∫ f_i(x) Π_{j≠i} F_j(x) dx
+
+    Com duas variantes Beta (α da variante inteiro) ou Normais usa a forma
+    fechada (`prob_beta_superior`, `prob_normal_superior`); nos demais casos
+    (α real, Student-t, três ou mais variantes) as integrais são calculadas
+    numericamente em uma grade comum (variantes x pontos).
+    """
+    exata = _forma_fechada(posterior)
+    if exata is not None:
+        return np.array([0.5, exata]), np.array([1 - exata, exata])
+
+    x = _grade(posterior, num_pontos)
+    pdf = posterior.pdf(x)
+    cdf = posterior.cdf(x)
+
+    prob_vs_controle = np.trapz(pdf * cdf[0], x, axis=1)
+
+    log_cdf = np.log(np.clip(cdf, 1e-300, None))
+    outras = np.exp(log_cdf.sum(axis=0) - log_cdf)
+    prob_melhor = np.trapz(pdf * outras, x, axis=1)
+
+    return np.clip(prob_vs_controle, 0.0, 1.0), np.clip(prob_melhor, 0.0, 1.0)
+
+
+def compare_samples(samples):
+    """Versão Monte Carlo de `compare_posteriors` para uma matriz (variantes x amostras)."""
+    samples = np.asarray(samples)
+    prob_vs_controle = (samples > samples[0]).mean(axis=1)
+    prob_melhor = np.bincount(samples.argmax(axis=0), minlength=samples.shape[0]) / samples.shape[1]
+    return prob_vs_controle, prob_melhor
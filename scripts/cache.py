@@ -0,0 +1,143 @@
+# scripts/cache.py
+import sqlite3
+from functools import partial
+import streamlit as st
+from scripts.jobs import submeter
+from scripts.store import load_result, save_result
+
+# Limites do cache de resultados compartilhado entre sessões do servidor
+MAX_RESULTADOS = 64
+TTL_RESULTADOS = 60 * 60  # segundos
+
+# Versão do resultado de cada método ("módulo.função"; 1 quando ausente).
+# Aumente sempre que um compute_* passar a calcular outra coisa ou o formato do
+# resultado mudar: os resultados salvos no histórico com outra versão são
+# ignorados e recalculados
+VERSOES_RESULTADO = {
+    # Lift e lift encolhido pela prior empírica; variância com o erro da média da prior;
+    # soma fechada de P(Nova > Controle) com duas variantes
+    "scripts.run_bayes_scipy.compute_bayes_scipy": 3,
+    # Além do lift: modelo Beta escalado substituído pela Normal-Gama-Inversa (Student-t)
+    "scripts.run_bayes_beta.compute_bayes_beta": 3,
+    # Sem o aviso de arquivo agregado: esses dados agora são recusados
+    "scripts.run_compound.compute_compound": 2,
+}
+
+# Análises que terminam dentro desta espera são exibidas direto, sem barra de progresso
+ESPERA_INICIAL = 0.3  # segundos
+# Intervalo máximo entre as atualizações da barra de progresso
+INTERVALO_PROGRESSO = 0.5  # segundos
+
+
+@st.cache_data(max_entries=MAX_RESULTADOS, ttl=TTL_RESULTADOS, show_spinner=False)
+def _cached_compute(frame_hash, metodo, params, _compute, _frame, _execucao):
+    return _compute(_frame, **dict(params), **_execucao)
+
+
+class _NaoCalculado(Exception):
+    """Consulta ao cache sem resultado (exceções não são memoizadas)."""
+
+
+def _consultar(frame, **_):
+    raise _NaoCalculado()
+
+
+def _cancelar(metodo):
+    chave, job = st.session_state.analises[metodo]
+    job.cancelar()
+    st.session_state.analises[metodo] = (chave, None)
+
+
+def _recalcular(metodo):
+    st.session_state.analises.pop(metodo, None)
+
+
+def _guardar(chave, frame, resultado):
+    # Grava no cache compartilhado (sem efeito se outra sessão já gravou) e,
+    # se o experimento aberto está no histórico, também em disco
+    frame_hash, metodo, params_chave = chave
+    resultado = _cached_compute(frame_hash, metodo, params_chave, lambda _frame, **_: resultado, frame, {})
+    experimento = st.session_state.get("experimento_salvo")
+    if experimento:
+        try:
+            save_result(experimento, frame_hash, metodo, params_chave, resultado, VERSOES_RESULTADO.get(metodo, 1))
+        except (sqlite3.Error, OSError) as e:
+            st.warning(f"⚠️ Não foi possível salvar o resultado no histórico: {e}")
+    return resultado
+
+
+def background_analysis(compute, frame, execucao=None, **params):
+    """
+    Executa `compute(frame, **params)` em segundo plano (scripts.jobs),
+    memoizado por (hash dos dados, método, parâmetros). Inclua a semente em
+    `params`; argumentos que não alteram o resultado (ex.: número de
+    processos) vão em `execucao` e ficam fora da chave. O cache é
+    compartilhado entre as sessões, com LRU (`MAX_RESULTADOS` entradas) e
+    expiração após `TTL_RESULTADOS`.
+
+    A thread do job só calcula: a consulta e a gravação no cache compartilhado
+    ficam no script. O job de cada método fica em `st.session_state.analises`,
+    então o resultado continua disponível depois de trocar de página.
+    Resultados já salvos no histórico (scripts.store) na versão atual do
+    método (`VERSOES_RESULTADO`) são reaproveitados sem recálculo.
+
+    Enquanto a análise roda, exibe o progresso e um botão de cancelar e agenda
+    um novo rerun, devolvendo None; devolve o resultado quando pronto.
+    Exceções da análise são relançadas aqui (e não ficam memoizadas).
+    """
+    metodo = f"{compute.__module__}.{compute.__name__}"
+    params_chave = tuple(sorted(params.items()))
+    chave = (frame.hash, metodo, params_chave)
+    analises = st.session_state.setdefault("analises", {})
+
+    entrada = analises.get(metodo)
+    if entrada is not None and entrada[0] != chave:
+        # Parâmetros ou dados mudaram: a sessão desiste do job anterior
+        if entrada[1] is not None and not entrada[1].future.done():
+            entrada[1].cancelar()
+        del analises[metodo]
+        entrada = None
+    if entrada is None:
+        try:
+            return _cached_compute(frame.hash, metodo, params_chave, _consultar, frame, {})
+        except _NaoCalculado:
+            pass
+        try:
+            salvo = load_result(frame.hash, metodo, params_chave, VERSOES_RESULTADO.get(metodo, 1))
+        except sqlite3.Error:
+            salvo = None
+        if salvo is not None:
+            return _cached_compute(frame.hash, metodo, params_chave, lambda _frame, **_: salvo, frame, {})
+        tarefa = partial(compute, frame, **params, **(execucao or {}))
+        entrada = analises[metodo] = (chave, submeter(chave, tarefa))
+    job = entrada[1]
+
+    if job is None:
+        st.info("⏹️ Análise cancelada.")
+        st.button("🔁 Calcular novamente", key=f"recalcular_{metodo}", on_click=_recalcular, args=(metodo,))
+        return None
+    if job.aguardar(ESPERA_INICIAL):
+        resultado = job.resultado()
+        # Entregue: os próximos reruns leem do cache
+        del analises[metodo]
+        return _guardar(chave, frame, resultado)
+
+    if not job.iniciado:
+        texto = "⏳ Na fila: aguardando outras análises terminarem..."
+    elif job.total:
+        texto = f"⏳ Calculando em segundo plano: {job.fracao():.0%} ({job.decorrido():.0f}s)"
+    else:
+        texto = f"⏳ Calculando em segundo plano ({job.decorrido():.0f}s)..."
+    st.progress(job.fracao(), text=texto)
+    st.caption("Você pode navegar entre as páginas: o resultado fica disponível ao voltar.")
+    st.button("⏹️ Cancelar análise", key=f"cancelar_{metodo}", on_click=_cancelar, args=(metodo,))
+    # Espera o job (não um intervalo fixo): o rerun vem assim que ele termina,
+    # ou após INTERVALO_PROGRESSO para atualizar a barra
+    job.aguardar(INTERVALO_PROGRESSO)
+    st.rerun()
+
+
+def clear_analysis_cache():
+    """Invalida todos os resultados memoizados (inclusive os já entregues a esta sessão)."""
+    _cached_compute.clear()
+    st.session_state.pop("analises", None)
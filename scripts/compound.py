@@ -0,0 +1,150 @@
+# scripts/compound.py
+"""
+Modelo composto da receita por sessão: conversão x valor do pedido.
+
+A receita por sessão é zero na maioria das sessões e tem cauda longa nas que
+convertem. Em vez de modelar o RPV diretamente (bootstrap, Beta escalada),
+cada variante tem duas partes conjugadas:
+- Conversão: p ~ Beta(1 + conversões, 1 + sessões - conversões), a
+  Beta-Binomial sobre o indicador `converteu` (receita > 0). O indicador é
+  por linha, então o modelo só vale com uma sessão por linha: em arquivos
+  agregados (várias sessões por linha) `compound_totals` recusa os dados
+- Valor do pedido (receita das linhas que converteram):
+  - "lognormal": log do valor ~ Normal(μ, σ²) com prior Normal-Gama-Inversa
+    (bayes_exact.normal_gama_inversa); E[valor] = exp(μ + σ²/2)
+  - "gama": valor ~ Gama(forma k, taxa λ), com k pelo método dos momentos
+    nos dados agrupados e λ com prior Gama conjugada; E[valor] = k / λ
+- RPV = p · E[valor]
+
+As posteriores saem das somas por variante em `frame.daily` (sessões,
+conversões, receita, receita², log do valor e seu quadrado), então o modelo
+vale igual para leitura em blocos e dados incrementais. As amostras conjuntas
+são tiradas em lotes (variantes x amostras), e o lote dobra até o erro de
+Monte Carlo das probabilidades e das médias ficar abaixo da precisão pedida:
+resultados claros param com poucas amostras, os apertados recebem mais.
+"""
+import numpy as np
+import pandas as pd
+from scripts.bayes_exact import compare_samples, normal_gama_inversa
+from scripts.jobs import relatar_progresso
+
+MODELOS_VALOR = {
+    "lognormal": "Lognormal",
+    "gama": "Gama",
+}
+
+# Prior Beta(1, 1) da taxa de conversão
+PRIOR_CONVERSAO = (1.0, 1.0)
+
+# Conversões necessárias em cada variante para estimar a variação do valor do pedido
+MIN_CONVERSOES = 2
+
+# Amostras do primeiro lote e limite da amostragem adaptativa
+AMOSTRAS_INICIAIS = 2_000
+MAX_AMOSTRAS = 256_000
+
+# Erro de Monte Carlo aceito: absoluto nas probabilidades, relativo nas médias do RPV
+PRECISAO_PADRAO = 0.005
+
+_COLUNAS = ["linhas", "sessoes", "sessoes_quad", "conversoes", "receita", "receita_quad", "log_valor",
+            "log_valor_quad"]
+
+
+def compound_totals(frame):
+    """
+    Somas por variante (controle na linha 0) usadas pelo modelo composto.
+    Exige uma sessão por linha: com Σ sessões = Σ sessões² = linhas, toda linha
+    tem exatamente uma sessão e as conversões contam sessões, não linhas.
+    """
+    totais = frame.daily.groupby("variante", observed=True)[_COLUNAS].sum(min_count=1)
+    totais.index = totais.index.astype(str)
+    totais = totais.loc[list(frame.ordem_variantes)]
+    if totais[["sessoes_quad", "log_valor", "log_valor_quad"]].isna().any().any():
+        raise ValueError("Os dados salvos não têm as estatísticas do valor do pedido: envie o arquivo novamente")
+    por_sessao = np.isclose(totais["sessoes"], totais["linhas"]) & np.isclose(totais["sessoes_quad"], totais["linhas"])
+    if not por_sessao.all():
+        raise ValueError("O modelo composto precisa de uma linha por sessão (sessoes = 1 em todas as linhas); "
+                         "o arquivo tem linhas com várias sessões, como o diário agregado. "
+                         "Use o Bootstrap ou a Análise Bayesiana nesses dados")
+    poucas = totais.index[totais["conversoes"] < MIN_CONVERSOES]
+    if len(poucas):
+        raise ValueError(f"São necessárias ao menos {MIN_CONVERSOES} conversões em cada variante "
+                         f"(sem conversões suficientes: {', '.join(poucas)})")
+    return totais
+
+
+def posterior_conversao(totais, prior=PRIOR_CONVERSAO):
+    """Parâmetros (a, b) da posterior Beta da taxa de conversão por sessão."""
+    conversoes = totais["conversoes"].to_numpy(dtype=float)
+    sessoes = totais["sessoes"].to_numpy(dtype=float)
+    return prior[0] + conversoes, prior[1] + np.maximum(sessoes - conversoes, 0.0)
+
+
+def posterior_valor(totais, modelo="lognormal"):
+    """
+    Parâmetros da posterior do valor do pedido por variante:
+    (mu, kappa, alpha, beta) da Normal-Gama-Inversa do log do valor, ou
+    (forma, a, b) com a taxa λ ~ Gama(a, b) no modelo "gama".
+    """
+    n = totais["conversoes"].to_numpy(dtype=float)
+    if modelo == "lognormal":
+        resumo = pd.DataFrame({"dias": n, "soma": totais["log_valor"].to_numpy(dtype=float),
+                               "soma_quad": totais["log_valor_quad"].to_numpy(dtype=float)}, index=totais.index)
+        return normal_gama_inversa(resumo, totais.index)
+    if modelo != "gama":
+        raise ValueError(f"Modelo de valor do pedido desconhecido: {modelo}")
+
+    # Forma comum pelo método dos momentos; prior da taxa centrada no valor médio
+    # agrupado, com o peso de um pedido
+    soma, soma_quad = totais["receita"].to_numpy(dtype=float), totais["receita_quad"].to_numpy(dtype=float)
+    media = soma.sum() / n.sum()
+    variancia = (soma_quad.sum() - n.sum() * media ** 2) / (n.sum() - 1)
+    forma = media ** 2 / variancia if variancia > 0 else 1.0
+    return forma, forma * (1 + n), media + soma
+
+
+def sample_rpv(conversao, valor, modelo, tamanho, rng):
+    """Amostras conjuntas (variantes x tamanho) da conversão, do valor médio do pedido e do RPV."""
+    a, b = conversao
+    forma = (len(a), tamanho)
+    taxa = rng.beta(a[:, None], b[:, None], size=forma)
+    if modelo == "lognormal":
+        mu, kappa, alpha, beta_ = (np.asarray(x)[:, None] for x in valor)
+        variancia = beta_ / rng.gamma(alpha, size=forma)
+        media_log = rng.normal(mu, np.sqrt(variancia / kappa), size=forma)
+        valor_medio = np.exp(media_log + variancia / 2)
+    else:
+        k, a_taxa, b_taxa = valor
+        valor_medio = k / rng.gamma(a_taxa[:, None], 1 / b_taxa[:, None], size=forma)
+    return taxa, valor_medio, taxa * valor_medio
+
+
+def erro_monte_carlo(rpv):
+    """Maior erro de Monte Carlo entre P(tratamento > controle), P(melhor) e a média relativa do RPV."""
+    n = rpv.shape[1]
+    prob_vs_controle, prob_melhor = compare_samples(rpv)
+    probs = np.concatenate([prob_vs_controle[1:], prob_melhor])
+    erro_probs = np.sqrt(probs * (1 - probs) / n).max()
+    erro_medias = (rpv.std(axis=1) / np.sqrt(n) / np.abs(rpv.mean(axis=1))).max()
+    return float(max(erro_probs, erro_medias))
+
+
+def adaptive_samples(conversao, valor, modelo="lognormal", precisao=PRECISAO_PADRAO, seed=None,
+                     inicial=AMOSTRAS_INICIAIS, maximo=MAX_AMOSTRAS):
+    """
+    Amostra a posterior conjunta em lotes que dobram o total a cada rodada,
+    até o erro de Monte Carlo ficar abaixo de `precisao` ou chegar a `maximo`.
+    Devolve (taxa, valor médio, RPV), cada um variantes x amostras, e o erro final.
+    """
+    rng = np.random.default_rng(seed)
+    partes = [sample_rpv(conversao, valor, modelo, inicial, rng)]
+    total = inicial
+    while True:
+        taxa, valor_medio, rpv = (np.concatenate(p, axis=1) for p in zip(*partes))
+        erro = erro_monte_carlo(rpv)
+        relatar_progresso(total, maximo)
+        if erro <= precisao or total >= maximo:
+            return taxa, valor_medio, rpv, erro
+        lote = min(total, maximo - total)
+        partes.append(sample_rpv(conversao, valor, modelo, lote, rng))
+        total += lote
@@ -0,0 +1,130 @@
+# scripts/empirical_bayes.py
+"""
+Prior empírica (empirical Bayes) para o lift de RPV, ajustada em um lote de
+experimentos anteriores ou simultâneos.
+
+Modelo normal-normal: o lift verdadeiro de cada tratamento vem de N(μ, τ²),
+comum aos experimentos, e o lift observado é N(lift verdadeiro, erro²), com o
+erro padrão do método delta sobre o RPV diário médio. μ e τ saem de:
+- "momentos": estimador de DerSimonian-Laird
+- "verossimilhanca": máxima verossimilhança marginal, lift ~ N(μ, τ² + erro²)
+
+A posterior de cada lift também é normal e sai em forma fechada, então todos
+os experimentos e tratamentos são atualizados de uma vez, como arrays. Lifts
+com erro grande (poucos dias, muito ruído) são puxados para μ; os precisos
+quase não mudam. A incerteza de μ estimado entra na variância da posterior:
+com τ = 0 (comum no DerSimonian-Laird com poucos lifts) os lifts são puxados
+para μ, mas com o erro de μ, não com desvio nulo. As unidades da prior são as
+dos lifts usados no ajuste (%).
+"""
+from dataclasses import dataclass
+import numpy as np
+from scipy.optimize import minimize_scalar
+from scipy.stats import norm
+from scripts.bayes_exact import normal_media
+
+METODOS_PRIOR = {
+    "momentos": "Método dos momentos (DerSimonian-Laird)",
+    "verossimilhanca": "Máxima verossimilhança marginal",
+}
+
+# Lifts (tratamentos de experimentos anteriores) necessários para ajustar a prior
+MIN_EXPERIMENTOS = 5
+
+
+@dataclass(frozen=True)
+class LiftPrior:
+    """
+    Prior N(media, desvio²) do lift, com o método e a quantidade de lifts usados
+    no ajuste e o erro padrão da média estimada.
+    """
+    media: float
+    desvio: float
+    metodo: str
+    lifts: int
+    erro_media: float = 0.0
+
+
+def lift_estimates(frame):
+    """
+    Lift do RPV diário médio de cada tratamento contra o controle, em %, e seu
+    erro padrão pelo método delta, a partir do resumo por variante.
+    """
+    media, erro = normal_media(frame.resumo_rpv(), frame.ordem_variantes)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lift = media[1:] / media[0] - 1
+        erro_lift = np.sqrt(erro[1:] ** 2 / media[0] ** 2 + media[1:] ** 2 * erro[0] ** 2 / media[0] ** 4)
+    return lift * 100, erro_lift * 100
+
+
+def _media_ponderada(lifts, variancias, tau2):
+    pesos = 1 / (variancias + tau2)
+    return np.sum(pesos * lifts) / np.sum(pesos)
+
+
+def _tau2_momentos(lifts, variancias):
+    pesos = 1 / variancias
+    q = np.sum(pesos * (lifts - _media_ponderada(lifts, variancias, 0.0)) ** 2)
+    return max(0.0, (q - (len(lifts) - 1)) / (pesos.sum() - np.sum(pesos ** 2) / pesos.sum()))
+
+
+def _tau2_verossimilhanca(lifts, variancias):
+    def menos_log_verossimilhanca(log_tau2):
+        total = variancias + np.exp(log_tau2)
+        media = _media_ponderada(lifts, variancias, np.exp(log_tau2))
+        return 0.5 * np.sum(np.log(total) + (lifts - media) ** 2 / total)
+
+    # τ² entre praticamente zero e bem acima da dispersão observada dos lifts
+    escala = max(np.var(lifts), np.mean(variancias))
+    otimo = minimize_scalar(menos_log_verossimilhanca, bounds=(np.log(escala * 1e-8), np.log(escala * 10)),
+                            method="bounded")
+    return float(np.exp(otimo.x))
+
+
+def fit_lift_prior(lifts, erros, metodo="verossimilhanca"):
+    """
+    Ajusta a prior N(μ, τ²) do lift a partir dos lifts observados e seus erros
+    padrão (um por tratamento de cada experimento). Valores não finitos ou com
+    erro nulo são ignorados.
+    """
+    if metodo not in METODOS_PRIOR:
+        raise ValueError(f"Método de ajuste da prior desconhecido: {metodo}")
+    lifts, erros = np.ravel(lifts).astype(float), np.ravel(erros).astype(float)
+    validos = np.isfinite(lifts) & np.isfinite(erros) & (erros > 0)
+    lifts, variancias = lifts[validos], erros[validos] ** 2
+    if len(lifts) < MIN_EXPERIMENTOS:
+        raise ValueError(f"São necessários ao menos {MIN_EXPERIMENTOS} lifts de experimentos anteriores "
+                         f"para ajustar a prior ({len(lifts)} disponíveis)")
+
+    tau2 = _tau2_momentos(lifts, variancias) if metodo == "momentos" else _tau2_verossimilhanca(lifts, variancias)
+    # Var(μ̂) = 1 / Σ 1/(erro² + τ²), a variância da média ponderada
+    return LiftPrior(media=float(_media_ponderada(lifts, variancias, tau2)), desvio=float(np.sqrt(tau2)),
+                     metodo=metodo, lifts=len(lifts), erro_media=float(np.sqrt(1 / np.sum(1 / (variancias + tau2)))))
+
+
+def shrink_lifts(lifts, erros, prior):
+    """
+    Posterior normal de cada lift sob a prior, para arrays de qualquer formato
+    (ex.: experimentos x tratamentos). Devolve a média e o desvio da
+    posterior e P(lift > 0); P é NaN quando a posterior é degenerada (desvio
+    nulo ou indefinido).
+    """
+    lifts, variancias = np.asarray(lifts, dtype=float), np.asarray(erros, dtype=float) ** 2
+    tau2 = prior.desvio ** 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Peso da prior: 1 quando o lift observado não informa nada, 0 quando é exato
+        peso_prior = variancias / (variancias + tau2)
+        media = peso_prior * prior.media + (1 - peso_prior) * lifts
+        # μ também é estimado: seu erro entra com o peso que a prior recebe
+        desvio = np.sqrt((1 - peso_prior) * variancias + peso_prior ** 2 * prior.erro_media ** 2)
+        prob_positivo = np.where(desvio > 0, norm.sf(-media / desvio), np.nan)
+    return media, desvio, prob_positivo
+
+
+def fit_prior_from_frames(frames, metodo="verossimilhanca"):
+    """Prior ajustada nos lifts de todos os tratamentos de uma coleção de ExperimentFrames."""
+    estimativas = [lift_estimates(frame) for frame in frames]
+    if not estimativas:
+        return fit_lift_prior([], [], metodo)
+    lifts, erros = (np.concatenate(partes) for partes in zip(*estimativas))
+    return fit_lift_prior(lifts, erros, metodo)
@@ -0,0 +1,181 @@
+# scripts/incremental.py
+"""
+Modo incremental para experimentos em andamento.
+
+Cada experimento salvo em `ESTADO_DIR/<experimento>-<hash do nome>/` tem:
+- diarias/<versão>.parquet: estatísticas por (data, variante) de todos os dias
+  recebidos, uma versão por envio
+- estado.json: versão atual, dias já recebidos, hash encadeado do conteúdo,
+  resumo acumulado do RPV diário por variante e os parâmetros das posteriores
+  Beta/Normal
+
+Enviar só o arquivo do dia lê um único arquivo do tamanho dias x variantes,
+junta a ele os dias novos e atualiza o resumo e as posteriores sem
+reprocessar os envios anteriores. Dias que já existiam são substituídos:
+reenviar o mesmo arquivo não duplica dados — nesse caso, raro, o resumo é
+recalculado a partir das estatísticas diárias.
+
+A versão nova é gravada por inteiro antes do estado que a referencia, e a
+anterior só é apagada depois: uma falha no meio do envio deixa o experimento
+como estava antes dele.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import pandas as pd
+from scripts.preprocessing import (
+    COLUNAS_RESUMO, combine_daily, combine_summaries, frame_from_daily, summarize_daily_rpv,
+)
+
+ESTADO_DIR = os.path.join(".cache", "experimentos")
+
+
+def _pasta(experimento, base):
+    nome = re.sub(r"[^\w.-]+", "_", experimento.strip()).strip("._")
+    if not nome:
+        raise ValueError("Informe um nome de experimento válido")
+    # O hash do nome original separa nomes que a limpeza tornaria iguais (ex.: "a/b" e "a_b")
+    pasta = os.path.join(base, f"{nome}-{hashlib.sha1(experimento.encode()).hexdigest()[:8]}")
+    antiga = os.path.join(base, nome)
+    if not os.path.exists(pasta) and (_ler_estado(antiga) or {}).get("experimento") == experimento:
+        # Experimento salvo antes do hash no nome da pasta
+        os.rename(antiga, pasta)
+    return pasta
+
+
+def _escrever_json(caminho, conteudo):
+    # Escrita atômica, como no cache de planilhas do loader
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(conteudo, arquivo, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def _ler_estado(pasta):
+    caminho = os.path.join(pasta, "estado.json")
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def _resumo_de_estado(estado):
+    return pd.DataFrame.from_dict(estado["resumo"], orient="index")[COLUNAS_RESUMO].rename_axis("variante")
+
+
+def _posteriores(resumo):
+    # scipy só é carregado ao atualizar um experimento (a Home lista os salvos sem ele)
+    from scripts.bayes_exact import beta_escalada, normal_gama_inversa, normal_media
+    variantes = list(resumo.index)
+    alphas, betas = beta_escalada(resumo, variantes)
+    medias, erros = normal_media(resumo, variantes)
+    mu, kappa, alpha, beta_ = normal_gama_inversa(resumo, variantes)
+    return {
+        "variantes": variantes,
+        "beta_escalada": {"alpha": alphas.tolist(), "beta": betas.tolist(),
+                          "minimo": float(resumo["minimo"].min()), "maximo": float(resumo["maximo"].max())},
+        "normal": {"media": medias.tolist(), "erro_padrao": erros.tolist()},
+        "normal_gama_inversa": {"mu": mu.tolist(), "kappa": kappa.tolist(), "alpha": alpha.tolist(),
+                                "beta": beta_.tolist()},
+    }
+
+
+def _nome_versao(versao):
+    return f"{versao:06d}.parquet"
+
+
+def _ler_diarias(pasta, estado):
+    if "versao" in estado:
+        caminho = os.path.join(pasta, "diarias", _nome_versao(estado["versao"]))
+        return combine_daily([pd.read_parquet(caminho)])
+    # Formato anterior: uma parte por envio, válidas no intervalo [primeira_parte, partes)
+    partes = range(estado.get("primeira_parte", 0), estado["partes"])
+    return combine_daily([pd.read_parquet(os.path.join(pasta, "partes", f"{parte:06d}.parquet"))
+                          for parte in partes])
+
+
+def _remover_versoes_antigas(pasta, estado):
+    # Versões substituídas, deixadas por um envio interrompido ou do formato anterior
+    atual = _nome_versao(estado["versao"])
+    for nome in os.listdir(os.path.join(pasta, "diarias")):
+        if nome != atual:
+            os.remove(os.path.join(pasta, "diarias", nome))
+    shutil.rmtree(os.path.join(pasta, "partes"), ignore_errors=True)
+
+
+def list_experiments(base=ESTADO_DIR):
+    """Experimentos salvos, com o último dia recebido e a quantidade de dias."""
+    if not os.path.isdir(base):
+        return []
+    experimentos = []
+    for nome in sorted(os.listdir(base)):
+        estado = _ler_estado(os.path.join(base, nome))
+        if estado:
+            experimentos.append({"experimento": estado["experimento"], "ultimo_dia": estado["dias"][-1],
+                                 "dias": len(estado["dias"]), "atualizado_em": estado["atualizado_em"]})
+    return experimentos
+
+
+def append_daily(experimento, daily, arquivo_hash, base=ESTADO_DIR):
+    """
+    Soma as estatísticas diárias de um novo arquivo (já agregadas, ex.:
+    `frame.daily`) ao experimento salvo e devolve o estado atualizado.
+    """
+    pasta = _pasta(experimento, base)
+    os.makedirs(os.path.join(pasta, "diarias"), exist_ok=True)
+    estado = _ler_estado(pasta) or {"experimento": experimento, "dias": [], "hash": "", "resumo": {}}
+    versao = estado.get("versao", 0) + 1
+
+    novo = combine_daily([daily])
+    novos_dias = sorted(novo["data"].dt.strftime("%Y-%m-%d").unique())
+    repetidos = set(novos_dias) & set(estado["dias"])
+
+    if not estado["dias"]:
+        daily, resumo = novo, summarize_daily_rpv(novo)
+    elif repetidos:
+        # Reenvio de dias já salvos: esses dias são substituídos e o resumo recalculado
+        anteriores = _ler_diarias(pasta, estado)
+        anteriores = anteriores[~anteriores["data"].dt.strftime("%Y-%m-%d").isin(repetidos)]
+        daily = combine_daily([anteriores, novo])
+        resumo = summarize_daily_rpv(daily)
+    else:
+        daily = combine_daily([_ler_diarias(pasta, estado), novo])
+        resumo = combine_summaries(_resumo_de_estado(estado), summarize_daily_rpv(novo))
+
+    temporario = os.path.join(pasta, "diarias", f".{_nome_versao(versao)}.tmp")
+    daily.assign(variante=daily["variante"].astype(str)).to_parquet(temporario, index=False)
+    os.replace(temporario, os.path.join(pasta, "diarias", _nome_versao(versao)))
+
+    estado = {
+        "experimento": experimento,
+        "dias": sorted(daily["data"].dt.strftime("%Y-%m-%d").unique()),
+        # Hash encadeado: muda a cada envio sem precisar reler o histórico
+        "hash": hashlib.sha256(f"{estado['hash']}:{arquivo_hash}".encode()).hexdigest(),
+        "versao": versao,
+        "atualizado_em": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "resumo": resumo.to_dict(orient="index"),
+        "posteriores": _posteriores(resumo),
+    }
+    _escrever_json(os.path.join(pasta, "estado.json"), estado)
+    _remover_versoes_antigas(pasta, estado)
+    return estado
+
+
+def load_incremental_frame(experimento, base=ESTADO_DIR):
+    """ExperimentFrame do experimento salvo, com o resumo acumulado já pronto."""
+    pasta = _pasta(experimento, base)
+    estado = _ler_estado(pasta)
+    if estado is None:
+        raise ValueError(f"Experimento '{experimento}' não encontrado")
+    daily = _ler_diarias(pasta, estado)
+    return frame_from_daily(daily, estado["hash"], resumo=_resumo_de_estado(estado))
+
+
+def remove_experiment(experimento, base=ESTADO_DIR):
+    pasta = _pasta(experimento, base)
+    for raiz, _, arquivos in os.walk(pasta, topdown=False):
+        for nome in arquivos:
+            os.remove(os.path.join(raiz, nome))
+        os.rmdir(raiz)
@@ -0,0 +1,131 @@
+# scripts/jobs.py
+"""
+Análises em segundo plano, compartilhadas entre as sessões do servidor.
+
+Cada análise roda em uma thread do pool (`MAX_ANALISES_SIMULTANEAS` de cada
+vez), fora do script do Streamlit: um rerun (ex.: trocar de página) não
+interrompe o cálculo. Pedidos idênticos (mesma chave) feitos enquanto a
+análise está em andamento, de qualquer sessão, recebem o mesmo job.
+
+O cancelamento é cooperativo: as análises longas chamam `relatar_progresso`
+entre blocos, que atualiza o avanço e levanta `AnaliseCancelada` quando todas
+as sessões interessadas desistiram do job.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Análises calculadas ao mesmo tempo; as demais esperam na fila
+MAX_ANALISES_SIMULTANEAS = 2
+
+_executor = ThreadPoolExecutor(max_workers=MAX_ANALISES_SIMULTANEAS, thread_name_prefix="analise")
+_em_andamento = {}
+_trava = threading.Lock()
+_atual = threading.local()
+
+
+class AnaliseCancelada(Exception):
+    """Interrompe uma análise cancelada por todas as sessões interessadas."""
+
+
+class Job:
+    """Análise em andamento: avanço, interessados e o future com o resultado."""
+
+    def __init__(self, chave):
+        self.chave = chave
+        self.feitos = 0
+        self.total = None
+        self.inicio = None
+        self.assinantes = 1
+        self.future = None
+        self._cancelar = threading.Event()
+
+    @property
+    def iniciado(self):
+        return self.inicio is not None
+
+    @property
+    def cancelado(self):
+        return self._cancelar.is_set()
+
+    def fracao(self):
+        """Fração concluída (0 enquanto o total de etapas é desconhecido)."""
+        return min(self.feitos / self.total, 1.0) if self.total else 0.0
+
+    def decorrido(self):
+        return time.monotonic() - self.inicio if self.iniciado else 0.0
+
+    def aguardar(self, timeout):
+        """Espera até `timeout` segundos e diz se o job terminou."""
+        wait([self.future], timeout=timeout)
+        return self.future.done()
+
+    def resultado(self):
+        """Resultado da análise; exceções da análise são relançadas aqui."""
+        return self.future.result()
+
+    def cancelar(self):
+        """
+        Retira um interessado. Sem interessados, o job é cancelado: sai da fila
+        ou é interrompido no próximo `relatar_progresso`.
+        """
+        with _trava:
+            self.assinantes -= 1
+            if self.assinantes > 0:
+                return
+            self._cancelar.set()
+            if _em_andamento.get(self.chave) is self:
+                del _em_andamento[self.chave]
+        self.future.cancel()
+
+
+def _executar(job, func):
+    if job.cancelado:
+        raise AnaliseCancelada()
+    job.inicio = time.monotonic()
+    _atual.job = job
+    try:
+        return func()
+    finally:
+        _atual.job = None
+
+
+def _finalizar(job):
+    with _trava:
+        if _em_andamento.get(job.chave) is job:
+            del _em_andamento[job.chave]
+
+
+def submeter(chave, func):
+    """
+    Agenda `func()` em segundo plano e devolve o job. Se já houver um job com
+    a mesma chave em andamento (de qualquer sessão), ele é reaproveitado.
+    """
+    with _trava:
+        job = _em_andamento.get(chave)
+        if job is not None:
+            job.assinantes += 1
+            return job
+        job = _em_andamento[chave] = Job(chave)
+        job.future = _executor.submit(_executar, job, func)
+    job.future.add_done_callback(lambda _: _finalizar(job))
+    return job
+
+
+def relatar_progresso(feitos, total=None):
+    """
+    Informa o avanço da análise que roda nesta thread (sem efeito fora de um
+    job) e levanta `AnaliseCancelada` se ela foi cancelada.
+    """
+    job = getattr(_atual, "job", None)
+    if job is None:
+        return
+    if job.cancelado:
+        raise AnaliseCancelada()
+    job.feitos, job.total = feitos, total
+
+
+def jobs_em_andamento():
+    """Quantidade de análises na fila ou em execução."""
+    with _trava:
+        return len(_em_andamento)
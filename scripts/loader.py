@@ -0,0 +1,95 @@
+# scripts/loader.py
+import hashlib
+import io
+import os
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+
+# Extensões aceitas pelo uploader
+FORMATOS = ["xlsx", "xls", "csv", "gz", "parquet", "arrow", "feather", "ipc"]
+
+# Tipos explícitos das colunas obrigatórias e da covariável opcional (`data` é convertida depois da leitura)
+DTYPES = {"variante": "category", "receita": "float64", "sessoes": "float64", "receita_pre": "float64"}
+
+# Diretório onde planilhas Excel já lidas são guardadas em Parquet
+CACHE_DIR = os.path.join(".cache", "uploads")
+
+
+def hash_bytes(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def _aplicar_dtypes(df):
+    df = df.copy()
+    if "data" in df.columns:
+        df["data"] = pd.to_datetime(df["data"])
+    for col, dtype in DTYPES.items():
+        if col in df.columns:
+            if dtype == "category":
+                df[col] = df[col].astype(str).astype("category")
+            else:
+                df[col] = pd.to_numeric(df[col]).astype(dtype)
+    return df
+
+
+def _ler_csv(conteudo, compression=None):
+    return pd.read_csv(io.BytesIO(conteudo), dtype=DTYPES, compression=compression)
+
+
+def _ler_arrow(conteudo):
+    # Aceita tanto o formato de arquivo IPC (Feather v2) quanto o de stream
+    try:
+        tabela = pa.ipc.open_file(pa.BufferReader(conteudo)).read_all()
+    except pa.ArrowInvalid:
+        tabela = pa.ipc.open_stream(pa.BufferReader(conteudo)).read_all()
+    return tabela.to_pandas()
+
+
+def _ler_excel(conteudo, arquivo_hash, cache_dir):
+    caminho = os.path.join(cache_dir, f"{arquivo_hash}.parquet")
+    if os.path.exists(caminho):
+        return pd.read_parquet(caminho)
+
+    df = _aplicar_dtypes(pd.read_excel(io.BytesIO(conteudo)))
+    os.makedirs(cache_dir, exist_ok=True)
+    # Escrita atômica: uploads simultâneos do mesmo arquivo não deixam Parquet pela metade
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    df.to_parquet(temporario, index=False)
+    os.replace(temporario, caminho)
+    return df
+
+
+def load_experiment_file(uploaded_file, cache_dir=CACHE_DIR):
+    """
+    Lê o arquivo enviado (Excel, CSV, CSV gzip, Parquet ou Arrow IPC) com tipos
+    explícitos para data/variante/receita/sessoes.
+
+    Planilhas Excel são convertidas para Parquet em `cache_dir`, com o hash do
+    arquivo como nome, para que um novo upload do mesmo arquivo seja imediato.
+    """
+    return _ler(uploaded_file.name, uploaded_file.getvalue(), cache_dir)
+
+
+def load_experiment_path(caminho, cache_dir=CACHE_DIR):
+    """Mesmo que `load_experiment_file`, para um arquivo em disco (uso em lote/CLI)."""
+    with open(caminho, "rb") as arquivo:
+        return _ler(os.path.basename(caminho), arquivo.read(), cache_dir)
+
+
+def _ler(nome_original, conteudo, cache_dir):
+    nome = nome_original.lower()
+    if nome.endswith((".xlsx", ".xls")):
+        df = _ler_excel(conteudo, hash_bytes(conteudo), cache_dir)
+    elif nome.endswith((".csv.gz", ".gz")):
+        df = _ler_csv(conteudo, compression="gzip")
+    elif nome.endswith(".csv"):
+        df = _ler_csv(conteudo)
+    elif nome.endswith(".parquet"):
+        df = pd.read_parquet(io.BytesIO(conteudo))
+    elif nome.endswith((".arrow", ".feather", ".ipc")):
+        df = _ler_arrow(conteudo)
+    else:
+        raise ValueError(f"Formato de arquivo não suportado: {nome_original}")
+
+    return _aplicar_dtypes(df)
@@ -0,0 +1,91 @@
+# scripts/parallel.py
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+
+# Número fixo de amostras por bloco. Cada bloco recebe seu próprio stream de
+# sementes (SeedSequence.spawn), de modo que o resultado final depende apenas
+# da semente e do número de amostras, nunca do número de processos.
+TAMANHO_BLOCO = 2000
+
+# Pools reutilizados entre chamadas (criar processos a cada rerun é caro). As
+# análises rodam em threads de jobs (scripts.jobs), então o acesso é travado
+_pools = {}
+_trava_pools = threading.Lock()
+
+# Processos criados sem `fork`: um fork do servidor do Streamlit, que tem várias
+# threads, pode herdar travas presas e deixar o processo filho parado
+_CONTEXTO = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def workers_disponiveis():
+    return os.cpu_count() or 1
+
+
+def _pool(n_workers):
+    with _trava_pools:
+        if n_workers not in _pools:
+            _pools[n_workers] = ProcessPoolExecutor(max_workers=n_workers,
+                                                    mp_context=multiprocessing.get_context(_CONTEXTO))
+        return _pools[n_workers]
+
+
+def _descartar_pool(n_workers, pool):
+    # Um pool quebrado (ex.: processo morto por falta de memória) não volta a funcionar
+    with _trava_pools:
+        if _pools.get(n_workers) is pool:
+            del _pools[n_workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def dividir_em_blocos(total, tamanho_bloco=TAMANHO_BLOCO):
+    """Divide `total` em blocos de tamanho fixo (o último pode ser menor)."""
+    return [min(tamanho_bloco, total - inicio) for inicio in range(0, total, tamanho_bloco)]
+
+
+def sementes_por_bloco(seed, n_blocos):
+    """Gera um SeedSequence independente por bloco a partir de uma semente ou SeedSequence."""
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(n_blocos)
+
+
+def semente_do_bloco(raiz, indice):
+    """
+    Stream do bloco `indice`, igual a `raiz.spawn(indice + 1)[indice]`, para
+    fontes em que o total de blocos só é conhecido ao final da leitura.
+    """
+    return np.random.SeedSequence(raiz.entropy, spawn_key=raiz.spawn_key + (indice,), pool_size=raiz.pool_size)
+
+
+def map_paralelo(func, tarefas, n_workers=1, ao_concluir=None):
+    """
+    Executa `func(*tarefa)` para cada tarefa e devolve os resultados na ordem
+    das tarefas. Com `n_workers > 1` as tarefas são distribuídas em um pool de
+    processos; `func` precisa ser uma função de nível de módulo.
+
+    `ao_concluir(feitas)` é chamado a cada resultado recebido (ex.: progresso);
+    se levantar uma exceção, as tarefas ainda na fila do pool são canceladas.
+    """
+    tarefas = list(tarefas)
+    if n_workers <= 1 or len(tarefas) <= 1:
+        return _coletar((func(*tarefa) for tarefa in tarefas), ao_concluir)
+    pool = _pool(n_workers)
+    try:
+        return _coletar(pool.map(func, *zip(*tarefas)), ao_concluir)
+    except BrokenProcessPool:
+        _descartar_pool(n_workers, pool)
+        raise
+
+
+def _coletar(resultados, ao_concluir):
+    if ao_concluir is None:
+        return list(resultados)
+    saida = []
+    for resultado in resultados:
+        saida.append(resultado)
+        ao_concluir(len(saida))
+    return saida
@@ -0,0 +1,240 @@
+# scripts/plotting.py
+"""
+Camada de renderização dos gráficos das análises.
+
+Os gráficos de distribuição são desenhados a partir de histogramas e densidades
+pré-calculados (`Distribuicao`), nunca das amostras brutas: KDE por FFT para
+amostras (bootstrap) ou a pdf analítica para as posteriores (`scripts.density`). Resumos e figuras
+ficam em cache pelo hash do conteúdo, então um rerun da página não refaz nada:
+- matplotlib: a figura é rasterizada uma vez em PNG e fechada logo em seguida,
+  para não acumular no registro global do pyplot;
+- plotly: só os bins e a grade da densidade vão para o navegador.
+
+matplotlib, seaborn e scipy só são importados (e o matplotlib configurado)
+quando a primeira figura é desenhada, para não pesar na partida do app.
+"""
+import hashlib
+import io
+from dataclasses import dataclass
+import numpy as np
+import streamlit as st
+
+# Cores usadas historicamente para Controle e Nova; demais variantes seguem a paleta tab10
+CORES_BASE = ['#3498db', '#2ecc71']
+
+BACKENDS = {"matplotlib": "Matplotlib (imagem)", "plotly": "Plotly (interativo)"}
+
+BINS = 50
+DPI = 150
+MAX_FIGURAS = 64
+
+# Configuração global do matplotlib, aplicada na primeira figura
+ESTILO_MATPLOTLIB = 'seaborn-v0_8-whitegrid'
+RC_MATPLOTLIB = {
+    'figure.dpi': DPI,
+    'savefig.dpi': DPI,
+    'font.size': 12,
+    'axes.labelsize': 12,
+    'axes.titlesize': 14,
+    'xtick.labelsize': 10,
+    'ytick.labelsize': 10,
+    'legend.fontsize': 10,
+    'figure.titlesize': 16,
+}
+_matplotlib_configurado = False
+
+
+def pyplot():
+    """Importa o pyplot, aplicando a configuração global na primeira chamada."""
+    global _matplotlib_configurado
+    import matplotlib.pyplot as plt
+    if not _matplotlib_configurado:
+        plt.rcParams.update(RC_MATPLOTLIB)
+        plt.style.use(ESTILO_MATPLOTLIB)
+        _matplotlib_configurado = True
+    return plt
+
+
+def paleta(n, base=CORES_BASE):
+    """Lista de `n` cores começando pelas cores base do app."""
+    # tab10 vem do matplotlib (as mesmas cores do seaborn); o seaborn, bem mais
+    # pesado de importar, só entra para a paleta husl com muitas variantes
+    import matplotlib
+    from matplotlib.colors import to_hex
+    extras = [to_hex(c) for c in matplotlib.colormaps["tab10"].colors if to_hex(c) not in base]
+    if n <= len(base) + len(extras):
+        return (list(base) + extras)[:n]
+    import seaborn as sns
+    return sns.color_palette("husl", n).as_hex()
+
+
+def backend_atual():
+    """Backend escolhido na barra lateral (matplotlib por padrão)."""
+    rotulos = {rotulo: backend for backend, rotulo in BACKENDS.items()}
+    return rotulos.get(st.session_state.get("backend_graficos"), "matplotlib")
+
+
+def hash_conteudo(*valores):
+    """Hash estável de arrays, DataFrames e valores simples, usado como chave dos caches."""
+    h = hashlib.sha1()
+    for valor in valores:
+        if hasattr(valor, "to_numpy"):
+            valor = valor.to_numpy()
+        if isinstance(valor, np.ndarray) and valor.dtype != object:
+            h.update(str((valor.dtype, valor.shape)).encode())
+            h.update(np.ascontiguousarray(valor).tobytes())
+        else:
+            h.update(repr(valor).encode())
+    return h.hexdigest()
+
+
+@dataclass(frozen=True)
+class Distribuicao:
+    """Densidade (e, para amostras, histograma) pré-calculada de uma variante."""
+    nome: str
+    cor: str
+    densidade: object               # scripts.density.Densidade
+    bordas: np.ndarray = None       # (bins + 1,), só quando há amostras
+    contagens: np.ndarray = None    # (bins,)
+    ci: tuple = None                # linhas tracejadas (inferior, superior)
+    cor_ci: str = None
+
+
+def resumir_amostras(amostras, bins=BINS, corte=0):
+    """
+    Histograma e KDE (binned/FFT) de um vetor de amostras. `corte` estende a
+    grade em larguras de banda além dos extremos, como o `cut` do seaborn (0 no
+    histplot, 3 no kdeplot).
+    """
+    from scripts.density import kde_binned
+    amostras = np.asarray(amostras, dtype=float)
+    contagens, bordas = np.histogram(amostras, bins=bins)
+    return bordas, contagens, kde_binned(amostras, corte=corte)
+
+
+@st.cache_data(max_entries=MAX_FIGURAS, show_spinner=False)
+def _resumos(chave, _amostras, bins, corte):
+    return [resumir_amostras(a, bins=bins, corte=corte) for a in _amostras]
+
+
+def distribuicoes(nomes, amostras, cores, cis=None, cores_ci=None, bins=BINS, corte=0):
+    """Uma `Distribuicao` por linha de `amostras` (variantes x amostras), com resumos em cache."""
+    amostras = np.asarray(amostras)
+    resumos = _resumos(hash_conteudo(amostras), amostras, bins, corte)
+    cis = cis if cis is not None else [None] * len(nomes)
+    cores_ci = cores_ci or cores
+    return [
+        Distribuicao(nome, cor, densidade, bordas, contagens, _ci(ci), cor_ci)
+        for nome, cor, (bordas, contagens, densidade), ci, cor_ci in zip(nomes, cores, resumos, cis, cores_ci)
+    ]
+
+
+def distribuicoes_analiticas(nomes, densidades, cores, cis=None):
+    """Uma `Distribuicao` por `Densidade` já tabelada (ex.: pdf das posteriores)."""
+    cis = cis if cis is not None else [None] * len(nomes)
+    return [
+        Distribuicao(nome, cor, densidade, ci=_ci(ci), cor_ci=cor)
+        for nome, cor, densidade, ci in zip(nomes, cores, densidades, cis)
+    ]
+
+
+def _ci(ci):
+    return None if ci is None else tuple(float(x) for x in ci)
+
+
+@st.cache_data(max_entries=MAX_FIGURAS, show_spinner=False)
+def _png(chave, _desenhar):
+    plt = pyplot()
+    fig = _desenhar()
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=DPI, bbox_inches="tight")
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def exibir_figura(chave, desenhar, desenhar_plotly=None):
+    """
+    Mostra uma figura no backend escolhido. `desenhar` devolve uma figura
+    matplotlib (rasterizada uma vez por `chave` e fechada); `desenhar_plotly`,
+    quando informado, devolve a figura plotly usada no backend interativo.
+    """
+    if desenhar_plotly is not None and backend_atual() == "plotly":
+        st.plotly_chart(desenhar_plotly(), use_container_width=True)
+    else:
+        st.image(_png(chave, desenhar), use_column_width=True)
+
+
+def _escala(d, estilo):
+    # No histograma a densidade acompanha as contagens, como no histplot(kde=True)
+    return d.contagens.sum() * np.diff(d.bordas).mean() if estilo == "hist" else 1.0
+
+
+def _matplotlib_distribuicoes(dists, estilo, titulo, xlabel, ylabel, referencia, legenda, figsize, alpha):
+    fig, ax = pyplot().subplots(figsize=figsize, dpi=DPI)
+    for d in dists:
+        curva = d.densidade.valores * _escala(d, estilo)
+        if estilo == "hist":
+            ax.bar(d.bordas[:-1], d.contagens, width=np.diff(d.bordas), align="edge",
+                   color=d.cor, alpha=alpha, edgecolor="white", linewidth=0.5, label=d.nome)
+            ax.plot(d.densidade.grade, curva, color=d.cor, linewidth=1.5)
+        else:
+            ax.fill_between(d.densidade.grade, curva, color=d.cor, alpha=alpha, label=d.nome)
+            ax.plot(d.densidade.grade, curva, color=d.cor, linewidth=2)
+        if d.ci is not None:
+            ax.axvline(d.ci[0], color=d.cor_ci, linestyle='dashed', linewidth=1.5)
+            ax.axvline(d.ci[1], color=d.cor_ci, linestyle='dashed', linewidth=1.5)
+    if referencia is not None:
+        ax.axvline(referencia, color='black', linestyle='solid', linewidth=1.5)
+    if legenda:
+        ax.legend(frameon=True, fancybox=True, shadow=True)
+    ax.set_title(titulo, fontweight='bold')
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    return fig
+
+
+def _plotly_distribuicoes(dists, estilo, titulo, xlabel, ylabel, referencia, legenda, alpha):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for d in dists:
+        curva = d.densidade.valores * _escala(d, estilo)
+        if estilo == "hist":
+            fig.add_bar(x=(d.bordas[:-1] + d.bordas[1:]) / 2, y=d.contagens, width=np.diff(d.bordas),
+                        marker_color=d.cor, opacity=alpha, name=d.nome, legendgroup=d.nome)
+            fig.add_scatter(x=d.densidade.grade, y=curva, mode="lines", line_color=d.cor,
+                            legendgroup=d.nome, showlegend=False, hoverinfo="skip")
+        else:
+            fig.add_scatter(x=d.densidade.grade, y=curva, mode="lines", fill="tozeroy", line_color=d.cor, name=d.nome)
+        if d.ci is not None:
+            for x in d.ci:
+                fig.add_vline(x=x, line_dash="dash", line_color=d.cor_ci)
+    if referencia is not None:
+        fig.add_vline(x=referencia, line_color="black")
+    fig.update_layout(title=titulo, xaxis_title=xlabel, yaxis_title=ylabel, barmode="overlay",
+                      bargap=0, showlegend=legenda, template="plotly_white")
+    return fig
+
+
+def grafico_distribuicoes(dists, titulo, xlabel, ylabel, estilo="hist", referencia=None,
+                          legenda=True, figsize=(12, 6), alpha=0.6):
+    """
+    Histogramas com KDE (`estilo="hist"`) ou densidades preenchidas (`"kde"`)
+    de várias distribuições, com os intervalos como linhas tracejadas e uma
+    linha de referência opcional (ex.: diferença zero).
+    """
+    args = (dists, estilo, titulo, xlabel, ylabel, referencia, legenda)
+    chave = hash_conteudo(
+        *[x for d in dists
+          for x in (d.nome, d.cor, d.cor_ci, d.ci, d.bordas, d.contagens, d.densidade.grade, d.densidade.valores)],
+        estilo, titulo, xlabel, ylabel, referencia, legenda, figsize, alpha,
+    )
+    exibir_figura(
+        chave,
+        lambda: _matplotlib_distribuicoes(*args, figsize, alpha),
+        lambda: _plotly_distribuicoes(*args, alpha),
+    )
@@ -0,0 +1,124 @@
+# scripts/power.py
+"""
+Planejamento de testes: poder para detectar um lift de RPV em função da
+duração, a partir do RPV diário histórico (mesmo formato dos experimentos).
+
+Cada dia de teste é uma observação do RPV diário por variante, como nas
+análises diárias, com o mesmo tráfego por variante do histórico.
+
+- Analítico: teste Z unilateral da diferença das médias diárias, em forma
+  fechada (poder e dias necessários)
+- Bootstrap e bayesiano: Monte Carlo com a regra de decisão das páginas
+  (p-valor bootstrap < α; P(tratamento > controle) > 1 - α pela posterior Beta
+  do RPV escalado). Os dias simulados são sorteados com reposição dos dias
+  históricos, preservando a assimetria e as caudas do RPV, e o tratamento
+  recebe o lift multiplicativo. Cada bloco de simulações é uma única conta de
+  arrays (lifts x simulações x réplicas) e os blocos vão para o pool de
+  processos; o resultado depende só da semente, não do número de processos.
+"""
+import numpy as np
+from scipy.stats import norm
+from scripts.bayes_exact import PRIOR_BETA
+from scripts.jobs import relatar_progresso
+from scripts.parallel import dividir_em_blocos, map_paralelo, sementes_por_bloco
+
+METODOS_PODER = {
+    "analitico": "Analítico (teste Z)",
+    "bootstrap": "Bootstrap diário (simulação)",
+    "bayesiano": "Bayesiano Beta (simulação)",
+}
+
+# Experimentos simulados por bloco; cada bloco tem seu próprio stream de sementes
+SIMULACOES_POR_BLOCO = 100
+
+# Réplicas do bootstrap / amostras da posterior em cada experimento simulado
+REPLICAS_INTERNAS = 500
+
+# Dias de histórico necessários para estimar a variação diária
+MIN_DIAS_HISTORICO = 3
+
+
+def analytic_power(media, desvio, lifts, duracoes, alpha=0.05):
+    """
+    Poder do teste Z unilateral ao nível `alpha` para cada lift relativo
+    (linhas) e duração em dias (colunas), com desvio padrão diário `desvio`
+    nas duas variantes.
+    """
+    efeito = np.asarray(lifts, dtype=float)[:, None] * media
+    erro = desvio * np.sqrt(2 / np.asarray(duracoes, dtype=float))[None, :]
+    return norm.cdf(efeito / erro - norm.ppf(1 - alpha))
+
+
+def required_days(media, desvio, lifts, alpha=0.05, poder=0.8):
+    """Dias de teste para atingir `poder` em cada lift (teste Z unilateral), arredondados para cima."""
+    efeito = np.asarray(lifts, dtype=float) * media
+    with np.errstate(divide="ignore"):
+        return np.ceil(2 * (desvio * (norm.ppf(1 - alpha) + norm.ppf(poder)) / efeito) ** 2)
+
+
+def first_duration(poder, duracoes, alvo=0.8):
+    """Menor duração da grade em que o poder atinge `alvo`, por lift (NaN se nenhuma atinge)."""
+    atingiu = np.asarray(poder) >= alvo
+    return np.where(atingiu.any(axis=1), np.asarray(duracoes, dtype=float)[atingiu.argmax(axis=1)], np.nan)
+
+
+def _detecta_bootstrap(controle, tratamento, rng, alpha, replicas):
+    # Pesos multinomiais (bootstrap clássico) compartilhados pelas simulações do bloco:
+    # as médias reamostradas de todos os lifts e simulações saem de um produto de matrizes
+    dias = controle.shape[-1]
+    pesos_controle = rng.multinomial(dias, np.full(dias, 1.0 / dias), size=replicas).T / dias
+    pesos_tratamento = rng.multinomial(dias, np.full(dias, 1.0 / dias), size=replicas).T / dias
+    diff = tratamento @ pesos_tratamento - controle @ pesos_controle   # (lifts, simulações, réplicas)
+    return (diff < 0).mean(axis=-1) < alpha
+
+
+def _detecta_bayesiano(controle, tratamento, rng, alpha, replicas):
+    # Posterior Beta do RPV diário escalado pelo mínimo e máximo das duas variantes
+    dias = controle.shape[-1]
+    controle = np.broadcast_to(controle, tratamento.shape)
+    minimo = np.minimum(controle.min(axis=-1), tratamento.min(axis=-1))
+    amplitude = np.maximum(controle.max(axis=-1), tratamento.max(axis=-1)) - minimo
+    amplitude = np.where(amplitude > 0, amplitude, 1.0)
+
+    amostras = []
+    for rpv in (controle, tratamento):
+        escalado = (rpv.sum(axis=-1) - dias * minimo) / amplitude
+        alphas, betas = PRIOR_BETA[0] + escalado, PRIOR_BETA[1] + dias - escalado
+        amostras.append(rng.beta(alphas[..., None], betas[..., None], size=alphas.shape + (replicas,)))
+    return (amostras[1] > amostras[0]).mean(axis=-1) > 1 - alpha
+
+
+def _simular_bloco(historico, lifts, dias, tamanho, semente, metodo, alpha, replicas):
+    """Quantos dos `tamanho` experimentos simulados de `dias` dias detectam cada lift."""
+    rng = np.random.default_rng(semente)
+    controle = historico[rng.integers(0, len(historico), size=(tamanho, dias))]
+    # Os mesmos dias sorteados para todos os lifts: as curvas de poder ficam suaves e monótonas
+    tratamento = historico[rng.integers(0, len(historico), size=(tamanho, dias))] * (1 + lifts[:, None, None])
+    detecta = _detecta_bootstrap if metodo == "bootstrap" else _detecta_bayesiano
+    return detecta(controle, tratamento, rng, alpha, replicas).sum(axis=1)
+
+
+def simulated_power(historico, lifts, duracoes, metodo="bootstrap", alpha=0.05, num_simulacoes=500,
+                    seed=None, n_workers=1, replicas=REPLICAS_INTERNAS):
+    """
+    Poder por Monte Carlo (lifts x durações) para o método `metodo`
+    ("bootstrap" ou "bayesiano"), a partir do RPV diário histórico.
+
+    Cada duração recebe o stream `SeedSequence(seed).spawn(len(duracoes))[i]`,
+    dividido em blocos de `SIMULACOES_POR_BLOCO` simulações.
+    """
+    if metodo not in ("bootstrap", "bayesiano"):
+        raise ValueError(f"Método sem simulação de poder: {metodo}")
+
+    historico = np.asarray(historico, dtype=float)
+    lifts = np.asarray(lifts, dtype=float)
+    blocos = dividir_em_blocos(num_simulacoes, SIMULACOES_POR_BLOCO)
+    tarefas = []
+    for dias, semente_duracao in zip(duracoes, sementes_por_bloco(seed, len(duracoes))):
+        for tamanho, semente in zip(blocos, sementes_por_bloco(semente_duracao, len(blocos))):
+            tarefas.append((historico, lifts, int(dias), tamanho, semente, metodo, alpha, replicas))
+
+    deteccoes = map_paralelo(_simular_bloco, tarefas, n_workers=n_workers,
+                             ao_concluir=lambda feitas: relatar_progresso(feitas, len(tarefas)))
+    deteccoes = np.array(deteccoes).reshape(len(duracoes), len(blocos), len(lifts)).sum(axis=1)
+    return deteccoes.T / num_simulacoes
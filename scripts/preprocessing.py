@@ -0,0 +1,325 @@
+# scripts/preprocessing.py
+import hashlib
+from dataclasses import dataclass, replace
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+COLUNAS_OBRIGATORIAS = ["data", "variante", "receita", "sessoes"]
+
+# Covariável opcional do período anterior ao teste (ex.: receita do usuário antes
+# do experimento), usada no ajuste CUPED. Linhas sem valor entram com zero.
+COLUNA_COVARIAVEL = "receita_pre"
+
+# Colunas de texto além das obrigatórias são dimensões de segmento (ex.: dispositivo,
+# país), mantidas como categóricas; acima deste número de categorias a coluna é
+# tratada como identificador e ignorada
+MAX_CATEGORIAS_DIMENSAO = 1000
+
+# Nome da variante tratada como controle (se ausente, a primeira em ordem alfabética)
+NOME_CONTROLE = "Controle"
+
+# Quantidade máxima de experimentos mantidos em cache no servidor
+MAX_FRAMES_CACHE = 8
+
+
+@dataclass(frozen=True)
+class ExperimentFrame:
+    """
+    Dados de um experimento já validados e agregados.
+
+    - raw: linhas originais com `data` datetime64, `variante` categórica, `rpv`
+      e as dimensões de segmento categóricas (None quando o arquivo foi lido em
+      blocos, sem manter as linhas em memória)
+    - daily: estatísticas suficientes por (data, variante): linhas, receita,
+      sessoes, conversoes, rpv_soma, rpv_soma_quad, as somas de quadrados e
+      produtos cruzados de COLUNAS_PRODUTOS e rpv (média diária do RPV)
+    - hash: hash do conteúdo, usado como chave de cache
+    - resumo: estatísticas acumuladas do RPV diário por variante, quando já vêm
+      prontas do modo incremental (senão são calculadas a partir de `daily`)
+    - cubo: as mesmas estatísticas de `daily` por (data, variante, dimensões),
+      quando o upload tem colunas de segmento; qualquer fatia sai dele sem
+      reagrupar as linhas brutas
+    - dimensoes: colunas de segmento do cubo
+    - filtros: pares (dimensão, valor) que definem a fatia (vazio = todos os dados)
+
+    As análises apenas leem estes DataFrames; nunca devem alterá-los.
+    """
+    hash: str
+    raw: pd.DataFrame | None
+    daily: pd.DataFrame
+    variantes: tuple
+    resumo: pd.DataFrame | None = None
+    cubo: pd.DataFrame | None = None
+    dimensoes: tuple = ()
+    filtros: tuple = ()
+
+    @property
+    def controle(self):
+        return NOME_CONTROLE if NOME_CONTROLE in self.variantes else self.variantes[0]
+
+    @property
+    def ordem_variantes(self):
+        """Variantes com o controle primeiro; as análises comparam as demais contra ele."""
+        return (self.controle,) + tuple(v for v in self.variantes if v != self.controle)
+
+    def segmentos(self, dimensao):
+        """Valores da dimensão presentes no cubo, em ordem."""
+        return sorted(self.cubo[dimensao].astype(str).unique())
+
+    def fatia(self, filtros):
+        """
+        Frame restrito a um segmento, ex.: `fatia((("dispositivo", "mobile"),))`.
+        As estatísticas diárias saem do cubo; as linhas brutas, quando
+        existem, são apenas filtradas.
+        """
+        filtros = tuple(filtros)
+        if not filtros:
+            return self
+        if self.cubo is None:
+            raise ValueError("Este experimento não tem colunas de segmento")
+        desconhecidas = [dimensao for dimensao, _ in filtros if dimensao not in self.dimensoes]
+        if desconhecidas:
+            raise ValueError(f"Dimensão de segmento desconhecida: {', '.join(desconhecidas)}")
+        cubo = self.cubo[_mascara(self.cubo, filtros)]
+        if cubo.empty:
+            raise ValueError("Nenhum dado no segmento selecionado")
+        raw = None if self.raw is None else self.raw[_mascara(self.raw, filtros)]
+        chave = hashlib.sha1(f"{self.hash}|{filtros}".encode()).hexdigest()
+        frame = frame_from_daily(combine_daily([cubo]), chave, raw=raw, cubo=cubo, dimensoes=self.dimensoes)
+        return replace(frame, filtros=self.filtros + filtros)
+
+    def rpv_diario(self, variante):
+        """RPV médio diário da variante, em ordem cronológica."""
+        return self.daily.loc[self.daily["variante"] == variante, "rpv"].to_numpy()
+
+    def resumo_rpv(self):
+        """Dias, soma, soma dos quadrados, mínimo e máximo do RPV diário, por variante."""
+        return self.resumo if self.resumo is not None else summarize_daily_rpv(self.daily)
+
+    def totais(self):
+        """Totais por variante: receita, sessões, conversões e dias."""
+        return self.daily.groupby("variante", observed=True).agg(
+            receita_total=("receita", "sum"),
+            sessoes_total=("sessoes", "sum"),
+            conversoes=("conversoes", "sum"),
+            dias=("data", "nunique"),
+        ).reset_index()
+
+
+def validate_data(df):
+    """Verifica colunas e tipos do upload. Levanta ValueError com mensagem amigável."""
+    faltando = [col for col in COLUNAS_OBRIGATORIAS if col not in df.columns]
+    if faltando:
+        raise ValueError(
+            "Dados não contêm todas as colunas necessárias: data, variante, receita, sessoes "
+            f"(faltando: {', '.join(faltando)})"
+        )
+    if df.empty:
+        raise ValueError("O arquivo não contém registros")
+    if df[COLUNAS_OBRIGATORIAS].isna().any().any():
+        raise ValueError("Existem valores vazios nas colunas data, variante, receita ou sessoes")
+    for col in ["receita", "sessoes", COLUNA_COVARIAVEL]:
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            raise ValueError(f"A coluna '{col}' deve conter apenas números")
+    try:
+        pd.to_datetime(df["data"])
+    except (ValueError, TypeError):
+        raise ValueError("A coluna 'data' contém valores que não são datas válidas")
+
+
+def hash_dataframe(df):
+    """Hash do conteúdo (valores, colunas e índice) do DataFrame."""
+    h = hashlib.sha1()
+    h.update(",".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+# Quadrados e produtos cruzados por linha (receita, sessões, conversão e a
+# covariável): com eles, variâncias e covariâncias das métricas de razão saem
+# em forma fechada (método delta e CUPED), sem voltar às linhas. O log da
+# receita das linhas que converteram (zero nas demais) e seu quadrado dão a
+# posterior do valor do pedido no modelo composto (scripts.compound)
+COLUNAS_PRODUTOS = {
+    "receita_quad": ("receita", "receita"),
+    "sessoes_quad": ("sessoes", "sessoes"),
+    "receita_sessoes": ("receita", "sessoes"),
+    "conversoes_sessoes": ("converteu", "sessoes"),
+    "covariavel": ("covariavel", None),
+    "covariavel_quad": ("covariavel", "covariavel"),
+    "receita_covariavel": ("receita", "covariavel"),
+    "sessoes_covariavel": ("sessoes", "covariavel"),
+    "conversoes_covariavel": ("converteu", "covariavel"),
+    "log_valor": ("log_valor", None),
+    "log_valor_quad": ("log_valor", "log_valor"),
+}
+
+# Colunas aditivas das estatísticas diárias (podem ser somadas entre blocos)
+COLUNAS_ADITIVAS = ["linhas", "receita", "sessoes", "conversoes", "rpv_soma", "rpv_soma_quad", *COLUNAS_PRODUTOS]
+
+
+def _mascara(tabela, filtros):
+    return np.logical_and.reduce([(tabela[dimensao] == valor).to_numpy() for dimensao, valor in filtros])
+
+
+def dimension_columns(df):
+    """Colunas de texto/categóricas opcionais do upload, usadas como segmentos."""
+    return [
+        col for col in df.columns
+        if col not in COLUNAS_OBRIGATORIAS and col != COLUNA_COVARIAVEL
+        and not pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_datetime64_any_dtype(df[col])
+        and df[col].nunique() <= MAX_CATEGORIAS_DIMENSAO
+    ]
+
+
+def prepare_rows(df, dimensoes=None):
+    """
+    Valida e converte as colunas obrigatórias e as dimensões para os tipos do
+    frame. Sem `dimensoes`, as colunas de segmento são detectadas no próprio df.
+    """
+    validate_data(df)
+    raw = pd.DataFrame({
+        "data": pd.to_datetime(df["data"]),
+        "variante": df["variante"].astype(str).astype("category"),
+        "receita": df["receita"].astype(float),
+        "sessoes": df["sessoes"].astype(float),
+    })
+    raw["rpv"] = raw["receita"] / raw["sessoes"]
+    if COLUNA_COVARIAVEL in df.columns:
+        raw[COLUNA_COVARIAVEL] = df[COLUNA_COVARIAVEL].astype(float).fillna(0.0).to_numpy()
+    for col in dimension_columns(df) if dimensoes is None else dimensoes:
+        raw[col] = df[col].astype(str).astype("category")
+    return raw
+
+
+def aggregate_daily(raw, dimensoes=()):
+    """
+    Estatísticas suficientes por (data, variante) a partir das linhas brutas;
+    com `dimensoes`, por (data, variante, dimensões) — o cubo.
+    """
+    linhas = raw.assign(
+        converteu=(raw["receita"] > 0).astype(int),
+        rpv_quad=raw["rpv"] ** 2,
+        covariavel=raw[COLUNA_COVARIAVEL] if COLUNA_COVARIAVEL in raw.columns else 0.0,
+        log_valor=np.log(raw["receita"].where(raw["receita"] > 0, 1.0)),
+    )
+    for coluna, (a, b) in COLUNAS_PRODUTOS.items():
+        linhas[coluna] = linhas[a] if b is None else linhas[a] * linhas[b]
+    daily = linhas.groupby(["data", "variante", *dimensoes], observed=True).agg(
+        linhas=("rpv", "size"),
+        receita=("receita", "sum"),
+        sessoes=("sessoes", "sum"),
+        conversoes=("converteu", "sum"),
+        rpv_soma=("rpv", "sum"),
+        rpv_soma_quad=("rpv_quad", "sum"),
+        **{coluna: (coluna, "sum") for coluna in COLUNAS_PRODUTOS},
+    ).reset_index()
+    daily["rpv"] = daily["rpv_soma"] / daily["linhas"]
+    return daily
+
+
+def combine_daily(partes, dimensoes=()):
+    """
+    Soma estatísticas diárias parciais (de blocos ou arquivos diferentes).
+    Partes do cubo são somadas por (data, variante, `dimensoes`); sem
+    `dimensoes` as demais dimensões são somadas (marginalizadas).
+    """
+    chaves = ["variante", *dimensoes]
+    daily = pd.concat(partes, ignore_index=True)
+    daily[chaves] = daily[chaves].astype(str)
+    # Estatísticas salvas antes de uma coluna existir ficam sem valor (NaN), não zeradas
+    daily = daily.reindex(columns=[*daily.columns, *(c for c in COLUNAS_ADITIVAS if c not in daily.columns)])
+    daily = daily.groupby(["data", *chaves])[COLUNAS_ADITIVAS].sum(min_count=1).reset_index()
+    daily[chaves] = daily[chaves].astype("category")
+    daily["rpv"] = daily["rpv_soma"] / daily["linhas"]
+    return daily
+
+
+def limit_dimensions(cubo, dimensoes):
+    """Dimensões do cubo com até MAX_CATEGORIAS_DIMENSAO valores (as demais são identificadores)."""
+    return [dimensao for dimensao in dimensoes if cubo[dimensao].nunique() <= MAX_CATEGORIAS_DIMENSAO]
+
+
+# Estatísticas acumuladas do RPV diário por variante: com elas as posteriores
+# são atualizadas em tempo constante quando um novo dia chega
+COLUNAS_RESUMO = ["dias", "soma", "soma_quad", "minimo", "maximo"]
+
+
+def summarize_daily_rpv(daily):
+    """Resumo (COLUNAS_RESUMO) do RPV diário por variante, indexado pelo nome da variante."""
+    resumo = daily.assign(rpv_quad=daily["rpv"] ** 2).groupby("variante", observed=True).agg(
+        dias=("rpv", "size"),
+        soma=("rpv", "sum"),
+        soma_quad=("rpv_quad", "sum"),
+        minimo=("rpv", "min"),
+        maximo=("rpv", "max"),
+    )
+    resumo.index = resumo.index.astype(str)
+    return resumo[COLUNAS_RESUMO]
+
+
+def combine_summaries(anterior, novo):
+    """Combina dois resumos de dias disjuntos (variantes novas entram com o próprio resumo)."""
+    juntos = pd.concat([anterior, novo]).groupby(level=0).agg(
+        {"dias": "sum", "soma": "sum", "soma_quad": "sum", "minimo": "min", "maximo": "max"}
+    )
+    juntos.index.name = "variante"
+    return juntos[COLUNAS_RESUMO]
+
+
+def frame_from_daily(daily, content_hash, raw=None, resumo=None, cubo=None, dimensoes=()):
+    """Monta o ExperimentFrame a partir das estatísticas diárias já agregadas."""
+    if daily["variante"].nunique() < 2:
+        raise ValueError("O arquivo precisa conter pelo menos duas variantes (ex.: Controle e Nova)")
+    return ExperimentFrame(
+        hash=content_hash,
+        raw=raw,
+        daily=daily,
+        variantes=tuple(daily["variante"].cat.categories),
+        resumo=resumo,
+        cubo=cubo,
+        dimensoes=tuple(dimensoes),
+    )
+
+
+def frame_from_cube(cubo, dimensoes, content_hash, raw=None):
+    """ExperimentFrame a partir do cubo: `daily` é a soma do cubo sobre as dimensões."""
+    if not dimensoes:
+        return frame_from_daily(cubo, content_hash, raw=raw)
+    return frame_from_daily(combine_daily([cubo]), content_hash, raw=raw, cubo=cubo, dimensoes=dimensoes)
+
+
+def build_experiment_frame(df, content_hash=None):
+    """Valida o upload e monta o ExperimentFrame (sem cache)."""
+    raw = prepare_rows(df)
+    dimensoes = [col for col in raw.columns if isinstance(raw[col].dtype, pd.CategoricalDtype) and col != "variante"]
+    return frame_from_cube(aggregate_daily(raw, dimensoes), dimensoes, content_hash or hash_dataframe(df), raw=raw)
+
+
+@st.cache_resource(max_entries=MAX_FRAMES_CACHE, show_spinner=False)
+def _cached_frame(content_hash, _df):
+    return build_experiment_frame(_df, content_hash)
+
+
+def get_experiment_frame(df):
+    """ExperimentFrame do DataFrame, compartilhado entre páginas e sessões via hash do conteúdo."""
+    return _cached_frame(hash_dataframe(df), df)
+
+
+@st.cache_resource(max_entries=MAX_FRAMES_CACHE * 4, show_spinner=False)
+def _cached_slice(frame_hash, filtros, _frame):
+    return _frame.fatia(filtros)
+
+
+def get_frame_slice(frame, filtros):
+    """Fatia do frame compartilhada entre reruns e sessões (ver `ExperimentFrame.fatia`)."""
+    filtros = tuple(filtros)
+    return _cached_slice(frame.hash, filtros, frame) if filtros else frame
+
+
+def as_experiment_frame(data):
+    """Aceita um ExperimentFrame ou um DataFrame bruto."""
+    if isinstance(data, ExperimentFrame):
+        return data
+    return get_experiment_frame(data)
@@ -0,0 +1,172 @@
+# scripts/ratio.py
+"""
+Métricas de razão (RPV = receita / sessões, conversão = conversões / sessões)
+tratadas como razão de somas, com inferência em forma fechada.
+
+- Método delta: a variância de Ȳ/X̄ vem das médias, variâncias e covariância
+  de Y e X por linha (a unidade de randomização), sem reamostragem.
+- CUPED: ajuste pela covariável do período anterior (COLUNA_COVARIAVEL), com
+  θ = Cov(razão linearizada, covariável) / Var(covariável) agrupado entre as
+  variantes, como em uma regressão com a covariável centrada.
+
+Tudo é calculado a partir das somas de COLUNAS_PRODUTOS em `frame.daily`: o
+custo é O(variantes), qualquer que seja o número de linhas ou de dias. As
+funções aceitam somas com dimensões extras à esquerda (ex.: segmentos x
+variantes), de modo que todos os segmentos do cubo saem de uma só vez.
+"""
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from scripts.srm import benjamini_hochberg
+
+# Métrica: (numerador, denominador, quadrado do numerador, produto num x den,
+# produto num x covariável) entre as colunas de `frame.daily`
+METRICAS = {
+    "rpv": ("receita", "sessoes", "receita_quad", "receita_sessoes", "receita_covariavel"),
+    "conversao": ("conversoes", "sessoes", "conversoes", "conversoes_sessoes", "conversoes_covariavel"),
+}
+
+NOMES_METRICAS = {
+    "rpv": "Receita por Visita (RPV)",
+    "conversao": "Taxa de Conversão",
+}
+
+
+def ratio_totals(frame):
+    """Somas por variante (controle na linha 0) das colunas usadas pelas métricas de razão."""
+    totais = frame.daily.groupby("variante", observed=True).sum(numeric_only=True)
+    totais.index = totais.index.astype(str)
+    return totais.loc[list(frame.ordem_variantes)]
+
+
+def segment_totals(frame, dimensao):
+    """
+    Somas por (segmento, variante) a partir do cubo: devolve os valores do
+    segmento e um dicionário coluna -> array (segmentos, variantes).
+    """
+    tabela = frame.cubo.groupby([dimensao, "variante"], observed=True).sum(numeric_only=True)
+    tabela = tabela.unstack("variante", fill_value=0)
+    colunas = list(frame.ordem_variantes)
+    segmentos = tabela.index.astype(str)
+    totais = {}
+    for coluna in tabela.columns.get_level_values(0).unique():
+        bloco = tabela[coluna]
+        bloco.columns = bloco.columns.astype(str)
+        totais[coluna] = bloco.reindex(columns=colunas, fill_value=0).to_numpy(dtype=float)
+    return segmentos, totais
+
+
+def _soma(totais, coluna):
+    return np.asarray(totais[coluna], dtype=float)
+
+
+def _covariancia(n, soma_a, soma_b, soma_ab):
+    return (soma_ab - soma_a * soma_b / n) / (n - 1)
+
+
+def delta_ratio(totais, metrica="rpv"):
+    """
+    Razão Ȳ/X̄ por variante e sua variância pelo método delta:
+    Var(R) ≈ (s²_Y - 2R·s_XY + R²·s²_X) / (n·X̄²).
+    Também devolve a covariância por linha da razão linearizada com a
+    covariável, usada pelo CUPED.
+    """
+    y, x, yy, xy, yz = METRICAS[metrica]
+    n = _soma(totais, "linhas")
+    soma_y, soma_x, soma_z = (_soma(totais, c) for c in (y, x, "covariavel"))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        razao = soma_y / soma_x
+        media_x = soma_x / n
+        var_y = _covariancia(n, soma_y, soma_y, _soma(totais, yy))
+        var_x = _covariancia(n, soma_x, soma_x, _soma(totais, "sessoes_quad"))
+        cov_xy = _covariancia(n, soma_x, soma_y, _soma(totais, xy))
+        variancia = (var_y - 2 * razao * cov_xy + razao ** 2 * var_x) / (n * media_x ** 2)
+
+        # Linearização L = (Y - R·X) / X̄: sua covariância com a covariável Z
+        cov_yz = _covariancia(n, soma_y, soma_z, _soma(totais, yz))
+        cov_xz = _covariancia(n, soma_x, soma_z, _soma(totais, "sessoes_covariavel"))
+        cov_lz = (cov_yz - razao * cov_xz) / media_x
+    return razao, np.maximum(variancia, 0), cov_lz
+
+
+def cuped_ratio(totais, razao, variancia, cov_lz):
+    """
+    Razão ajustada R* = R - θ(Z̄ - Z̄_total) e sua variância. Sem variância na
+    covariável (coluna ausente ou constante) devolve a razão sem ajuste e θ = 0.
+    θ é agrupado entre as variantes (um coeficiente por segmento).
+    """
+    n = _soma(totais, "linhas")
+    soma_z = _soma(totais, "covariavel")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var_z = np.nan_to_num(_covariancia(n, soma_z, soma_z, _soma(totais, "covariavel_quad")))
+        pesos = np.maximum(n - 1, 0)
+        denominador = np.sum(pesos * var_z, axis=-1, keepdims=True)
+        theta = np.where(denominador > 0, np.sum(pesos * np.nan_to_num(cov_lz), axis=-1, keepdims=True)
+                         / denominador, 0.0)
+
+        media_z = soma_z / n
+        ajustada = razao - theta * (media_z - soma_z.sum(axis=-1, keepdims=True) / n.sum(axis=-1, keepdims=True))
+        variancia_ajustada = variancia - 2 * theta * cov_lz / n + theta ** 2 * var_z / n
+    sem_ajuste = theta == 0
+    ajustada = np.where(sem_ajuste, razao, ajustada)
+    variancia_ajustada = np.where(sem_ajuste, variancia, np.maximum(variancia_ajustada, 0))
+    return ajustada, variancia_ajustada, theta[..., 0]
+
+
+def _comparar(razao, variancia, alpha):
+    z = norm.ppf(1 - alpha / 2)
+    controle, var_controle = razao[..., [0]], variancia[..., [0]]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        diff = razao[..., 1:] - controle
+        erro_diff = np.sqrt(variancia[..., 1:] + var_controle)
+        lift = razao[..., 1:] / controle - 1
+        erro_lift = np.sqrt(variancia[..., 1:] / controle ** 2 + razao[..., 1:] ** 2 * var_controle / controle ** 4)
+        p_value = 2 * norm.sf(np.abs(diff / erro_diff))
+    return {
+        "diff": diff,
+        "diff_ci_inf": diff - z * erro_diff,
+        "diff_ci_sup": diff + z * erro_diff,
+        "lift": lift * 100,
+        "lift_ci_inf": (lift - z * erro_lift) * 100,
+        "lift_ci_sup": (lift + z * erro_lift) * 100,
+        "p_value": np.nan_to_num(p_value, nan=1.0),
+    }
+
+
+def compare_to_control(razao, variancia, alpha=0.05):
+    """
+    Diferença absoluta e lift relativo de cada tratamento contra o controle
+    (linha 0), com intervalos (1 - alpha) e p-valor bilateral do teste Z.
+    O lift R_t/R_c - 1 também usa o método delta.
+    """
+    return pd.DataFrame(_comparar(razao, variancia, alpha))
+
+
+def ratio_by_segment(frame, dimensao, metrica="rpv", alpha=0.05):
+    """
+    Método delta (e CUPED, havendo covariável) em todos os segmentos da
+    dimensão de uma vez. Uma linha por (segmento, tratamento), com q-valores
+    de Benjamini-Hochberg entre os segmentos.
+    """
+    segmentos, totais = segment_totals(frame, dimensao)
+    razao, variancia, cov_lz = delta_ratio(totais, metrica)
+    ajustada, variancia_ajustada, theta = cuped_ratio(totais, razao, variancia, cov_lz)
+    comparacao = _comparar(ajustada, variancia_ajustada, alpha)
+
+    tratamentos = list(frame.ordem_variantes[1:])
+    tabela = pd.DataFrame({
+        "dimensao": dimensao,
+        "segmento": np.repeat(segmentos, len(tratamentos)),
+        "variante": np.tile(tratamentos, len(segmentos)),
+        "metrica": metrica,
+        "linhas": totais["linhas"][:, 1:].ravel(),
+        **{coluna: valores.ravel() for coluna, valores in comparacao.items()},
+        "cuped": np.repeat(theta != 0, len(tratamentos)),
+    })
+    # Segmentos sem dados no controle ou no tratamento ficam sem teste
+    controle_com_dados = np.repeat(totais["linhas"][:, 0] > 1, len(tratamentos))
+    validos = np.isfinite(tabela["diff"]) & controle_com_dados & (tabela["linhas"] > 1)
+    tabela["q_value"] = np.nan
+    tabela.loc[validos, "q_value"] = benjamini_hochberg(tabela.loc[validos, "p_value"].to_numpy())
+    return tabela[validos].reset_index(drop=True)
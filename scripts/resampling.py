@@ -0,0 +1,179 @@
+# scripts/resampling.py
+from itertools import islice
+import numpy as np
+from scripts.jobs import relatar_progresso
+from scripts.parallel import dividir_em_blocos, sementes_por_bloco, semente_do_bloco, map_paralelo
+
+# Limite de memória (em MB) para a matriz de reamostragem processada de cada vez
+MEMORIA_MAX_MB = 256
+
+# Métodos de reamostragem suportados
+METODOS = ("indices", "multinomial", "poisson")
+
+# Pesos do bootstrap em passada única sobre as linhas: Poisson(1) aproxima o
+# bootstrap clássico; Exp(1), normalizados por grupo, são os pesos de Dirichlet
+# do bootstrap bayesiano (e são bem mais baratos de sortear)
+PESOS = {
+    "poisson": "Poisson(1)",
+    "bayesiano": "Bayesiano (Dirichlet)",
+}
+
+
+def _tamanho_bloco(n, num_samples, memoria_max_mb):
+    # Cada célula da matriz ocupa o índice/peso (int64) mais o valor reamostrado (float64)
+    bytes_por_linha = max(1, n) * 16
+    linhas = int(memoria_max_mb * 1024 ** 2 // bytes_por_linha)
+    return max(1, min(num_samples, linhas))
+
+
+def bootstrap_means(data, num_samples=10000, rng=None, method="indices", memoria_max_mb=MEMORIA_MAX_MB):
+    """
+    Gera as médias de `num_samples` reamostragens com reposição de `data`.
+
+    - method="indices": sorteia uma matriz 2-D de índices (amostras x n)
+    - method="multinomial": sorteia pesos multinomiais (equivalente ao bootstrap clássico)
+    - method="poisson": sorteia pesos Poisson(1) (bootstrap de Poisson)
+
+    A matriz é processada em blocos de no máximo `memoria_max_mb` MB e as médias
+    de cada bloco são calculadas em uma única redução. `rng` pode ser um
+    `np.random.Generator`, uma semente inteira ou None.
+    """
+    if method not in METODOS:
+        raise ValueError(f"Método de reamostragem desconhecido: {method}")
+
+    data = np.asarray(data, dtype=float)
+    n = len(data)
+    if n == 0:
+        raise ValueError("Não é possível reamostrar um conjunto vazio")
+
+    rng = np.random.default_rng(rng)
+    means = np.empty(num_samples)
+    bloco = _tamanho_bloco(n, num_samples, memoria_max_mb)
+
+    for inicio in range(0, num_samples, bloco):
+        fim = min(inicio + bloco, num_samples)
+        tamanho = fim - inicio
+
+        if method == "indices":
+            indices = rng.integers(0, n, size=(tamanho, n))
+            means[inicio:fim] = data[indices].mean(axis=1)
+        elif method == "multinomial":
+            pesos = rng.multinomial(n, np.full(n, 1.0 / n), size=tamanho)
+            means[inicio:fim] = pesos @ data / n
+        else:
+            pesos = rng.poisson(1.0, size=(tamanho, n))
+            totais = pesos.sum(axis=1)
+            # Reamostragens com peso total zero (raras) recebem a média observada
+            means[inicio:fim] = np.divide(
+                pesos @ data, totais,
+                out=np.full(tamanho, data.mean()),
+                where=totais > 0,
+            )
+
+    return means
+
+
+def _bootstrap_bloco(data, tamanho, semente, method, memoria_max_mb):
+    return bootstrap_means(data, tamanho, rng=np.random.default_rng(semente),
+                           method=method, memoria_max_mb=memoria_max_mb)
+
+
+def parallel_bootstrap_matrix(datasets, num_samples=10000, seed=None, method="indices",
+                              n_workers=1, memoria_max_mb=MEMORIA_MAX_MB):
+    """
+    Médias bootstrap de vários grupos (ex.: variantes) como matriz (grupos x amostras).
+
+    Cada grupo usa o stream `SeedSequence(seed).spawn(len(datasets))[i]`,
+    dividido em blocos de tamanho fixo, cada um com seu próprio stream
+    `SeedSequence.spawn`; os blocos são concatenados na ordem original. Para
+    uma mesma semente o resultado é idêntico bit a bit qualquer que seja
+    `n_workers`. Os blocos de todos os grupos são enviados ao pool em uma única
+    chamada; o limite de memória vale por processo.
+    """
+    blocos = dividir_em_blocos(num_samples)
+    sementes_grupos = sementes_por_bloco(seed, len(datasets))
+    tarefas = []
+    for dados, semente_grupo in zip(datasets, sementes_grupos):
+        dados = np.asarray(dados, dtype=float)
+        for tamanho, semente in zip(blocos, sementes_por_bloco(semente_grupo, len(blocos))):
+            tarefas.append((dados, tamanho, semente, method, memoria_max_mb))
+    medias = np.concatenate(map_paralelo(_bootstrap_bloco, tarefas, n_workers=n_workers,
+                                         ao_concluir=lambda feitas: relatar_progresso(feitas, len(tarefas))))
+    return medias.reshape(len(datasets), num_samples)
+
+
+def _sortear_pesos(rng, pesos, tamanho):
+    if pesos == "poisson":
+        return rng.poisson(1.0, size=tamanho).astype(float)
+    return rng.standard_exponential(size=tamanho)
+
+
+def _acumular_bloco(codigos, valores, num_grupos, num_samples, semente, pesos, memoria_max_mb):
+    """
+    Soma dos pesos e dos valores ponderados de um bloco de linhas em cada
+    réplica. Devolve a matriz (amostras, 2 x grupos): pesos nas primeiras
+    colunas, valores ponderados nas demais.
+    """
+    rng = np.random.default_rng(semente)
+    n = len(valores)
+    linhas = np.arange(n)
+    # Indicadora do grupo e valor na coluna do grupo: uma multiplicação acumula tudo
+    colunas = np.zeros((n, 2 * num_grupos))
+    colunas[linhas, codigos] = 1.0
+    colunas[linhas, num_grupos + codigos] = valores
+
+    somas = np.empty((num_samples, 2 * num_grupos))
+    bloco = _tamanho_bloco(n, num_samples, memoria_max_mb)
+    for inicio in range(0, num_samples, bloco):
+        fim = min(inicio + bloco, num_samples)
+        somas[inicio:fim] = _sortear_pesos(rng, pesos, (fim - inicio, n)) @ colunas
+    return somas
+
+
+def streaming_bootstrap_means(blocos, num_grupos, num_samples=1000, seed=None, pesos="poisson",
+                              n_workers=1, memoria_max_mb=MEMORIA_MAX_MB, total_linhas=None):
+    """
+    Bootstrap de Poisson ou bayesiano em uma única passada sobre as linhas.
+
+    `blocos` é um iterável de pares (código do grupo, valor), um array de cada
+    por bloco de linhas. Os pesos de todas as réplicas são sorteados de uma vez
+    por bloco e só as somas ponderadas (grupos x amostras) persistem entre
+    blocos: a memória não cresce com o número de linhas. O bloco i usa o stream
+    `SeedSequence(seed).spawn(i + 1)[i]`, então o resultado é o mesmo para
+    qualquer `n_workers`; os blocos são lidos em ondas de `n_workers`.
+    `total_linhas`, se conhecido, só serve para relatar o progresso.
+
+    Retorna a matriz (grupos x amostras) das médias ponderadas.
+    """
+    if pesos not in PESOS:
+        raise ValueError(f"Pesos de bootstrap desconhecidos: {pesos}")
+
+    raiz = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    somas = np.zeros((num_samples, 2 * num_grupos))
+    contagem = np.zeros(num_grupos)
+    total = np.zeros(num_grupos)
+
+    blocos = enumerate(blocos)
+    while True:
+        onda = list(islice(blocos, max(1, n_workers)))
+        if not onda:
+            break
+        tarefas = []
+        for indice, (codigos, valores) in onda:
+            codigos = np.asarray(codigos, dtype=np.int64)
+            valores = np.asarray(valores, dtype=float)
+            contagem += np.bincount(codigos, minlength=num_grupos)
+            total += np.bincount(codigos, weights=valores, minlength=num_grupos)
+            tarefas.append((codigos, valores, num_grupos, num_samples,
+                            semente_do_bloco(raiz, indice), pesos, memoria_max_mb))
+        # Somadas na ordem dos blocos: idêntico bit a bit com qualquer número de processos
+        for parcial in map_paralelo(_acumular_bloco, tarefas, n_workers=n_workers):
+            somas += parcial
+        relatar_progresso(int(contagem.sum()), total_linhas)
+
+    if not contagem.all():
+        raise ValueError("Todos os grupos precisam ter ao menos uma linha")
+    peso, ponderado = somas[:, :num_grupos].T, somas[:, num_grupos:].T
+    # Réplicas com peso total zero (raras) recebem a média observada
+    return np.divide(ponderado, peso, out=np.repeat((total / contagem)[:, None], num_samples, axis=1),
+                     where=peso > 0)
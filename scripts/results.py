@@ -0,0 +1,272 @@
+# scripts/results.py
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+# Convenção: `variantes` traz o controle na posição 0. Arrays "por variante"
+# seguem essa ordem; arrays "por tratamento" cobrem apenas variantes[1:].
+#
+# `records()` devolve uma linha (dict) por variante, sem os arrays de amostras,
+# no formato usado pelas saídas JSON/Parquet da execução em lote.
+
+
+def _tratamento(valores, i):
+    # Valores por tratamento ficam vazios (None) na linha do controle
+    return None if i == 0 else float(valores[i - 1])
+
+
+@dataclass(frozen=True)
+class BootstrapResult:
+    """Resultado do bootstrapping diário ou por sessão (médias reamostradas e intervalos de 90%)."""
+    variantes: tuple
+    rpv: tuple                # RPV diário observado, por variante
+    medias: np.ndarray        # (variantes,)
+    boot: np.ndarray          # (variantes, amostras)
+    ci: np.ndarray            # (variantes, 2)
+    diff_boot: np.ndarray     # (tratamentos, amostras): tratamento - controle
+    ci_diff: np.ndarray       # (tratamentos, 2)
+    p_value: np.ndarray       # (tratamentos,): P(diferença < 0)
+    lift: np.ndarray          # (tratamentos,), em %
+    prob_melhor: np.ndarray   # (variantes,): P(variante tem a maior média)
+    nivel: str = "diario"     # "diario" (RPV médio por dia) ou "sessao" (RPV por linha)
+
+    def records(self):
+        return [{
+            "variante": nome,
+            "controle": i == 0,
+            "nivel": self.nivel,
+            "media": float(self.medias[i]),
+            "ci_inf": float(self.ci[i, 0]),
+            "ci_sup": float(self.ci[i, 1]),
+            "diff_media": None if i == 0 else float(self.diff_boot[i - 1].mean()),
+            "diff_ci_inf": None if i == 0 else float(self.ci_diff[i - 1, 0]),
+            "diff_ci_sup": None if i == 0 else float(self.ci_diff[i - 1, 1]),
+            "p_value": _tratamento(self.p_value, i),
+            "lift": _tratamento(self.lift, i),
+            "prob_melhor": float(self.prob_melhor[i]),
+        } for i, nome in enumerate(self.variantes)]
+
+
+@dataclass(frozen=True)
+class BayesResult:
+    """Resultado bayesiano: posteriores, médias, intervalos de 90% e probabilidades."""
+    variantes: tuple
+    samples: np.ndarray            # (variantes, amostras); None no modo exato
+    medias: np.ndarray             # (variantes,)
+    ci: np.ndarray                 # (variantes, 2)
+    prob_vs_controle: np.ndarray   # (tratamentos,): P(tratamento > controle)
+    prob_melhor: np.ndarray        # (variantes,): P(variante é a melhor)
+    modo: str = "exato"
+    densidades: tuple = ()         # Densidade (pdf analítica) por variante, usada nos gráficos
+    modelo: str = "beta_escalada"  # "beta_escalada" (RPV escalado) ou "normal_gama_inversa" (Student-t)
+    lift: np.ndarray = None        # (tratamentos,): lift do RPV diário médio, em %
+    erro_lift: np.ndarray = None   # (tratamentos,): erro padrão do lift (método delta), em %
+    prior_lift: object = None      # empirical_bayes.LiftPrior usada no encolhimento (None = sem prior empírica)
+    lift_encolhido: np.ndarray = None      # (tratamentos,): média da posterior do lift sob a prior, em %
+    erro_encolhido: np.ndarray = None      # (tratamentos,): desvio da posterior do lift, em %
+    prob_lift_positivo: np.ndarray = None  # (tratamentos,): P(lift > 0) sob a prior
+
+    def records(self):
+        return [{
+            "variante": nome,
+            "controle": i == 0,
+            "media": float(self.medias[i]),
+            "ci_inf": float(self.ci[i, 0]),
+            "ci_sup": float(self.ci[i, 1]),
+            "prob_vs_controle": _tratamento(self.prob_vs_controle, i),
+            "prob_melhor": float(self.prob_melhor[i]),
+            "modo": self.modo,
+            "modelo": self.modelo,
+            "lift": _tratamento(self.lift, i),
+            "erro_lift": _tratamento(self.erro_lift, i),
+            **({"lift_encolhido": _tratamento(self.lift_encolhido, i),
+                "erro_encolhido": _tratamento(self.erro_encolhido, i),
+                "prob_lift_positivo": _tratamento(self.prob_lift_positivo, i)}
+               if self.prior_lift is not None else {}),
+        } for i, nome in enumerate(self.variantes)]
+
+
+@dataclass(frozen=True)
+class MetricsResult:
+    """Métricas descritivas por variante, SRM e evolução diária."""
+    variantes: tuple
+    srm_expected: np.ndarray          # proporções esperadas por variante
+    srm_observed: np.ndarray          # proporções observadas por variante
+    srm_p_value: float
+    metrics: pd.DataFrame
+    conv_metrics: pd.DataFrame
+    daily_metrics: pd.DataFrame
+    comparacao: pd.DataFrame          # diferenças % de cada tratamento contra o controle
+    srm_celulas: pd.DataFrame = None  # SRM por dia e por segmento (ver srm.srm_cells)
+
+    def records(self):
+        linhas = self.metrics.merge(self.conv_metrics[['variante', 'conversoes', 'taxa_conversao']], on='variante')
+        linhas = linhas.merge(self.comparacao, on='variante', how='left')
+        linhas['variante'] = linhas['variante'].astype(str)
+        linhas = linhas.set_index('variante').loc[list(self.variantes)].reset_index()
+        linhas['controle'] = linhas['variante'] == self.variantes[0]
+        linhas['srm_proporcao_esperada'] = self.srm_expected
+        linhas['srm_proporcao_observada'] = self.srm_observed
+        linhas['srm_p_value'] = self.srm_p_value
+        if self.srm_celulas is not None:
+            linhas['srm_celulas'] = int(self.srm_celulas['srm'].sum())
+        return linhas.astype(object).where(linhas.notna(), None).to_dict("records")
+
+
+@dataclass(frozen=True)
+class SequentialResult:
+    """Trajetórias acumuladas dia a dia do teste sequencial (mSPRT e grupo sequencial)."""
+    variantes: tuple
+    datas: tuple                  # dias em ordem cronológica
+    n: np.ndarray                 # (dias, variantes): linhas acumuladas
+    media: np.ndarray             # (dias, variantes): RPV médio acumulado
+    diff: np.ndarray              # (dias, tratamentos): tratamento - controle
+    z: np.ndarray                 # (dias, tratamentos)
+    p_sempre_valido: np.ndarray   # (dias, tratamentos): p-valor do mSPRT
+    cs_inf: np.ndarray            # (dias, tratamentos): sequência de confiança
+    cs_sup: np.ndarray            # (dias, tratamentos)
+    fronteira: np.ndarray         # (dias,): |Z| crítico do grupo sequencial
+    alpha_gasto: np.ndarray       # (dias,): alfa acumulado gasto
+    parada_msprt: np.ndarray      # (tratamentos,): índice do dia de parada, -1 se não parou
+    parada_gs: np.ndarray         # (tratamentos,)
+    alpha: float
+    gasto: str
+    dias_planejados: int
+
+    def dia_parada(self, paradas, j):
+        """Data em que o tratamento j cruzou a fronteira (None se ainda não cruzou)."""
+        return None if paradas[j] < 0 else pd.Timestamp(self.datas[paradas[j]]).strftime("%Y-%m-%d")
+
+    def records(self):
+        return [{
+            "variante": nome,
+            "controle": i == 0,
+            "media": float(self.media[-1, i]),
+            "linhas": int(self.n[-1, i]),
+            "diff": _tratamento(self.diff[-1], i),
+            "z": _tratamento(self.z[-1], i),
+            "p_sempre_valido": _tratamento(self.p_sempre_valido[-1], i),
+            "cs_inf": _tratamento(self.cs_inf[-1], i),
+            "cs_sup": _tratamento(self.cs_sup[-1], i),
+            "fronteira": float(self.fronteira[-1]),
+            "dia_parada_msprt": None if i == 0 else self.dia_parada(self.parada_msprt, i - 1),
+            "dia_parada_gs": None if i == 0 else self.dia_parada(self.parada_gs, i - 1),
+            "gasto": self.gasto,
+        } for i, nome in enumerate(self.variantes)]
+
+
+@dataclass(frozen=True)
+class RatioResult:
+    """Métricas de razão pelo método delta, sem e com o ajuste CUPED."""
+    variantes: tuple
+    metricas: tuple               # chaves de ratio.METRICAS
+    razao: np.ndarray             # (métricas, variantes): razão de somas
+    erro: np.ndarray              # (métricas, variantes): erro padrão pelo método delta
+    razao_cuped: np.ndarray       # (métricas, variantes); igual a `razao` sem covariável
+    erro_cuped: np.ndarray        # (métricas, variantes)
+    theta: np.ndarray             # (métricas,): coeficiente do CUPED, 0 sem covariável
+    comparacoes: pd.DataFrame     # uma linha por (métrica, ajuste, tratamento)
+    alpha: float = 0.05
+    segmentos: pd.DataFrame = None  # uma linha por (dimensão, segmento, métrica, tratamento)
+
+    @property
+    def cuped(self):
+        """Se houve ajuste CUPED (covariável com variância) em alguma métrica."""
+        return bool(np.any(self.theta != 0))
+
+    def comparacao(self, metrica, ajuste):
+        filtro = (self.comparacoes["metrica"] == metrica) & (self.comparacoes["ajuste"] == ajuste)
+        return self.comparacoes[filtro].reset_index(drop=True)
+
+    def records(self):
+        linhas = []
+        for m, metrica in enumerate(self.metricas):
+            delta, cuped = self.comparacao(metrica, "delta"), self.comparacao(metrica, "cuped")
+            for i, nome in enumerate(self.variantes):
+                linhas.append({
+                    "variante": nome,
+                    "controle": i == 0,
+                    "metrica": metrica,
+                    "razao": float(self.razao[m, i]),
+                    "erro_padrao": float(self.erro[m, i]),
+                    "lift": _tratamento(delta["lift"], i),
+                    "p_value": _tratamento(delta["p_value"], i),
+                    "razao_cuped": float(self.razao_cuped[m, i]),
+                    "erro_padrao_cuped": float(self.erro_cuped[m, i]),
+                    "lift_cuped": _tratamento(cuped["lift"], i),
+                    "p_value_cuped": _tratamento(cuped["p_value"], i),
+                    "reducao_variancia": _tratamento(cuped["reducao_variancia"], i),
+                })
+        return linhas
+
+
+@dataclass(frozen=True)
+class PowerResult:
+    """Planejamento: poder por lift e duração a partir do RPV diário histórico do controle."""
+    variante: str                    # variante do histórico usada como referência
+    media: float                     # RPV diário médio do histórico
+    desvio: float                    # desvio padrão do RPV diário
+    dias_historico: int
+    lifts: np.ndarray                # (lifts,): lift relativo (0.05 = 5%)
+    duracoes: np.ndarray             # (durações,): dias de teste
+    poder_analitico: np.ndarray      # (lifts, durações)
+    dias_analiticos: np.ndarray      # (lifts,): dias para o poder alvo pelo teste Z
+    poder_simulado: np.ndarray       # (lifts, durações); None no método analítico
+    dias_simulados: np.ndarray       # (lifts,): menor duração da grade com o poder alvo (NaN se nenhuma)
+    metodo: str = "analitico"
+    alpha: float = 0.05
+    poder_alvo: float = 0.8
+    num_simulacoes: int = 0
+
+    def records(self):
+        poder = self.poder_simulado if self.poder_simulado is not None else self.poder_analitico
+        return [{
+            "lift": float(lift),
+            "dias": int(dias),
+            "metodo": self.metodo,
+            "poder": float(poder[i, j]),
+            "poder_analitico": float(self.poder_analitico[i, j]),
+        } for i, lift in enumerate(self.lifts) for j, dias in enumerate(self.duracoes)]
+
+
+@dataclass(frozen=True)
+class CompoundResult:
+    """Modelo composto (conversão x valor do pedido): RPV, suas partes e probabilidades."""
+    variantes: tuple
+    samples: np.ndarray            # (variantes, amostras): RPV da posterior conjunta
+    medias: np.ndarray             # (variantes,): RPV médio da posterior
+    ci: np.ndarray                 # (variantes, 2)
+    conversao: np.ndarray          # (variantes,): taxa de conversão média da posterior
+    ci_conversao: np.ndarray       # (variantes, 2)
+    valor_pedido: np.ndarray       # (variantes,): valor médio do pedido na posterior
+    ci_valor_pedido: np.ndarray    # (variantes, 2)
+    lift: np.ndarray               # (tratamentos,): lift médio do RPV, em %
+    ci_lift: np.ndarray            # (tratamentos, 2), em %
+    prob_vs_controle: np.ndarray   # (tratamentos,): P(RPV do tratamento > controle)
+    prob_melhor: np.ndarray        # (variantes,)
+    modelo_valor: str = "lognormal"
+    precisao: float = 0.005        # erro de Monte Carlo pedido
+    erro_mc: float = 0.0           # erro de Monte Carlo atingido
+
+    @property
+    def num_amostras(self):
+        return self.samples.shape[1]
+
+    def records(self):
+        return [{
+            "variante": nome,
+            "controle": i == 0,
+            "modelo_valor": self.modelo_valor,
+            "media": float(self.medias[i]),
+            "ci_inf": float(self.ci[i, 0]),
+            "ci_sup": float(self.ci[i, 1]),
+            "conversao": float(self.conversao[i]),
+            "valor_pedido": float(self.valor_pedido[i]),
+            "lift": _tratamento(self.lift, i),
+            "lift_ci_inf": None if i == 0 else float(self.ci_lift[i - 1, 0]),
+            "lift_ci_sup": None if i == 0 else float(self.ci_lift[i - 1, 1]),
+            "prob_vs_controle": _tratamento(self.prob_vs_controle, i),
+            "prob_melhor": float(self.prob_melhor[i]),
+            "amostras": self.num_amostras,
+            "erro_mc": self.erro_mc,
+        } for i, nome in enumerate(self.variantes)]
@@ -1,144 +1,179 @@
-# scripts/__init__.py (arquivo vazio apenas para reconhecer como pacote Python)
-
-# scripts/run_bootstrap.py
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-import streamlit as st
-import pandas as pd
-
-def run_bootstrap(df):
-    df["data"] = pd.to_datetime(df["data"])
-    df["rpv"] = df["receita"] / df["sessoes"]
-    rpv_diario = df.groupby(["data", "variante"]).agg({"rpv": "mean"}).reset_index()
-
-    controle = rpv_diario[rpv_diario["variante"] == "Controle"]["rpv"].values
-    nova = rpv_diario[rpv_diario["variante"] == "Nova"]["rpv"].values
-
-    def bootstrap(data, num_samples=10000):
-        boot_means = [np.mean(np.random.choice(data, size=len(data), replace=True)) for _ in range(num_samples)]
-        return np.percentile(boot_means, [5, 95]), np.array(boot_means)
-
-    ci_controle, boot_controle = bootstrap(controle)
-    ci_nova, boot_nova = bootstrap(nova)
-
-    diff_boot = boot_nova - boot_controle
-    ci_diff = np.percentile(diff_boot, [5, 95])
-    p_value = (diff_boot < 0).mean()
-
-    fig, ax = plt.subplots(figsize=(12, 6), dpi=150)
-    sns.histplot(boot_controle, bins=50, color='#3498db', alpha=0.6, label='Controle', kde=True)
-    sns.histplot(boot_nova, bins=50, color='#2ecc71', alpha=0.6, label='Nova', kde=True)
-    ax.axvline(ci_controle[0], color='#3498db', linestyle='dashed', linewidth=1.5)
-    ax.axvline(ci_controle[1], color='#3498db', linestyle='dashed', linewidth=1.5)
-    ax.axvline(ci_nova[0], color='#2ecc71', linestyle='dashed', linewidth=1.5)
-    ax.axvline(ci_nova[1], color='#2ecc71', linestyle='dashed', linewidth=1.5)
-    ax.legend(frameon=True, fancybox=True, shadow=True)
-    ax.set_title("Distribuição do RPV Diário com Intervalos de Confiança", fontweight='bold')
-    ax.set_xlabel("Receita por Visita (RPV)")
-    ax.set_ylabel("Frequência")
-    ax.grid(True, alpha=0.3)
-    plt.tight_layout()
-    st.pyplot(fig)
-
-    fig2, ax2 = plt.subplots(figsize=(10, 5))
-    sns.histplot(diff_boot, bins=50, color='purple', alpha=0.7)
-    ax2.axvline(ci_diff[0], color='red', linestyle='dashed')
-    ax2.axvline(ci_diff[1], color='red', linestyle='dashed')
-    ax2.axvline(0, color='black', linestyle='solid')
-    ax2.set_title("Diferença entre Nova e Controle (RPV Diário)")
-    st.pyplot(fig2)
-
-    st.markdown("---")
-    st.write(f"**RPV Controle**: Média = {np.mean(controle):.4f}, IC 90% = {ci_controle}")
-    st.write(f"**RPV Nova**: Média = {np.mean(nova):.4f}, IC 90% = {ci_nova}")
-    st.write(f"**Diferença**: Média = {np.mean(diff_boot):.4f}, IC 90% = {ci_diff}")
-    st.write(f"**p-valor** (Nova pior ou igual ao Controle): {p_value:.4f}")
-
-    if ci_diff[0] > 0:
-        st.success("✅ A nova variante superou significativamente a versão Controle!")
-    elif ci_diff[1] < 0:
-        st.error("❌ A nova variante teve desempenho inferior ao Controle!")
-    else:
-        st.warning("⚠️ O teste não teve um resultado estatisticamente significativo. Mais dados podem ser necessários.")
-
-
 # scripts/run_bayes_scipy.py (renomeado de run_bayes_beta)
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy.stats import beta
 import streamlit as st
-
-def run_bayes_scipy(df):
-    df["data"] = pd.to_datetime(df["data"])
-    df["rpv"] = df["receita"] / df["sessoes"]
-    rpv_diario = df.groupby(["data", "variante"]).agg({"rpv": "mean"}).reset_index()
-
-    controle = rpv_diario[rpv_diario["variante"] == "Controle"]["rpv"].values
-    nova = rpv_diario[rpv_diario["variante"] == "Nova"]["rpv"].values
-
-    min_rpv = min(np.min(controle), np.min(nova))
-    max_rpv = max(np.max(controle), np.max(nova))
-    controle_scaled = (controle - min_rpv) / (max_rpv - min_rpv)
-    nova_scaled = (nova - min_rpv) / (max_rpv - min_rpv)
-
-    alpha_prior, beta_prior = 2, 2
-    alpha_controle = alpha_prior + np.sum(controle_scaled)
-    beta_controle = beta_prior + len(controle_scaled) - np.sum(controle_scaled)
-    alpha_nova = alpha_prior + np.sum(nova_scaled)
-    beta_nova = beta_prior + len(nova_scaled) - np.sum(nova_scaled)
-
-    samples_controle = beta.rvs(alpha_controle, beta_controle, size=10000)
-    samples_nova = beta.rvs(alpha_nova, beta_nova, size=10000)
-
-    prob_nova_melhor = (samples_nova > samples_controle).mean()
+from scripts.bayes_exact import compare_posteriors, compare_samples, credible_interval, posterior_rpv
+from scripts.cache import background_analysis
+from scripts.density import densidade_analitica
+from scripts.empirical_bayes import (METODOS_PRIOR, MIN_EXPERIMENTOS, fit_prior_from_frames, lift_estimates,
+                                     shrink_lifts)
+from scripts.plotting import distribuicoes_analiticas, grafico_distribuicoes, paleta
+from scripts.preprocessing import as_experiment_frame
+from scripts.results import BayesResult
+from scripts.store import list_saved_experiments, load_saved_frame
+
+# Parágrafo da metodologia das páginas bayesianas sobre a prior empírica
+TEXTO_PRIOR_EMPIRICA = (
+    "**Prior empírica (opcional):** com experimentos anteriores salvos no histórico, a distribuição dos lifts já "
+    "observados é estimada (método dos momentos ou máxima verossimilhança marginal) e usada como prior do lift deste "
+    "teste. Lifts medidos com muito ruído são puxados para a média histórica, o que reduz falsos positivos e permite "
+    "decidir com menos tráfego; a incerteza da média histórica estimada continua no intervalo do lift"
+)
+
+@st.cache_data(show_spinner=False)
+def _prior_do_historico(experimentos, metodo):
+    return fit_prior_from_frames((load_saved_frame(e) for e in experimentos), metodo)
+
+def empirical_prior(metodo="verossimilhanca", excluir=None):
+    """
+    Prior do lift ajustada nos experimentos salvos no histórico (sem o
+    experimento `excluir`), ou None se o histórico ainda não basta.
+    """
+    experimentos = tuple(sorted(set(list_saved_experiments()["id"]) - {excluir}))
+    if len(experimentos) < MIN_EXPERIMENTOS:
+        return None
+    try:
+        return _prior_do_historico(experimentos, metodo)
+    except ValueError:
+        return None
+
+def sidebar_empirical_prior(pagina, excluir=None):
+    """
+    Controles da prior empírica na barra lateral de uma página bayesiana
+    (chaves próprias por página). Devolve a prior ajustada ou None.
+    """
+    if not st.sidebar.checkbox("🎯 Prior empírica do histórico", key=f"prior_empirica_{pagina}",
+                               help=f"Ajusta a prior do lift nos experimentos salvos (ao menos {MIN_EXPERIMENTOS}) "
+                                    "e encolhe o lift deste teste em direção ao histórico"):
+        return None
+    rotulo_prior = st.sidebar.selectbox("Ajuste da prior", options=list(METODOS_PRIOR.values()),
+                                        key=f"metodo_prior_{pagina}")
+    metodo_prior = next(chave for chave, rotulo in METODOS_PRIOR.items() if rotulo == rotulo_prior)
+    prior_lift = empirical_prior(metodo_prior, excluir=excluir)
+    if prior_lift is None:
+        st.sidebar.warning(f"⚠️ São necessários ao menos {MIN_EXPERIMENTOS} outros experimentos salvos no histórico")
+    return prior_lift
+
+def compute_bayes(frame, familia, num_samples=10000, seed=42, modo="exato", prior_lift=None):
+    """
+    Análise bayesiana do RPV diário com a posterior `familia` (ver
+    `bayes_exact.posterior_rpv`), comum às duas páginas bayesianas.
+    """
+    # Controle na posição 0; todas as variantes são tratadas juntas como vetores
+    variantes = frame.ordem_variantes
+
+    # Os parâmetros saem do resumo acumulado por variante (pronto no modo
+    # incremental e na leitura em blocos); posterior "vetorizada", formato (variantes, 1)
+    posterior = posterior_rpv(frame.resumo_rpv(), variantes, familia)
+
+    # Os gráficos usam a pdf analítica; amostras (variantes x amostras) só no modo Monte Carlo
+    samples = None
+    if modo == "exato":
+        prob_vs_controle, prob_melhor = compare_posteriors(posterior)
+        ci = credible_interval(posterior)
+        medias = posterior.mean().ravel()
+    else:
+        rng = np.random.default_rng(seed)
+        samples = posterior.rvs(size=(len(variantes), num_samples), random_state=rng)
+        prob_vs_controle, prob_melhor = compare_samples(samples)
+        ci = np.percentile(samples, [5, 95], axis=1).T
+        medias = samples.mean(axis=1)
+
+    # Lift do RPV diário médio e, com uma prior empírica (scripts.empirical_bayes), sua posterior
+    lift, erro_lift = lift_estimates(frame)
+    encolhido = shrink_lifts(lift, erro_lift, prior_lift) if prior_lift is not None else (None, None, None)
+
+    return BayesResult(
+        variantes=variantes, samples=samples, medias=medias, ci=ci,
+        prob_vs_controle=prob_vs_controle[1:], prob_melhor=prob_melhor, modo=modo,
+        densidades=densidade_analitica(posterior), modelo=familia,
+        lift=lift, erro_lift=erro_lift, prior_lift=prior_lift,
+        lift_encolhido=encolhido[0], erro_encolhido=encolhido[1], prob_lift_positivo=encolhido[2],
+    )
+
+def compute_bayes_scipy(frame, num_samples=10000, seed=42, modo="exato", prior_lift=None):
+    # Prior Beta(2, 2) sobre o RPV diário escalado
+    return compute_bayes(frame, "beta_escalada", num_samples=num_samples, seed=seed, modo=modo,
+                         prior_lift=prior_lift)
+
+def render_bayes(result, titulo):
+    """Página de resultado das análises bayesianas (BayesResult): gráfico, probabilidades e interpretação."""
+    variantes = result.variantes
+    controle, tratamentos = variantes[0], variantes[1:]
+    cores = paleta(len(variantes))
 
     # Reposicionamento dos dados ao lado dos gráficos
     col1, col2 = st.columns([2, 1])
     
     with col1:
         # Gráfico de distribuição
-        fig, ax = plt.subplots(figsize=(12, 6), dpi=150)
-        sns.kdeplot(samples_controle, label='Controle', color='#3498db', fill=True, alpha=0.6, linewidth=2)
-        sns.kdeplot(samples_nova, label='Nova', color='#2ecc71', fill=True, alpha=0.6, linewidth=2)
-        ax.axvline(np.percentile(samples_controle, 5), color='#3498db', linestyle='dashed', linewidth=1.5)
-        ax.axvline(np.percentile(samples_controle, 95), color='#3498db', linestyle='dashed', linewidth=1.5)
-        ax.axvline(np.percentile(samples_nova, 5), color='#2ecc71', linestyle='dashed', linewidth=1.5)
-        ax.axvline(np.percentile(samples_nova, 95), color='#2ecc71', linestyle='dashed', linewidth=1.5)
-        ax.set_title("Distribuição Bayesiana do RPV", fontweight='bold')
-        ax.set_xlabel("Receita por Visita (RPV)")
-        ax.set_ylabel("Densidade")
-        ax.legend(frameon=True, fancybox=True, shadow=True)
-        ax.grid(True, alpha=0.3)
-        plt.tight_layout()
-        st.pyplot(fig)
+        grafico_distribuicoes(
+            distribuicoes_analiticas(variantes, result.densidades, cores, cis=result.ci),
+            titulo,
+            "Receita por Visita (RPV)", "Densidade", estilo="kde",
+        )
     
     with col2:
         # Dados estatísticos
         st.markdown("### Resultados Bayesianos")
-        st.write(f"**RPV Controle:**")
-        st.write(f"Média = {np.mean(samples_controle):.4f}")
-        st.write(f"IC 90% = [{np.percentile(samples_controle, 5):.4f}, {np.percentile(samples_controle, 95):.4f}]")
-        
-        st.write(f"**RPV Nova:**")
-        st.write(f"Média = {np.mean(samples_nova):.4f}")
-        st.write(f"IC 90% = [{np.percentile(samples_nova, 5):.4f}, {np.percentile(samples_nova, 95):.4f}]")
+        for nome, media, ci in zip(variantes, result.medias, result.ci):
+            st.write(f"**RPV {nome}:**")
+            st.write(f"Média = {media:.4f}")
+            st.write(f"IC 90% = [{ci[0]:.4f}, {ci[1]:.4f}]")
         
         # Probabilidade e interpretação
         st.markdown("### Probabilidade")
-        st.metric("Nova > Controle", f"{prob_nova_melhor:.2%}")
+        for nome, prob in zip(tratamentos, result.prob_vs_controle):
+            st.metric(f"{nome} > {controle}", f"{prob:.2%}")
+        if len(variantes) > 2:
+            st.dataframe(pd.DataFrame({"variante": variantes, "P(melhor)": result.prob_melhor}),
+                         hide_index=True)
         
         # Interpretação do resultado
         st.markdown("### Interpretação")
-        if prob_nova_melhor > 0.95:
-            st.success("✅ Nova variante é superior (95% de certeza)")
-        elif prob_nova_melhor > 0.90:
-            st.success("✅ Nova variante é provavelmente superior (90% de certeza)")
-        elif prob_nova_melhor < 0.05:
-            st.error("❌ Nova variante é inferior (95% de certeza)")
-        elif prob_nova_melhor < 0.10:
-            st.error("❌ Nova variante é provavelmente inferior (90% de certeza)")
-        else:
-            st.warning("⚠️ Resultado inconclusivo")
+        for nome, prob_nova_melhor in zip(tratamentos, result.prob_vs_controle):
+            if prob_nova_melhor > 0.95:
+                st.success(f"✅ Variante {nome} é superior (95% de certeza)")
+            elif prob_nova_melhor > 0.90:
+                st.success(f"✅ Variante {nome} é provavelmente superior (90% de certeza)")
+            elif prob_nova_melhor < 0.05:
+                st.error(f"❌ Variante {nome} é inferior (95% de certeza)")
+            elif prob_nova_melhor < 0.10:
+                st.error(f"❌ Variante {nome} é provavelmente inferior (90% de certeza)")
+            else:
+                st.warning(f"⚠️ {nome}: resultado inconclusivo")
+
+    render_lift_encolhido(result)
+
+def render_bayes_scipy(result):
+    render_bayes(result, "Distribuição Bayesiana do RPV (Beta Escalada)")
+
+def render_lift_encolhido(result):
+    """Lift de cada tratamento antes e depois do encolhimento pela prior empírica."""
+    prior = result.prior_lift
+    if prior is None:
+        return
+    tratamentos = result.variantes[1:]
+    st.markdown("### Lift com prior empírica")
+    st.caption(f"Prior normal com média {prior.media:+.2f}% e desvio {prior.desvio:.2f}%, ajustada em "
+               f"{prior.lifts} lifts de experimentos anteriores · {METODOS_PRIOR[prior.metodo]}. Lifts ruidosos são puxados "
+               f"para a média histórica; os bem medidos quase não mudam.")
+    for j, nome in enumerate(tratamentos):
+        media, desvio, prob = result.lift_encolhido[j], result.erro_encolhido[j], result.prob_lift_positivo[j]
+        col1, col2, col3 = st.columns(3)
+        col1.metric(f"Lift observado {nome}", f"{result.lift[j]:+.2f}%",
+                    help=f"Erro padrão: {result.erro_lift[j]:.2f}%")
+        col2.metric("Lift com a prior", f"{media:+.2f}%",
+                    help=f"IC 90%: [{media - 1.645 * desvio:+.2f}%, {media + 1.645 * desvio:+.2f}%]")
+        col3.metric("P(lift > 0)", f"{prob:.2%}" if np.isfinite(prob) else "—")
+        if prob > 0.95:
+            st.success(f"✅ {nome}: lift positivo com 95% de certeza, considerando o histórico")
+        elif prob < 0.05:
+            st.error(f"❌ {nome}: lift negativo com 95% de certeza, considerando o histórico")
+
+def run_bayes_scipy(df, num_samples=10000, seed=42, modo="exato", prior_lift=None):
+    frame = as_experiment_frame(df)
+    result = background_analysis(compute_bayes_scipy, frame, num_samples=num_samples, seed=seed, modo=modo,
+                                 prior_lift=prior_lift)
+    if result is not None:
+        render_bayes_scipy(result)
@@ -1,111 +1,185 @@
-# scripts/__init__.py (arquivo vazio apenas para reconhecer como pacote Python)
-
 # scripts/run_bootstrap.py
-import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
+import pandas as pd
 import streamlit as st
+from scripts.cache import background_analysis
+from scripts.plotting import distribuicoes, grafico_distribuicoes, paleta
+from scripts.preprocessing import as_experiment_frame, prepare_rows
+from scripts.resampling import parallel_bootstrap_matrix, streaming_bootstrap_means
+from scripts.results import BootstrapResult
+from scripts.streaming import TAMANHO_BLOCO_LINHAS, iter_blocks
+
+# Títulos dos gráficos por nível de reamostragem
+NIVEIS = {"diario": "RPV Diário", "sessao": "RPV por Sessão"}
+
+def _resultado(variantes, rpv, medias, boot, nivel):
+    num_samples = boot.shape[1]
+    ci = np.percentile(boot, [5, 95], axis=1).T
+
+    # Todas as comparações contra o controle em uma única operação
+    diff_boot = boot[1:] - boot[0]
+    ci_diff = np.percentile(diff_boot, [5, 95], axis=1).T
+    p_value = (diff_boot < 0).mean(axis=1)
+
+    lift = (medias[1:] / medias[0] - 1) * 100
 
-def run_bootstrap(df):
-    df["data"] = pd.to_datetime(df["data"])
-    df["rpv"] = df["receita"] / df["sessoes"]
-    rpv_diario = df.groupby(["data", "variante"]).agg({"rpv": "mean"}).reset_index()
+    # P(melhor): frequência com que cada variante tem a maior média reamostrada
+    prob_melhor = np.bincount(boot.argmax(axis=0), minlength=len(variantes)) / num_samples
 
-    controle = rpv_diario[rpv_diario["variante"] == "Controle"]["rpv"].values
-    nova = rpv_diario[rpv_diario["variante"] == "Nova"]["rpv"].values
+    return BootstrapResult(
+        variantes=variantes, rpv=rpv, medias=medias,
+        boot=boot, ci=ci, diff_boot=diff_boot, ci_diff=ci_diff,
+        p_value=p_value, lift=lift, prob_melhor=prob_melhor, nivel=nivel,
+    )
 
-    def bootstrap(data, num_samples=10000):
-        boot_means = [np.mean(np.random.choice(data, size=len(data), replace=True)) for _ in range(num_samples)]
-        return np.percentile(boot_means, [5, 95]), np.array(boot_means)
+def compute_bootstrap(frame, num_samples=10000, seed=42, method="indices", n_workers=1):
+    # Controle na linha 0; cada variante recebe seu próprio stream de sementes, então os
+    # resultados são reprodutíveis entre reruns, benchmarks e qualquer número de processos
+    variantes = frame.ordem_variantes
+    rpv = tuple(frame.rpv_diario(v) for v in variantes)
 
-    ci_controle, boot_controle = bootstrap(controle)
-    ci_nova, boot_nova = bootstrap(nova)
+    # Matriz (variantes x amostras) com as médias reamostradas
+    boot = parallel_bootstrap_matrix(rpv, num_samples=num_samples, seed=seed,
+                                     method=method, n_workers=n_workers)
+    medias = np.array([np.mean(x) for x in rpv])
+    return _resultado(variantes, rpv, medias, boot, "diario")
 
-    diff_boot = boot_nova - boot_controle
-    ci_diff = np.percentile(diff_boot, [5, 95])
-    p_value = (diff_boot < 0).mean()
+def _blocos_de_linhas(frame, fonte, variantes):
+    # Linhas brutas em blocos: do frame em memória ou relidas do arquivo original
+    if frame.raw is not None:
+        blocos = (frame.raw.iloc[inicio:inicio + TAMANHO_BLOCO_LINHAS]
+                  for inicio in range(0, len(frame.raw), TAMANHO_BLOCO_LINHAS))
+    else:
+        # Arquivo relido: aplica as dimensões do frame e os filtros da fatia
+        blocos = (prepare_rows(bloco, frame.dimensoes) for bloco in iter_blocks(fonte))
+        if frame.filtros:
+            blocos = (bloco[np.logical_and.reduce([(bloco[d] == v).to_numpy() for d, v in frame.filtros])]
+                      for bloco in blocos)
+    for bloco in blocos:
+        codigos = pd.Categorical(bloco["variante"].astype(str), categories=variantes).codes
+        yield codigos, bloco["rpv"].to_numpy(dtype=float)
+
+def compute_session_bootstrap(frame, num_samples=1000, seed=42, pesos="poisson", n_workers=1, fonte=None):
+    """
+    Bootstrap no nível da linha (sessão/usuário): pesos Poisson(1) ou de Dirichlet
+    sorteados por bloco de linhas e acumulados em uma única passada, sem
+    materializar as reamostragens. Sem as linhas no frame (leitura em blocos),
+    `fonte` é o arquivo original, relido bloco a bloco.
+    """
+    if frame.raw is None and fonte is None:
+        raise ValueError("O bootstrap por sessão precisa das linhas brutas: envie o arquivo novamente")
+
+    variantes = frame.ordem_variantes
+    boot = streaming_bootstrap_means(_blocos_de_linhas(frame, fonte, variantes), len(variantes),
+                                     num_samples=num_samples, seed=seed, pesos=pesos, n_workers=n_workers,
+                                     total_linhas=int(frame.daily["linhas"].sum()))
+
+    # Média observada do RPV por linha, direto das estatísticas diárias
+    totais = frame.daily.groupby("variante", observed=True)[["rpv_soma", "linhas"]].sum()
+    totais.index = totais.index.astype(str)
+    totais = totais.loc[list(variantes)]
+    medias = (totais["rpv_soma"] / totais["linhas"]).to_numpy()
+    return _resultado(variantes, tuple(frame.rpv_diario(v) for v in variantes), medias, boot, "sessao")
+
+def render_bootstrap(result):
+    variantes = result.variantes
+    controle, tratamentos = variantes[0], variantes[1:]
+    cores = paleta(len(variantes))
+    metrica = NIVEIS[result.nivel]
 
     # Reposicionamento dos dados ao lado dos gráficos
     col1, col2 = st.columns([2, 1])
-    
+
     with col1:
         # Gráfico de distribuição
-        fig, ax = plt.subplots(figsize=(12, 6), dpi=150)
-        sns.histplot(boot_controle, bins=50, color='#3498db', alpha=0.6, label='Controle', kde=True)
-        sns.histplot(boot_nova, bins=50, color='#2ecc71', alpha=0.6, label='Nova', kde=True)
-        ax.axvline(ci_controle[0], color='#3498db', linestyle='dashed', linewidth=1.5)
-        ax.axvline(ci_controle[1], color='#3498db', linestyle='dashed', linewidth=1.5)
-        ax.axvline(ci_nova[0], color='#2ecc71', linestyle='dashed', linewidth=1.5)
-        ax.axvline(ci_nova[1], color='#2ecc71', linestyle='dashed', linewidth=1.5)
-        ax.legend(frameon=True, fancybox=True, shadow=True)
-        ax.set_title("Distribuição do RPV Diário com Intervalos de Confiança", fontweight='bold')
-        ax.set_xlabel("Receita por Visita (RPV)")
-        ax.set_ylabel("Frequência")
-        ax.grid(True, alpha=0.3)
-        plt.tight_layout()
-        st.pyplot(fig)
-    
+        grafico_distribuicoes(
+            distribuicoes(variantes, result.boot, cores, cis=result.ci),
+            f"Distribuição do {metrica} com Intervalos de Confiança",
+            "Receita por Visita (RPV)", "Frequência",
+        )
+
     with col2:
         # Dados estatísticos
         st.markdown("### Resultados Estatísticos")
-        st.write(f"**RPV Controle:**")
-        st.write(f"Média = {np.mean(controle):.4f}")
-        st.write(f"IC 90% = [{ci_controle[0]:.4f}, {ci_controle[1]:.4f}]")
-        
-        st.write(f"**RPV Nova:**")
-        st.write(f"Média = {np.mean(nova):.4f}")
-        st.write(f"IC 90% = [{ci_nova[0]:.4f}, {ci_nova[1]:.4f}]")
-        
-        st.write(f"**Diferença:**")
-        st.write(f"Média = {np.mean(diff_boot):.4f}")
-        st.write(f"IC 90% = [{ci_diff[0]:.4f}, {ci_diff[1]:.4f}]")
-        
-        st.write(f"**p-valor** (Nova pior ou igual ao Controle): {p_value:.4f}")
-        
-        # Interpretação do resultado
-        if ci_diff[0] > 0:
-            st.success("✅ Nova variante é estatisticamente superior (90% de confiança)")
-        elif ci_diff[1] < 0:
-            st.error("❌ Nova variante é estatisticamente inferior (90% de confiança)")
-        else:
-            st.warning("⚠️ Resultado inconclusivo (90% de confiança)")
+        for nome, media, ci in zip(variantes, result.medias, result.ci):
+            st.write(f"**RPV {nome}:**")
+            st.write(f"Média = {media:.4f}")
+            st.write(f"IC 90% = [{ci[0]:.4f}, {ci[1]:.4f}]")
+
+        for nome, diff, ci_diff, p_value in zip(tratamentos, result.diff_boot, result.ci_diff, result.p_value):
+            st.write(f"**Diferença ({nome} - {controle}):**")
+            st.write(f"Média = {np.mean(diff):.4f}")
+            st.write(f"IC 90% = [{ci_diff[0]:.4f}, {ci_diff[1]:.4f}]")
+
+            st.write(f"**p-valor** ({nome} pior ou igual ao {controle}): {p_value:.4f}")
+
+            # Interpretação do resultado
+            if ci_diff[0] > 0:
+                st.success(f"✅ Variante {nome} é estatisticamente superior (90% de confiança)")
+            elif ci_diff[1] < 0:
+                st.error(f"❌ Variante {nome} é estatisticamente inferior (90% de confiança)")
+            else:
+                st.warning(f"⚠️ {nome}: resultado inconclusivo (90% de confiança)")
 
     # Segundo gráfico (diferença) com dados ao lado
     col3, col4 = st.columns([2, 1])
-    
+
     with col3:
-        fig2, ax2 = plt.subplots(figsize=(10, 5), dpi=150)
-        sns.histplot(diff_boot, bins=50, color='#9b59b6', alpha=0.7, kde=True)
-        ax2.axvline(ci_diff[0], color='#e74c3c', linestyle='dashed', linewidth=1.5)
-        ax2.axvline(ci_diff[1], color='#e74c3c', linestyle='dashed', linewidth=1.5)
-        ax2.axvline(0, color='black', linestyle='solid', linewidth=1.5)
-        ax2.set_title("Diferença entre Nova e Controle (RPV Diário)", fontweight='bold')
-        ax2.set_xlabel("Diferença de RPV")
-        ax2.set_ylabel("Frequência")
-        ax2.grid(True, alpha=0.3)
-        plt.tight_layout()
-        st.pyplot(fig2)
-    
+        # Teste A/B simples mantém as cores originais; com várias variantes, uma cor por variante
+        multiplas = len(tratamentos) > 1
+        cores_diff = cores[1:] if multiplas else ['#9b59b6']
+        cores_ic = cores[1:] if multiplas else ['#e74c3c']
+
+        grafico_distribuicoes(
+            distribuicoes([f"{nome} - {controle}" for nome in tratamentos], result.diff_boot,
+                          cores_diff, cis=result.ci_diff, cores_ci=cores_ic),
+            f"Diferença entre Variantes e {controle} ({metrica})",
+            "Diferença de RPV", "Frequência",
+            referencia=0, legenda=multiplas, figsize=(10, 5), alpha=0.7,
+        )
+
     with col4:
         # Interpretação da diferença
         st.markdown("### Interpretação da Diferença")
-        
-        lift = (np.mean(nova) / np.mean(controle) - 1) * 100
-        st.metric("Lift", f"{lift:.2f}%", delta=f"{lift:.2f}%")
-        
-        if p_value < 0.05:
-            st.success(f"Probabilidade da Nova ser melhor: {(1-p_value)*100:.1f}%")
-        elif p_value < 0.1:
-            st.warning(f"Probabilidade da Nova ser melhor: {(1-p_value)*100:.1f}%")
-        else:
-            st.error(f"Probabilidade da Nova ser melhor: {(1-p_value)*100:.1f}%")
-        
-        # Recomendação
+
+        for nome, lift, p_value in zip(tratamentos, result.lift, result.p_value):
+            st.metric(f"Lift {nome}", f"{lift:.2f}%", delta=f"{lift:.2f}%")
+
+            if p_value < 0.05:
+                st.success(f"Probabilidade da {nome} ser melhor: {(1-p_value)*100:.1f}%")
+            elif p_value < 0.1:
+                st.warning(f"Probabilidade da {nome} ser melhor: {(1-p_value)*100:.1f}%")
+            else:
+                st.error(f"Probabilidade da {nome} ser melhor: {(1-p_value)*100:.1f}%")
+
+        if len(variantes) > 2:
+            st.markdown("### Probabilidade de ser a Melhor")
+            st.dataframe(pd.DataFrame({"variante": variantes, "P(melhor)": result.prob_melhor}),
+                         hide_index=True)
+
+        # Recomendação: a variante com menor p-valor contra o controle
         st.markdown("### Recomendação")
+        melhor = int(np.argmin(result.p_value))
+        p_value = result.p_value[melhor]
         if p_value < 0.05:
-            st.success("Implementar a Nova variante")
+            st.success(f"Implementar a variante {tratamentos[melhor]}")
         elif p_value < 0.1:
             st.warning("Considerar mais testes")
         else:
-            st.error("Manter a variante Controle")
+            st.error(f"Manter a variante {controle}")
+
+def run_bootstrap(df, num_samples=10000, seed=42, method="indices", n_workers=1,
+                  nivel="diario", pesos="poisson", fonte=None):
+    frame = as_experiment_frame(df)
+    # Memoizado por (dados, parâmetros, semente); o número de processos não altera o resultado.
+    # Roda em segundo plano, com progresso por bloco de reamostragens e botão de cancelar
+    if nivel == "sessao":
+        # A fonte é o próprio arquivo do frame (mesmo hash), então fica fora da chave
+        result = background_analysis(compute_session_bootstrap, frame,
+                                     execucao={"n_workers": n_workers, "fonte": fonte},
+                                     num_samples=num_samples, seed=seed, pesos=pesos)
+    else:
+        result = background_analysis(compute_bootstrap, frame, execucao={"n_workers": n_workers},
+                                     num_samples=num_samples, seed=seed, method=method)
+    if result is not None:
+        render_bootstrap(result)
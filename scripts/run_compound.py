@@ -0,0 +1,101 @@
+# scripts/run_compound.py
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scripts.bayes_exact import compare_samples
+from scripts.cache import background_analysis
+from scripts.compound import (MODELOS_VALOR, PRECISAO_PADRAO, adaptive_samples, compound_totals,
+                              posterior_conversao, posterior_valor)
+from scripts.plotting import distribuicoes, grafico_distribuicoes, paleta
+from scripts.preprocessing import as_experiment_frame
+from scripts.results import CompoundResult
+
+def _intervalo(amostras):
+    return np.percentile(amostras, [5, 95], axis=1).T
+
+def compute_compound(frame, modelo_valor="lognormal", precisao=PRECISAO_PADRAO, seed=42):
+    """
+    RPV de cada variante como conversão x valor do pedido:
+    - Posterior Beta da conversão e conjugada do valor do pedido, a partir das somas por variante
+    - Amostras conjuntas em lotes, até o erro de Monte Carlo atingir `precisao`
+    """
+    variantes = frame.ordem_variantes
+    totais = compound_totals(frame)
+    conversao, valor = posterior_conversao(totais), posterior_valor(totais, modelo_valor)
+    taxa, valor_medio, rpv, erro = adaptive_samples(conversao, valor, modelo_valor, precisao, seed=seed)
+
+    prob_vs_controle, prob_melhor = compare_samples(rpv)
+    lift = (rpv[1:] / rpv[0] - 1) * 100
+    return CompoundResult(
+        variantes=variantes, samples=rpv, medias=rpv.mean(axis=1), ci=_intervalo(rpv),
+        conversao=taxa.mean(axis=1), ci_conversao=_intervalo(taxa),
+        valor_pedido=valor_medio.mean(axis=1), ci_valor_pedido=_intervalo(valor_medio),
+        lift=lift.mean(axis=1), ci_lift=_intervalo(lift),
+        prob_vs_controle=prob_vs_controle[1:], prob_melhor=prob_melhor,
+        modelo_valor=modelo_valor, precisao=precisao, erro_mc=erro,
+    )
+
+def render_compound(result):
+    variantes = result.variantes
+    controle, tratamentos = variantes[0], variantes[1:]
+    cores = paleta(len(variantes))
+
+    st.caption(f"Valor do pedido: {MODELOS_VALOR[result.modelo_valor]} · {result.num_amostras:,} amostras "
+               f"da posterior conjunta · erro de Monte Carlo {result.erro_mc:.4f} (alvo {result.precisao:.4f})")
+
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
+        grafico_distribuicoes(
+            distribuicoes(variantes, result.samples, cores, cis=result.ci, corte=3),
+            "Distribuição Bayesiana do RPV (Conversão × Valor do Pedido)",
+            "Receita por Visita (RPV)", "Densidade", estilo="kde",
+        )
+
+    with col2:
+        st.markdown("### Resultados Bayesianos")
+        for nome, media, ci in zip(variantes, result.medias, result.ci):
+            st.write(f"**RPV {nome}:**")
+            st.write(f"Média = {media:.4f}")
+            st.write(f"IC 90% = [{ci[0]:.4f}, {ci[1]:.4f}]")
+
+        st.markdown("### Probabilidade")
+        for nome, prob, lift in zip(tratamentos, result.prob_vs_controle, result.lift):
+            st.metric(f"{nome} > {controle}", f"{prob:.2%}", delta=f"{lift:+.2f}% RPV")
+        if len(variantes) > 2:
+            st.dataframe(pd.DataFrame({"variante": variantes, "P(melhor)": result.prob_melhor}),
+                         hide_index=True)
+
+        st.markdown("### Interpretação")
+        for nome, prob_nova_melhor in zip(tratamentos, result.prob_vs_controle):
+            if prob_nova_melhor > 0.95:
+                st.success(f"✅ Variante {nome} é superior (95% de certeza)")
+            elif prob_nova_melhor > 0.90:
+                st.success(f"✅ Variante {nome} é provavelmente superior (90% de certeza)")
+            elif prob_nova_melhor < 0.05:
+                st.error(f"❌ Variante {nome} é inferior (95% de certeza)")
+            elif prob_nova_melhor < 0.10:
+                st.error(f"❌ Variante {nome} é provavelmente inferior (90% de certeza)")
+            else:
+                st.warning(f"⚠️ {nome}: resultado inconclusivo")
+
+    # De onde vem a diferença: conversão ou valor do pedido
+    st.markdown("### Conversão e valor do pedido")
+    st.dataframe(pd.DataFrame({
+        "variante": variantes,
+        "conversão": [f"{c:.2%} [{i[0]:.2%}, {i[1]:.2%}]" for c, i in zip(result.conversao, result.ci_conversao)],
+        "valor do pedido": [f"{v:.2f} [{i[0]:.2f}, {i[1]:.2f}]"
+                            for v, i in zip(result.valor_pedido, result.ci_valor_pedido)],
+        "lift do RPV": ["—"] + [f"{l:+.2f}% [{i[0]:+.2f}%, {i[1]:+.2f}%]" for l, i in zip(result.lift, result.ci_lift)],
+    }), hide_index=True)
+
+def run_compound(df, modelo_valor="lognormal", precisao=PRECISAO_PADRAO, seed=42):
+    frame = as_experiment_frame(df)
+    try:
+        compound_totals(frame)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return
+    result = background_analysis(compute_compound, frame, modelo_valor=modelo_valor, precisao=precisao, seed=seed)
+    if result is not None:
+        render_compound(result)
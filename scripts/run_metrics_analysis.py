@@ -1,191 +1,288 @@
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 import streamlit as st
+from scripts.cache import background_analysis
+from scripts.plotting import exibir_figura, hash_conteudo, paleta
+from scripts.preprocessing import as_experiment_frame
+from scripts.results import MetricsResult
+from scripts.srm import expected_allocation, srm_cells, srm_chi2
 
-def run_metrics_analysis(data):
+def compute_metrics_analysis(frame, alocacao=None):
     """
-    Executa análise de métricas básicas:
+    Calcula as métricas básicas a partir das estatísticas diárias do frame:
     - Receita por Sessão (RPS)
     - Receita Total por Variante
     - Sessões Totais por Variante
     - Conversão implícita (se receita > 0 for conversão)
-    - Sample Ratio Mismatch (SRM)
+    - Sample Ratio Mismatch (SRM) no total, por dia e por segmento, contra a
+      `alocacao` planejada (pesos por variante na ordem de `ordem_variantes`)
+    Todas as variantes são comparadas contra o controle.
     """
+    variantes = frame.ordem_variantes
+    totais = frame.totais().set_index('variante').loc[list(variantes)].reset_index()
+
+    # Contagem de sessões por variante
+    variant_counts = totais['sessoes_total'].to_numpy()
+
+    # Alocação planejada do tráfego (divisão igual se não informada)
+    expected_ratio = expected_allocation(alocacao, len(variantes))
+    observed_ratio = variant_counts / variant_counts.sum()
+
+    # Teste qui-quadrado de aderência no total e em cada dia/segmento, em uma operação vetorizada
+    p_value = srm_chi2(variant_counts, expected_ratio)[1][0]
+    srm_celulas = srm_cells(frame, expected_ratio)
+
+    # Calcular métricas por variante
+    metrics = totais[['variante', 'receita_total', 'sessoes_total']].copy()
+
+    # Calcular RPS (Receita por Sessão)
+    metrics['rps'] = metrics['receita_total'] / metrics['sessoes_total']
+
+    # Calcular conversão implícita (se receita > 0)
+    conv_metrics = totais[['variante', 'conversoes', 'sessoes_total']].copy()
+    conv_metrics['taxa_conversao'] = (conv_metrics['conversoes'] / conv_metrics['sessoes_total']) * 100
+
+    # Diferença percentual de cada variante contra o controle (linha 0), em uma operação por métrica
+    def diff_pct(valores):
+        valores = valores.to_numpy()
+        return (valores[1:] / valores[0] - 1) * 100
+
+    comparacao = pd.DataFrame({
+        'variante': list(variantes[1:]),
+        'rps_diff': diff_pct(metrics['rps']),
+        'receita_diff': diff_pct(metrics['receita_total']),
+        'sessoes_diff': diff_pct(metrics['sessoes_total']),
+        'conv_diff': diff_pct(conv_metrics['taxa_conversao']),
+    })
+
+    # Calcular métricas diárias
+    daily_metrics = frame.daily[['data', 'variante', 'receita', 'sessoes']].rename(
+        columns={'receita': 'receita_diaria', 'sessoes': 'sessoes_diarias'}
+    )
+    daily_metrics['rps_diario'] = daily_metrics['receita_diaria'] / daily_metrics['sessoes_diarias']
+
+    return MetricsResult(
+        variantes=variantes,
+        srm_expected=expected_ratio,
+        srm_observed=observed_ratio,
+        srm_p_value=float(p_value),
+        metrics=metrics,
+        conv_metrics=conv_metrics,
+        daily_metrics=daily_metrics,
+        comparacao=comparacao,
+        srm_celulas=srm_celulas,
+    )
+
+def _grafico_barras(df, coluna, cores, titulo, ylabel):
+    def desenhar():
+        fig, ax = plt.subplots(figsize=(10, 6))
+        sns.barplot(x='variante', y=coluna, hue='variante', data=df, palette=cores, legend=False, ax=ax)
+        ax.set_title(titulo)
+        ax.set_ylabel(ylabel)
+        ax.set_xlabel('Variante')
+        return fig
+
+    def desenhar_plotly():
+        import plotly.graph_objects as go
+        fig = go.Figure(go.Bar(x=df['variante'].astype(str), y=df[coluna], marker_color=cores[:len(df)]))
+        return fig.update_layout(title=titulo, xaxis_title='Variante', yaxis_title=ylabel, template='plotly_white')
+
+    exibir_figura(hash_conteudo(df['variante'].astype(str), df[coluna], cores, titulo), desenhar, desenhar_plotly)
+
+def _srm_celulas(result, cores):
+    celulas = result.srm_celulas
+    if celulas is None:
+        return
+    variantes = list(result.variantes)
+    st.markdown("#### SRM por dia e por segmento")
+
+    quebradas = celulas[celulas['srm']].sort_values('p_value')
+    nao_testaveis = int((~celulas['testavel']).sum())
+    if quebradas.empty:
+        st.success(f"✅ Nenhum dos {len(celulas)} dias/segmentos quebra a alocação planejada "
+                   "(correção de Benjamini-Hochberg, q < 0.05).")
+    else:
+        rotulos = ", ".join(f"{linha.dimensao} = {linha.celula}" for linha in quebradas.head(10).itertuples())
+        st.error(f"⚠️ {len(quebradas)} de {len(celulas)} dias/segmentos quebram a alocação planejada: {rotulos}"
+                 + (" ..." if len(quebradas) > 10 else ""))
+        st.dataframe(quebradas, hide_index=True)
+    if nao_testaveis:
+        st.caption(f"{nao_testaveis} células com contagens pequenas demais para o teste qui-quadrado foram ignoradas.")
+
+    # Proporção diária de cada variante contra a alocação esperada; dias com SRM destacados
+    diario = celulas[celulas['dimensao'] == 'data']
+    datas = pd.to_datetime(diario['celula'])
+    titulo = 'Proporção Diária do Tráfego por Variante'
+
+    def desenhar():
+        fig, ax = plt.subplots(figsize=(12, 5))
+        for nome, cor, esperado in zip(variantes, cores, result.srm_expected):
+            ax.plot(datas, diario[f'proporcao_{nome}'], marker='o', color=cor, label=nome)
+            ax.axhline(esperado, color=cor, linestyle='dashed', linewidth=1)
+        for data in datas[diario['srm'].to_numpy()]:
+            ax.axvline(data, color='#e74c3c', alpha=0.3, linewidth=6)
+        ax.set_title(titulo)
+        ax.set_ylabel('Proporção das sessões')
+        ax.set_xlabel('Data')
+        ax.legend()
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+        return fig
+
+    def desenhar_plotly():
+        import plotly.graph_objects as go
+        fig = go.Figure()
+        for nome, cor, esperado in zip(variantes, cores, result.srm_expected):
+            fig.add_scatter(x=datas, y=diario[f'proporcao_{nome}'], mode='lines+markers', line_color=cor, name=nome)
+            fig.add_hline(y=esperado, line_color=cor, line_dash='dash')
+        for data in datas[diario['srm'].to_numpy()]:
+            fig.add_vline(x=data, line_color='#e74c3c', opacity=0.3, line_width=6)
+        return fig.update_layout(title=titulo, xaxis_title='Data', yaxis_title='Proporção das sessões',
+                                 template='plotly_white')
+
+    exibir_figura(hash_conteudo(diario, result.srm_expected, cores, 'srm'), desenhar, desenhar_plotly)
+
+def render_metrics_analysis(result):
+    """Exibe as métricas básicas calculadas por `compute_metrics_analysis`."""
     # Configuração de estilo para os gráficos
     plt.style.use('seaborn-v0_8-whitegrid')
-    
-    # Verificar se os dados contêm as colunas necessárias
-    required_columns = ['data', 'variante', 'receita', 'sessoes']
-    if not all(col in data.columns for col in required_columns):
-        st.error("Dados não contêm todas as colunas necessárias: data, variante, receita, sessoes")
-        return
-    
+
+    variantes = result.variantes
+    controle = variantes[0]
+    metrics, conv_metrics, daily_metrics = result.metrics, result.conv_metrics, result.daily_metrics
+    cores = paleta(len(variantes), base=['#1E88E5', '#00e13a'])
+
     # Calcular Sample Ratio Mismatch (SRM)
     st.subheader("🔄 Sample Ratio Mismatch (SRM)")
-    
-    # Contagem de sessões por variante
-    variant_counts = data.groupby('variante')['sessoes'].sum()
-    
-    # Verificar se temos exatamente duas variantes
-    if len(variant_counts) == 2:
-        variants = variant_counts.index.tolist()
-        expected_ratio = 0.5  # Esperamos uma divisão 50/50 entre controle e variante
-        
-        # Calcular proporção observada
-        total_sessions = variant_counts.sum()
-        observed_ratio = variant_counts[variants[1]] / total_sessions
-        
-        # Calcular p-valor para o teste binomial
-        from scipy import stats
-        try:
-            # Para versões mais recentes do SciPy
-            p_value = stats.binomtest(
-                k=int(variant_counts[variants[1]]), 
-                n=int(total_sessions), 
-                p=expected_ratio
-            ).pvalue
-        except AttributeError:
-            # Fallback para versões mais antigas do SciPy
-            p_value = stats.binom_test(
-                int(variant_counts[variants[1]]), 
-                n=int(total_sessions), 
-                p=expected_ratio
-            )
-        
-        # Exibir resultados
-        col1, col2 = st.columns(2)
-        
-        with col1:
+
+    p_value = result.srm_p_value
+
+    # Exibir resultados
+    col1, col2 = st.columns(2)
+
+    with col1:
+        if len(variantes) == 2:
+            expected_ratio = result.srm_expected[1]
+            observed_ratio = result.srm_observed[1]
             st.metric("Proporção Esperada", f"{expected_ratio:.1%}")
             st.metric("Proporção Observada", f"{observed_ratio:.1%}")
             st.metric("Diferença", f"{(observed_ratio - expected_ratio) * 100:.2f}pp")
-        
-        with col2:
-            st.metric("P-valor", f"{p_value:.4f}")
-            
-            # Interpretação do SRM
-            if p_value < 0.05:
-                st.error("⚠️ **SRM Detectado!** A distribuição de tráfego entre as variantes não é aleatória (p < 0.05).")
-                st.warning("Os resultados do teste podem estar comprometidos devido à alocação desigual de tráfego.")
-            else:
-                st.success("✅ **SRM Não Detectado.** A distribuição de tráfego entre as variantes parece aleatória (p ≥ 0.05).")
-                st.info("A alocação de tráfego está dentro do esperado para um teste A/B válido.")
-    else:
-        st.warning("O cálculo de SRM requer exatamente duas variantes (Controle e Variante).")
-    
+        else:
+            st.dataframe(pd.DataFrame({
+                'variante': variantes,
+                'proporcao_esperada': result.srm_expected,
+                'proporcao_observada': result.srm_observed,
+                'diferenca_pp': (result.srm_observed - result.srm_expected) * 100,
+            }), hide_index=True)
+
+    with col2:
+        st.metric("P-valor", f"{p_value:.4f}")
+
+        # Interpretação do SRM
+        if p_value < 0.05:
+            st.error("⚠️ **SRM Detectado!** A distribuição de tráfego entre as variantes não é aleatória (p < 0.05).")
+            st.warning("Os resultados do teste podem estar comprometidos devido à alocação desigual de tráfego.")
+        else:
+            st.success("✅ **SRM Não Detectado.** A distribuição de tráfego entre as variantes parece aleatória (p ≥ 0.05).")
+            st.info("A alocação de tráfego está dentro do esperado para um teste A/B válido.")
+
+    _srm_celulas(result, cores)
+
     st.markdown("---")
-    
-    # Calcular métricas por variante
-    metrics = data.groupby('variante').agg(
-        receita_total=('receita', 'sum'),
-        sessoes_total=('sessoes', 'sum')
-    ).reset_index()
-    
-    # Calcular RPS (Receita por Sessão)
-    metrics['rps'] = metrics['receita_total'] / metrics['sessoes_total']
-    
-    # Calcular conversão implícita (se receita > 0)
-    conversao = data.copy()
-    conversao['converteu'] = (conversao['receita'] > 0).astype(int)
-    conv_metrics = conversao.groupby('variante').agg(
-        conversoes=('converteu', 'sum'),
-        sessoes_total=('sessoes', 'sum')
-    ).reset_index()
-    conv_metrics['taxa_conversao'] = (conv_metrics['conversoes'] / conv_metrics['sessoes_total']) * 100
-    
+
     # Exibir métricas em tabelas
     col1, col2 = st.columns(2)
-    
+
+    # Com mais de duas variantes, cada mensagem indica a qual variante se refere
+    def sufixo(nome):
+        return f" ({nome} vs {controle})" if len(variantes) > 2 else ""
+
     with col1:
         st.subheader("📊 Métricas Gerais")
         st.dataframe(metrics)
-        
-        # Calcular diferença percentual entre variantes
-        if len(metrics) == 2:
-            control = metrics[metrics['variante'] == 'Controle']
-            variant = metrics[metrics['variante'] != 'Controle']
-            
-            if not control.empty and not variant.empty:
-                rps_diff = ((variant['rps'].values[0] / control['rps'].values[0]) - 1) * 100
-                receita_diff = ((variant['receita_total'].values[0] / control['receita_total'].values[0]) - 1) * 100
-                sessoes_diff = ((variant['sessoes_total'].values[0] / control['sessoes_total'].values[0]) - 1) * 100
-                
-                st.info(f"Diferença na RPS: {rps_diff:.2f}%")
-                st.info(f"Diferença na Receita Total: {receita_diff:.2f}%")
-                st.info(f"Diferença nas Sessões: {sessoes_diff:.2f}%")
-    
+
+        for linha in result.comparacao.itertuples():
+            st.info(f"Diferença na RPS{sufixo(linha.variante)}: {linha.rps_diff:.2f}%")
+            st.info(f"Diferença na Receita Total{sufixo(linha.variante)}: {linha.receita_diff:.2f}%")
+            st.info(f"Diferença nas Sessões{sufixo(linha.variante)}: {linha.sessoes_diff:.2f}%")
+
     with col2:
         st.subheader("🔄 Taxas de Conversão")
         st.dataframe(conv_metrics[['variante', 'conversoes', 'taxa_conversao']])
-        
-        # Calcular diferença percentual na conversão
-        if len(conv_metrics) == 2:
-            control = conv_metrics[conv_metrics['variante'] == 'Controle']
-            variant = conv_metrics[conv_metrics['variante'] != 'Controle']
-            
-            if not control.empty and not variant.empty:
-                conv_diff = ((variant['taxa_conversao'].values[0] / control['taxa_conversao'].values[0]) - 1) * 100
-                st.info(f"Diferença na Taxa de Conversão: {conv_diff:.2f}%")
-    
+
+        for linha in result.comparacao.itertuples():
+            st.info(f"Diferença na Taxa de Conversão{sufixo(linha.variante)}: {linha.conv_diff:.2f}%")
+
     # Visualizações
     st.subheader("📈 Visualizações")
-    
-    # Gráfico de barras para RPS
-    fig1, ax1 = plt.subplots(figsize=(10, 6))
-    sns.barplot(x='variante', y='rps', data=metrics, palette=['#1E88E5', '#00e13a'], ax=ax1)
-    ax1.set_title('Receita por Sessão (RPS) por Variante')
-    ax1.set_ylabel('RPS')
-    ax1.set_xlabel('Variante')
-    st.pyplot(fig1)
-    
-    # Gráfico de barras para taxa de conversão
-    fig2, ax2 = plt.subplots(figsize=(10, 6))
-    sns.barplot(x='variante', y='taxa_conversao', data=conv_metrics, palette=['#1E88E5', '#00e13a'], ax=ax2)
-    ax2.set_title('Taxa de Conversão por Variante (%)')
-    ax2.set_ylabel('Taxa de Conversão (%)')
-    ax2.set_xlabel('Variante')
-    st.pyplot(fig2)
-    
+
+    # Gráficos de barras para RPS e taxa de conversão
+    _grafico_barras(metrics, 'rps', cores, 'Receita por Sessão (RPS) por Variante', 'RPS')
+    _grafico_barras(conv_metrics, 'taxa_conversao', cores, 'Taxa de Conversão por Variante (%)',
+                    'Taxa de Conversão (%)')
+
     # Análise diária
     st.subheader("📅 Análise Diária")
-    
-    # Calcular métricas diárias
-    daily_metrics = data.groupby(['data', 'variante']).agg(
-        receita_diaria=('receita', 'sum'),
-        sessoes_diarias=('sessoes', 'sum')
-    ).reset_index()
-    daily_metrics['rps_diario'] = daily_metrics['receita_diaria'] / daily_metrics['sessoes_diarias']
-    
+
     # Gráfico de linha para RPS diário
-    fig5, ax5 = plt.subplots(figsize=(12, 6))
-    for variante, grupo in daily_metrics.groupby('variante'):
-        ax5.plot(grupo['data'], grupo['rps_diario'], marker='o', label=variante)
-    ax5.set_title('Evolução Diária da RPS por Variante')
-    ax5.set_ylabel('RPS')
-    ax5.set_xlabel('Data')
-    ax5.legend()
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    st.pyplot(fig5)
-    
+    def desenhar_diario():
+        fig, ax = plt.subplots(figsize=(12, 6))
+        for variante, grupo in daily_metrics.groupby('variante', observed=True):
+            ax.plot(grupo['data'], grupo['rps_diario'], marker='o', label=variante)
+        ax.set_title('Evolução Diária da RPS por Variante')
+        ax.set_ylabel('RPS')
+        ax.set_xlabel('Data')
+        ax.legend()
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+        return fig
+
+    def desenhar_diario_plotly():
+        import plotly.express as px
+        fig = px.line(daily_metrics.astype({'variante': str}), x='data', y='rps_diario', color='variante',
+                      markers=True, title='Evolução Diária da RPS por Variante', template='plotly_white')
+        return fig.update_layout(xaxis_title='Data', yaxis_title='RPS')
+
+    exibir_figura(hash_conteudo(daily_metrics[['data', 'rps_diario']], daily_metrics['variante'].astype(str), 'diario'),
+                  desenhar_diario, desenhar_diario_plotly)
+
     # Conclusão
     st.subheader("🔍 Conclusão")
-    
-    if len(metrics) == 2:
-        control = metrics[metrics['variante'] == 'Controle']
-        variant = metrics[metrics['variante'] != 'Controle']
-        
-        if not control.empty and not variant.empty:
-            if rps_diff > 0:
-                st.success(f"✅ A variante apresenta uma RPS {rps_diff:.2f}% maior que o controle.")
-            else:
-                st.error(f"❌ A variante apresenta uma RPS {abs(rps_diff):.2f}% menor que o controle.")
-            
-            if conv_diff > 0:
-                st.success(f"✅ A taxa de conversão da variante é {conv_diff:.2f}% maior que o controle.")
-            else:
-                st.error(f"❌ A taxa de conversão da variante é {abs(conv_diff):.2f}% menor que o controle.")
 
+    for linha in result.comparacao.itertuples():
+        rotulo = f"variante {linha.variante}" if len(variantes) > 2 else "variante"
+        rps_diff, conv_diff = linha.rps_diff, linha.conv_diff
+        if rps_diff > 0:
+            st.success(f"✅ A {rotulo} apresenta uma RPS {rps_diff:.2f}% maior que o controle.")
+        else:
+            st.error(f"❌ A {rotulo} apresenta uma RPS {abs(rps_diff):.2f}% menor que o controle.")
+
+        if conv_diff > 0:
+            st.success(f"✅ A taxa de conversão da {rotulo} é {conv_diff:.2f}% maior que o controle.")
+        else:
+            st.error(f"❌ A taxa de conversão da {rotulo} é {abs(conv_diff):.2f}% menor que o controle.")
+
+def run_metrics_analysis(data, alocacao=None):
+    """
+    Executa análise de métricas básicas:
+    - Receita por Sessão (RPS)
+    - Receita Total por Variante
+    - Sessões Totais por Variante
+    - Conversão implícita (se receita > 0 for conversão)
+    - Sample Ratio Mismatch (SRM)
+    """
+    # Verificar se os dados contêm as colunas necessárias
+    try:
+        frame = as_experiment_frame(data)
+    except ValueError as e:
+        st.error(str(e))
+        return
 
+    try:
+        result = background_analysis(compute_metrics_analysis, frame, alocacao=alocacao)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    if result is not None:
+        render_metrics_analysis(result)
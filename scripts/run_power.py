@@ -0,0 +1,148 @@
+# scripts/run_power.py
+import numpy as np
+import matplotlib.pyplot as plt
+import pandas as pd
+import streamlit as st
+from scripts.cache import background_analysis
+from scripts.plotting import exibir_figura, hash_conteudo, paleta
+from scripts.power import (METODOS_PODER, MIN_DIAS_HISTORICO, analytic_power, first_duration, required_days,
+                           simulated_power)
+from scripts.preprocessing import as_experiment_frame
+from scripts.results import PowerResult
+
+# Grade padrão do planejamento
+LIFTS_PADRAO = (0.02, 0.05, 0.10, 0.15, 0.20)
+DURACOES_PADRAO = tuple(range(7, 57, 7))
+
+def _historico(frame):
+    # O controle do histórico é a referência: o tratamento simulado é ele com o lift
+    return frame.rpv_diario(frame.controle)
+
+def compute_power(frame, lifts=LIFTS_PADRAO, duracoes=DURACOES_PADRAO, alpha=0.05, poder=0.8,
+                  metodo="analitico", num_simulacoes=500, seed=42, n_workers=1):
+    """
+    Poder para detectar cada lift de RPV em cada duração (dias), a partir do
+    RPV diário histórico do controle:
+    - Teste Z em forma fechada, sempre (também dá os dias necessários exatos)
+    - Monte Carlo com a regra de decisão do bootstrap ou do bayesiano, quando escolhido
+    """
+    historico = _historico(frame)
+    if len(historico) < MIN_DIAS_HISTORICO:
+        raise ValueError(f"São necessários ao menos {MIN_DIAS_HISTORICO} dias de histórico do {frame.controle}")
+    media, desvio = float(np.mean(historico)), float(np.std(historico, ddof=1))
+    if not desvio > 0:
+        raise ValueError("O RPV diário do histórico não varia: não há como estimar o poder")
+
+    lifts, duracoes = np.asarray(lifts, dtype=float), np.asarray(duracoes, dtype=int)
+    poder_simulado = dias_simulados = None
+    if metodo != "analitico":
+        poder_simulado = simulated_power(historico, lifts, duracoes, metodo, alpha, num_simulacoes,
+                                         seed=seed, n_workers=n_workers)
+        dias_simulados = first_duration(poder_simulado, duracoes, poder)
+
+    return PowerResult(
+        variante=frame.controle, media=media, desvio=desvio, dias_historico=len(historico),
+        lifts=lifts, duracoes=duracoes,
+        poder_analitico=analytic_power(media, desvio, lifts, duracoes, alpha),
+        dias_analiticos=required_days(media, desvio, lifts, alpha, poder),
+        poder_simulado=poder_simulado, dias_simulados=dias_simulados,
+        metodo=metodo, alpha=alpha, poder_alvo=poder,
+        num_simulacoes=num_simulacoes if metodo != "analitico" else 0,
+    )
+
+def _grafico_poder(result, cores):
+    simulado = result.poder_simulado is not None
+    titulo = f"Poder por duração do teste ({METODOS_PODER[result.metodo]})"
+    rotulos = [f"Lift {lift * 100:g}%" for lift in result.lifts]
+
+    def desenhar():
+        fig, ax = plt.subplots(figsize=(12, 5), dpi=150)
+        for i, (rotulo, cor) in enumerate(zip(rotulos, cores)):
+            if simulado:
+                ax.plot(result.duracoes, result.poder_simulado[i], marker='o', color=cor, label=rotulo)
+                ax.plot(result.duracoes, result.poder_analitico[i], color=cor, linestyle='dotted', alpha=0.7)
+            else:
+                ax.plot(result.duracoes, result.poder_analitico[i], marker='o', color=cor, label=rotulo)
+        ax.axhline(result.poder_alvo, color='#e74c3c', linestyle='dashed', linewidth=1.5,
+                   label=f"Poder alvo ({result.poder_alvo:.0%})")
+        ax.set_ylim(0, 1.02)
+        ax.set_title(titulo + (" · pontilhado: teste Z" if simulado else ""), fontweight='bold')
+        ax.set_xlabel("Dias de teste")
+        ax.set_ylabel("Poder")
+        ax.legend(frameon=True, fancybox=True, shadow=True, loc='lower right')
+        ax.grid(True, alpha=0.3)
+        fig.tight_layout()
+        return fig
+
+    def desenhar_plotly():
+        import plotly.graph_objects as go
+        fig = go.Figure()
+        for i, (rotulo, cor) in enumerate(zip(rotulos, cores)):
+            principal = result.poder_simulado[i] if simulado else result.poder_analitico[i]
+            fig.add_scatter(x=result.duracoes, y=principal, mode="lines+markers", line=dict(color=cor),
+                            name=rotulo, legendgroup=rotulo)
+            if simulado:
+                fig.add_scatter(x=result.duracoes, y=result.poder_analitico[i], mode="lines",
+                                line=dict(color=cor, dash="dot"), name=f"{rotulo} (teste Z)",
+                                legendgroup=rotulo, showlegend=False)
+        fig.add_hline(y=result.poder_alvo, line_color="#e74c3c", line_dash="dash")
+        return fig.update_layout(title=titulo, xaxis_title="Dias de teste", yaxis_title="Poder",
+                                 yaxis=dict(range=[0, 1.02]), template="plotly_white")
+
+    exibir_figura(hash_conteudo(result.poder_analitico, result.poder_simulado, result.duracoes, rotulos,
+                                cores, result.poder_alvo, titulo), desenhar, desenhar_plotly)
+
+def _dias(valor, sem_valor):
+    return sem_valor if not np.isfinite(valor) else f"{int(valor)} ({valor / 7:.1f} semanas)"
+
+def render_power(result):
+    cores = paleta(len(result.lifts))
+    simulado = result.poder_simulado is not None
+
+    st.caption(f"Histórico: {result.dias_historico} dias do {result.variante} · RPV diário médio "
+               f"{result.media:.4f} · desvio diário {result.desvio:.4f} · α = {result.alpha:.2f} (unilateral)"
+               + (f" · {result.num_simulacoes} simulações por célula" if simulado else ""))
+    if result.dias_historico < 14:
+        st.warning("⚠️ Menos de duas semanas de histórico: a variação diária (e o poder) pode estar mal estimada.")
+
+    st.subheader(f"🗓️ Duração para {result.poder_alvo:.0%} de poder")
+    maximo = int(result.duracoes.max())
+    tabela = pd.DataFrame({
+        "lift": [f"{lift * 100:g}%" for lift in result.lifts],
+        "efeito no RPV": result.lifts * result.media,
+        "dias (teste Z)": [_dias(d, "∞") for d in result.dias_analiticos],
+    })
+    if simulado:
+        tabela[f"dias ({METODOS_PODER[result.metodo]})"] = [_dias(d, f"> {maximo}") for d in result.dias_simulados]
+    st.dataframe(tabela, hide_index=True)
+
+    menor = result.dias_simulados if simulado else np.where(result.dias_analiticos <= maximo,
+                                                             result.dias_analiticos, np.nan)
+    detectaveis = np.isfinite(menor)
+    if detectaveis.any():
+        i = int(np.argmax(detectaveis))
+        st.success(f"✅ Em {maximo} dias, o menor lift detectável com {result.poder_alvo:.0%} de poder é "
+                   f"{result.lifts[i] * 100:g}% (cerca de {int(menor[i])} dias)")
+    else:
+        st.error(f"❌ Nenhum dos lifts atinge {result.poder_alvo:.0%} de poder em até {maximo} dias")
+
+    st.subheader("📈 Curvas de poder")
+    _grafico_poder(result, cores)
+
+    with st.expander("📋 Poder por lift e duração"):
+        st.dataframe(pd.DataFrame(result.records()), hide_index=True)
+
+def run_power(df, lifts=LIFTS_PADRAO, duracoes=DURACOES_PADRAO, alpha=0.05, poder=0.8,
+              metodo="analitico", num_simulacoes=500, seed=42, n_workers=1):
+    frame = as_experiment_frame(df)
+    historico = _historico(frame)
+    if len(historico) < MIN_DIAS_HISTORICO or not np.std(historico) > 0:
+        st.error(f"❌ O planejamento precisa de ao menos {MIN_DIAS_HISTORICO} dias de histórico do "
+                 f"{frame.controle}, com variação no RPV diário")
+        return
+    # O número de processos não altera o resultado: fica fora da chave do cache
+    result = background_analysis(compute_power, frame, execucao={"n_workers": n_workers},
+                                 lifts=tuple(sorted(lifts)), duracoes=tuple(sorted(duracoes)), alpha=alpha, poder=poder,
+                                 metodo=metodo, num_simulacoes=num_simulacoes, seed=seed)
+    if result is not None:
+        render_power(result)
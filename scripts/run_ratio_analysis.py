@@ -0,0 +1,181 @@
+# scripts/run_ratio_analysis.py
+import numpy as np
+import matplotlib.pyplot as plt
+import pandas as pd
+import streamlit as st
+from scripts.cache import background_analysis
+from scripts.plotting import exibir_figura, hash_conteudo, paleta
+from scripts.preprocessing import COLUNA_COVARIAVEL, as_experiment_frame
+from scripts.ratio import (METRICAS, NOMES_METRICAS, compare_to_control, cuped_ratio, delta_ratio,
+                           ratio_by_segment, ratio_totals)
+from scripts.results import RatioResult
+
+def compute_ratio_analysis(frame, alpha=0.05):
+    """
+    RPV e conversão como razões de somas, para cada variante contra o controle:
+    - Método delta sobre as somas por linha
+    - Ajuste CUPED pela covariável do período anterior, quando presente
+    - Os mesmos testes em todos os segmentos de cada dimensão, calculados em lote a partir do cubo
+    """
+    variantes = frame.ordem_variantes
+    totais = ratio_totals(frame)
+
+    razoes, erros, razoes_cuped, erros_cuped, thetas, comparacoes = [], [], [], [], [], []
+    for metrica in METRICAS:
+        razao, variancia, cov_lz = delta_ratio(totais, metrica)
+        ajustada, variancia_ajustada, theta = cuped_ratio(totais, razao, variancia, cov_lz)
+
+        delta = compare_to_control(razao, variancia, alpha)
+        cuped = compare_to_control(ajustada, variancia_ajustada, alpha)
+        # Redução da variância da diferença: equivale à fração de tráfego economizada
+        var_delta = variancia[1:] + variancia[0]
+        var_cuped = variancia_ajustada[1:] + variancia_ajustada[0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cuped["reducao_variancia"] = np.nan_to_num(1 - var_cuped / var_delta)
+        delta["reducao_variancia"] = 0.0
+
+        for ajuste, tabela in (("delta", delta), ("cuped", cuped)):
+            comparacoes.append(tabela.assign(metrica=metrica, ajuste=ajuste, variante=list(variantes[1:])))
+        razoes.append(razao)
+        erros.append(np.sqrt(variancia))
+        razoes_cuped.append(ajustada)
+        erros_cuped.append(np.sqrt(variancia_ajustada))
+        thetas.append(theta)
+
+    segmentos = None
+    if frame.dimensoes:
+        segmentos = pd.concat([ratio_by_segment(frame, dimensao, metrica, alpha)
+                               for dimensao in frame.dimensoes for metrica in METRICAS], ignore_index=True)
+
+    colunas = ["metrica", "ajuste", "variante"]
+    comparacoes = pd.concat(comparacoes, ignore_index=True)
+    return RatioResult(
+        variantes=variantes, metricas=tuple(METRICAS),
+        razao=np.array(razoes), erro=np.array(erros),
+        razao_cuped=np.array(razoes_cuped), erro_cuped=np.array(erros_cuped),
+        theta=np.array(thetas),
+        comparacoes=comparacoes[colunas + [c for c in comparacoes.columns if c not in colunas]],
+        alpha=alpha,
+        segmentos=segmentos,
+    )
+
+def _grafico_lift(result, metrica, cores):
+    # Intervalos do lift relativo: método delta e, se houver covariável, CUPED
+    ajustes = ["delta", "cuped"] if result.cuped else ["delta"]
+    rotulos = {"delta": "Método delta", "cuped": "CUPED"}
+    tabelas = {ajuste: result.comparacao(metrica, ajuste) for ajuste in ajustes}
+    tratamentos = list(result.variantes[1:])
+    titulo = f"Lift de {NOMES_METRICAS[metrica]} contra {result.variantes[0]} (IC {1 - result.alpha:.0%})"
+
+    def desenhar():
+        fig, ax = plt.subplots(figsize=(10, 1.5 + 0.8 * len(tratamentos) * len(ajustes)), dpi=150)
+        posicao = 0
+        for j, nome in enumerate(tratamentos):
+            for ajuste in ajustes:
+                linha = tabelas[ajuste].iloc[j]
+                ax.errorbar(linha["lift"], posicao,
+                            xerr=[[linha["lift"] - linha["lift_ci_inf"]], [linha["lift_ci_sup"] - linha["lift"]]],
+                            fmt='o' if ajuste == "delta" else 's', color=cores[j], capsize=5,
+                            alpha=0.6 if ajuste == "delta" else 1.0, label=f"{nome} · {rotulos[ajuste]}")
+                posicao += 1
+        ax.axvline(0, color='black', linewidth=1.5)
+        ax.set_yticks([])
+        ax.invert_yaxis()
+        ax.set_title(titulo, fontweight='bold')
+        ax.set_xlabel("Lift (%)")
+        ax.legend(frameon=True, fancybox=True, shadow=True, loc='best')
+        ax.grid(True, axis='x', alpha=0.3)
+        fig.tight_layout()
+        return fig
+
+    def desenhar_plotly():
+        import plotly.graph_objects as go
+        fig = go.Figure()
+        for j, nome in enumerate(tratamentos):
+            for ajuste in ajustes:
+                linha = tabelas[ajuste].iloc[j]
+                fig.add_scatter(
+                    x=[linha["lift"]], y=[f"{nome} · {rotulos[ajuste]}"], mode="markers",
+                    marker=dict(color=cores[j], symbol="circle" if ajuste == "delta" else "square", size=10),
+                    error_x=dict(type="data", symmetric=False, array=[linha["lift_ci_sup"] - linha["lift"]],
+                                 arrayminus=[linha["lift"] - linha["lift_ci_inf"]]),
+                    name=f"{nome} · {rotulos[ajuste]}",
+                )
+        fig.add_vline(x=0, line_color="black")
+        return fig.update_layout(title=titulo, xaxis_title="Lift (%)", template="plotly_white",
+                                 yaxis=dict(autorange="reversed"))
+
+    exibir_figura(hash_conteudo(*(tabelas[a][["lift", "lift_ci_inf", "lift_ci_sup"]] for a in ajustes),
+                                tratamentos, cores, titulo), desenhar, desenhar_plotly)
+
+def render_ratio_analysis(result):
+    variantes = result.variantes
+    controle, tratamentos = variantes[0], variantes[1:]
+    cores = paleta(len(variantes))[1:]
+    confianca = f"{1 - result.alpha:.0%}"
+
+    if not result.cuped:
+        st.info(f"ℹ️ Sem a coluna `{COLUNA_COVARIAVEL}` (ou sem variação nela), o ajuste CUPED não foi aplicado; "
+                "os resultados usam apenas o método delta.")
+
+    for m, metrica in enumerate(result.metricas):
+        st.subheader(f"📐 {NOMES_METRICAS[metrica]}")
+        ajuste = "cuped" if result.cuped else "delta"
+        erro = result.erro_cuped if result.cuped else result.erro
+
+        st.dataframe(pd.DataFrame({
+            "variante": variantes,
+            "razao": result.razao[m],
+            "erro_padrao": result.erro[m],
+            **({"razao_cuped": result.razao_cuped[m], "erro_padrao_cuped": result.erro_cuped[m]}
+               if result.cuped else {}),
+        }), hide_index=True)
+
+        tabela = result.comparacao(metrica, ajuste)
+        for j, nome in enumerate(tratamentos):
+            linha = tabela.iloc[j]
+            col1, col2, col3 = st.columns(3)
+            col1.metric(f"Lift {nome}", f"{linha['lift']:.2f}%",
+                        help=f"IC {confianca}: [{linha['lift_ci_inf']:.2f}%, {linha['lift_ci_sup']:.2f}%]")
+            col2.metric("P-valor", f"{linha['p_value']:.4f}")
+            if result.cuped:
+                col3.metric("Redução de variância (CUPED)", f"{linha['reducao_variancia']:.1%}",
+                            help="Fração de tráfego economizada para a mesma precisão")
+            else:
+                col3.metric("Erro padrão da diferença",
+                            f"{np.sqrt(erro[m, j + 1] ** 2 + erro[m, 0] ** 2):.4g}")
+
+            if linha["p_value"] < result.alpha:
+                if linha["diff"] > 0:
+                    st.success(f"✅ {nome} é estatisticamente superior ao {controle} em "
+                               f"{NOMES_METRICAS[metrica]} ({confianca} de confiança)")
+                else:
+                    st.error(f"❌ {nome} é estatisticamente inferior ao {controle} em "
+                             f"{NOMES_METRICAS[metrica]} ({confianca} de confiança)")
+            else:
+                st.warning(f"⚠️ {nome}: resultado inconclusivo em {NOMES_METRICAS[metrica]} "
+                           f"({confianca} de confiança)")
+
+        _grafico_lift(result, metrica, cores)
+
+    if result.segmentos is not None:
+        st.subheader("🧩 Resultados por segmento")
+        for dimensao, tabela in result.segmentos.groupby("dimensao", sort=False):
+            destaques = tabela[tabela["q_value"] < result.alpha]
+            with st.expander(f"{dimensao} ({tabela['segmento'].nunique()} segmentos, "
+                             f"{len(destaques)} diferenças significativas)"):
+                if not destaques.empty:
+                    st.caption("Significativas após a correção de Benjamini-Hochberg: " + ", ".join(
+                        f"{linha.segmento} ({linha.variante}, {NOMES_METRICAS[linha.metrica]}: {linha.lift:+.2f}%)"
+                        for linha in destaques.head(10).itertuples()))
+                st.dataframe(tabela.sort_values(["metrica", "q_value"]), hide_index=True)
+
+    with st.expander("📋 Comparações detalhadas"):
+        st.dataframe(result.comparacoes if result.cuped else result.comparacoes[result.comparacoes["ajuste"] == "delta"],
+                     hide_index=True)
+
+def run_ratio_analysis(df, alpha=0.05):
+    frame = as_experiment_frame(df)
+    result = background_analysis(compute_ratio_analysis, frame, alpha=alpha)
+    if result is not None:
+        render_ratio_analysis(result)
@@ -0,0 +1,167 @@
+# scripts/run_sequential.py
+import numpy as np
+import matplotlib.pyplot as plt
+import pandas as pd
+import streamlit as st
+from scripts.cache import background_analysis
+from scripts.plotting import exibir_figura, hash_conteudo, paleta
+from scripts.preprocessing import as_experiment_frame
+from scripts.results import SequentialResult
+from scripts.sequential import GASTOS, cumulative_stats, group_sequential_bounds, msprt, primeiro_cruzamento
+
+def compute_sequential(frame, alpha=0.05, gasto="obrien_fleming", dias_planejados=None, efeito_relativo=0.05):
+    """
+    Trajetórias sequenciais de cada variante contra o controle, em uma passada:
+    - mSPRT: p-valor sempre-válido e sequência de confiança da diferença de RPV
+    - Grupo sequencial: Z acumulado contra as fronteiras da função de gasto de alfa
+
+    `efeito_relativo` define a escala τ da prior do mSPRT como fração da média
+    do controle no primeiro dia (só usa dados disponíveis na primeira espiada).
+    """
+    variantes = frame.ordem_variantes
+    datas, n, media, variancia = cumulative_stats(frame)
+    dias = len(datas)
+    dias_planejados = max(int(dias_planejados or dias), dias)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        erro2 = variancia / n
+        diff = media[:, 1:] - media[:, [0]]
+        var_diff = erro2[:, 1:] + erro2[:, [0]]
+        z = np.nan_to_num(diff / np.sqrt(var_diff), nan=0.0, posinf=0.0, neginf=0.0)
+
+    media_controle = media[np.isfinite(media[:, 0]), 0]
+    tau2 = (efeito_relativo * abs(media_controle[0])) ** 2 if len(media_controle) else 0.0
+    if not tau2 > 0:
+        tau2 = float(np.nanmedian(var_diff)) or 1.0
+    p, cs_inf, cs_sup = msprt(diff, var_diff, tau2, alpha)
+
+    fronteira, alpha_gasto = group_sequential_bounds(np.arange(1, dias + 1) / dias_planejados, alpha, gasto)
+
+    return SequentialResult(
+        variantes=variantes, datas=tuple(datas), n=n, media=media, diff=diff, z=z,
+        p_sempre_valido=p, cs_inf=cs_inf, cs_sup=cs_sup,
+        fronteira=fronteira, alpha_gasto=alpha_gasto,
+        parada_msprt=primeiro_cruzamento(p <= alpha),
+        parada_gs=primeiro_cruzamento(np.abs(z) >= fronteira[:, None]),
+        alpha=alpha, gasto=gasto, dias_planejados=dias_planejados,
+    )
+
+def _grafico_z(result, tratamentos, cores):
+    datas = pd.to_datetime(list(result.datas))
+
+    def desenhar():
+        fig, ax = plt.subplots(figsize=(12, 5), dpi=150)
+        for j, (nome, cor) in enumerate(zip(tratamentos, cores)):
+            ax.plot(datas, result.z[:, j], marker='o', color=cor, label=nome)
+        ax.plot(datas, result.fronteira, color='#e74c3c', linestyle='dashed', linewidth=1.5, label='Fronteira')
+        ax.plot(datas, -result.fronteira, color='#e74c3c', linestyle='dashed', linewidth=1.5)
+        ax.axhline(0, color='black', linewidth=1)
+        ax.set_ylim(-max(6, np.abs(result.z).max() * 1.1), max(6, np.abs(result.z).max() * 1.1))
+        ax.set_title(f"Estatística Z acumulada e fronteiras ({GASTOS[result.gasto]})", fontweight='bold')
+        ax.set_xlabel("Data")
+        ax.set_ylabel("Z")
+        ax.legend(frameon=True, fancybox=True, shadow=True)
+        ax.grid(True, alpha=0.3)
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+        return fig
+
+    def desenhar_plotly():
+        import plotly.graph_objects as go
+        fig = go.Figure()
+        for j, (nome, cor) in enumerate(zip(tratamentos, cores)):
+            fig.add_scatter(x=datas, y=result.z[:, j], mode="lines+markers", line_color=cor, name=nome)
+        fig.add_scatter(x=datas, y=result.fronteira, mode="lines", line=dict(color="#e74c3c", dash="dash"), name="Fronteira")
+        fig.add_scatter(x=datas, y=-result.fronteira, mode="lines", line=dict(color="#e74c3c", dash="dash"), showlegend=False)
+        return fig.update_layout(title=f"Estatística Z acumulada e fronteiras ({GASTOS[result.gasto]})",
+                                 xaxis_title="Data", yaxis_title="Z", template="plotly_white")
+
+    exibir_figura(hash_conteudo(result.z, result.fronteira, datas, tratamentos, cores, result.gasto, 'z'),
+                  desenhar, desenhar_plotly)
+
+def _grafico_sequencia(result, tratamentos, cores, controle):
+    datas = pd.to_datetime(list(result.datas))
+    # Dias sem variância estimada ficam fora da faixa (intervalo infinito)
+    inf = np.where(np.isfinite(result.cs_inf), result.cs_inf, np.nan)
+    sup = np.where(np.isfinite(result.cs_sup), result.cs_sup, np.nan)
+    titulo = f"Diferença de RPV contra {controle} com sequência de confiança de {1 - result.alpha:.0%}"
+
+    def desenhar():
+        fig, ax = plt.subplots(figsize=(12, 5), dpi=150)
+        for j, (nome, cor) in enumerate(zip(tratamentos, cores)):
+            ax.plot(datas, result.diff[:, j], marker='o', color=cor, label=f"{nome} - {controle}")
+            ax.fill_between(datas, inf[:, j], sup[:, j], color=cor, alpha=0.2)
+        ax.axhline(0, color='black', linewidth=1.5)
+        ax.set_title(titulo, fontweight='bold')
+        ax.set_xlabel("Data")
+        ax.set_ylabel("Diferença de RPV")
+        ax.legend(frameon=True, fancybox=True, shadow=True)
+        ax.grid(True, alpha=0.3)
+        ax.tick_params(axis='x', labelrotation=45)
+        fig.tight_layout()
+        return fig
+
+    def desenhar_plotly():
+        import plotly.graph_objects as go
+        fig = go.Figure()
+        for j, (nome, cor) in enumerate(zip(tratamentos, cores)):
+            fig.add_scatter(x=datas, y=sup[:, j], mode="lines", line_width=0, showlegend=False, hoverinfo="skip")
+            fig.add_scatter(x=datas, y=inf[:, j], mode="lines", line_width=0, fill="tonexty",
+                            fillcolor=cor, opacity=0.2, showlegend=False, hoverinfo="skip")
+            fig.add_scatter(x=datas, y=result.diff[:, j], mode="lines+markers", line_color=cor, name=f"{nome} - {controle}")
+        fig.add_hline(y=0, line_color="black")
+        return fig.update_layout(title=titulo, xaxis_title="Data", yaxis_title="Diferença de RPV", template="plotly_white")
+
+    exibir_figura(hash_conteudo(result.diff, inf, sup, datas, tratamentos, cores, 'cs'), desenhar, desenhar_plotly)
+
+def render_sequential(result):
+    variantes = result.variantes
+    controle, tratamentos = variantes[0], variantes[1:]
+    cores = paleta(len(variantes))[1:]
+    ultimo = len(result.datas) - 1
+
+    st.caption(f"{len(result.datas)} de {result.dias_planejados} dias planejados · α = {result.alpha:.2f} · "
+               f"gasto de alfa {GASTOS[result.gasto]}")
+
+    for j, nome in enumerate(tratamentos):
+        st.markdown(f"### {nome} vs {controle}")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("p-valor sempre-válido (mSPRT)", f"{result.p_sempre_valido[ultimo, j]:.4f}")
+        col2.metric(f"IC sempre-válido {1 - result.alpha:.0%}",
+                    f"[{result.cs_inf[ultimo, j]:.4f}, {result.cs_sup[ultimo, j]:.4f}]")
+        col3.metric("Z atual / fronteira", f"{result.z[ultimo, j]:.2f} / ±{result.fronteira[ultimo]:.2f}")
+
+        paradas = [(metodo, result.dia_parada(p, j), int(p[j])) for metodo, p in
+                   (("mSPRT", result.parada_msprt), ("grupo sequencial", result.parada_gs))]
+        for metodo, dia, indice in paradas:
+            if dia is None:
+                st.info(f"⏳ {metodo}: nenhuma fronteira cruzada — continue coletando dados")
+            elif result.diff[indice, j] > 0:
+                st.success(f"✅ {metodo}: {nome} superior ao {controle}; o teste poderia ter parado em {dia}")
+            else:
+                st.error(f"❌ {metodo}: {nome} inferior ao {controle}; o teste poderia ter parado em {dia}")
+
+    st.subheader("📈 Trajetórias acumuladas")
+    _grafico_z(result, tratamentos, cores)
+    _grafico_sequencia(result, tratamentos, cores, controle)
+
+    with st.expander("📋 Trajetória dia a dia"):
+        tabela = pd.concat([pd.DataFrame({
+            "data": list(result.datas),
+            "variante": nome,
+            "diff": result.diff[:, j],
+            "ic_inf": result.cs_inf[:, j],
+            "ic_sup": result.cs_sup[:, j],
+            "p_sempre_valido": result.p_sempre_valido[:, j],
+            "z": result.z[:, j],
+            "fronteira": result.fronteira,
+            "alpha_gasto": result.alpha_gasto,
+        }) for j, nome in enumerate(tratamentos)], ignore_index=True)
+        st.dataframe(tabela, hide_index=True)
+
+def run_sequential(df, alpha=0.05, gasto="obrien_fleming", dias_planejados=None, efeito_relativo=0.05):
+    frame = as_experiment_frame(df)
+    result = background_analysis(compute_sequential, frame, alpha=alpha, gasto=gasto,
+                                 dias_planejados=dias_planejados, efeito_relativo=efeito_relativo)
+    if result is not None:
+        render_sequential(result)
@@ -0,0 +1,128 @@
+# scripts/sequential.py
+"""
+Inferência sequencial: estatísticas acumuladas dia a dia, válidas para
+acompanhar o teste diariamente ("espiar") sem inflar o erro tipo I.
+
+Todas as trajetórias (dias x variantes) saem de uma única passada de somas
+acumuladas das estatísticas diárias — nenhuma análise é refeita por prefixo.
+
+- mSPRT (mixture SPRT, prior Normal N(0, τ²) sobre a diferença): p-valor
+  sempre-válido e sequência de confiança para a diferença de médias
+- Fronteiras de grupo sequencial com função de gasto de alfa (Lan-DeMets),
+  usando a fração de dias decorridos como fração de informação
+"""
+import numpy as np
+from scipy import optimize
+from scipy.stats import norm
+
+GASTOS = {
+    "obrien_fleming": "O'Brien-Fleming",
+    "pocock": "Pocock",
+}
+
+# Fronteira usada quando o alfa disponível no dia é praticamente zero
+Z_MAXIMO = 8.0
+
+
+def cumulative_stats(frame):
+    """
+    Contagem, média e variância acumuladas do RPV por linha, no formato
+    (dias, variantes) com o controle na coluna 0, a partir de linhas,
+    rpv_soma e rpv_soma_quad diários.
+    """
+    variantes = list(frame.ordem_variantes)
+    tabela = frame.daily.pivot_table(
+        index="data", columns="variante", values=["linhas", "rpv_soma", "rpv_soma_quad"],
+        aggfunc="sum", fill_value=0, observed=True,
+    ).sort_index()
+    datas = tabela.index
+    n, soma, soma_quad = (tabela[col].reindex(columns=variantes, fill_value=0).cumsum().to_numpy(dtype=float)
+                          for col in ("linhas", "rpv_soma", "rpv_soma_quad"))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = soma / n
+        variancia = (soma_quad - n * media ** 2) / (n - 1)
+    return datas, n, media, np.maximum(variancia, 0)
+
+
+def msprt(diff, var_diff, tau2, alpha=0.05):
+    """
+    mSPRT para a diferença de médias com prior N(0, τ²). Retorna o p-valor
+    sempre-válido e a sequência de confiança (1 - alpha), ambos já acumulados
+    (p não cresce e o intervalo só se estreita ao longo dos dias).
+    """
+    validos = np.isfinite(var_diff) & (var_diff > 0)
+    v = np.where(validos, var_diff, 1.0)
+
+    log_lambda = 0.5 * np.log(v / (v + tau2)) + tau2 * diff ** 2 / (2 * v * (v + tau2))
+    p = np.where(validos, np.minimum(1.0, np.exp(-log_lambda)), 1.0)
+    p = np.minimum.accumulate(p, axis=0)
+
+    raio = np.sqrt(v * (v + tau2) / tau2 * (np.log((v + tau2) / v) - 2 * np.log(alpha)))
+    inf = np.where(validos, diff - raio, -np.inf)
+    sup = np.where(validos, diff + raio, np.inf)
+    return p, np.maximum.accumulate(inf, axis=0), np.minimum.accumulate(sup, axis=0)
+
+
+def alpha_spending(fracoes, alpha=0.05, gasto="obrien_fleming"):
+    """
+    Alfa bilateral acumulado gasto até cada fração de informação t (funções de
+    Lan-DeMets, com alpha/2 gasto em cada lado).
+    """
+    t = np.clip(np.asarray(fracoes, dtype=float), 1e-12, 1.0)
+    if gasto == "obrien_fleming":
+        return 4 - 4 * norm.cdf(norm.ppf(1 - alpha / 4) / np.sqrt(t))
+    if gasto == "pocock":
+        return alpha * np.log(1 + (np.e - 1) * t)
+    raise ValueError(f"Função de gasto de alfa desconhecida: {gasto}")
+
+
+def group_sequential_bounds(fracoes, alpha=0.05, gasto="obrien_fleming", num_pontos=401):
+    """
+    Fronteiras bilaterais |Z_k| >= c_k para as frações de informação dadas,
+    tais que a probabilidade de cruzar pela primeira vez no passo k sob H0 seja
+    o alfa gasto naquele passo. Recursão de Armitage-McPherson-Rowe: a
+    densidade do escore S_k = Z_k·√t_k na região de continuação é propagada
+    em uma grade a cada passo.
+    """
+    fracoes = np.asarray(fracoes, dtype=float)
+    gasto_acumulado = alpha_spending(fracoes, alpha, gasto)
+    incrementos = np.diff(gasto_acumulado, prepend=0.0)
+
+    fronteiras = np.empty(len(fracoes))
+    grade = densidade = None
+    t_anterior = 0.0
+    for k, (t, alvo) in enumerate(zip(fracoes, incrementos)):
+        passo = np.sqrt(t - t_anterior)
+
+        if densidade is None:
+            def cruzar(c):
+                return 2 * norm.sf(c)
+        else:
+            def cruzar(c):
+                b = c * np.sqrt(t)
+                prob = norm.cdf((-b - grade) / passo) + norm.sf((b - grade) / passo)
+                return np.trapz(densidade * prob, grade)
+
+        if alvo <= 1e-12 or cruzar(Z_MAXIMO) >= alvo:
+            c = Z_MAXIMO
+        else:
+            c = optimize.brentq(lambda c: cruzar(c) - alvo, 1e-6, Z_MAXIMO)
+        fronteiras[k] = c
+
+        # Densidade de S_k restrita a |S_k| < c·√t_k (continuação do teste)
+        b = c * np.sqrt(t)
+        nova_grade = np.linspace(-b, b, num_pontos)
+        if densidade is None:
+            densidade = norm.pdf(nova_grade / passo) / passo
+        else:
+            nucleo = norm.pdf((nova_grade[:, None] - grade[None, :]) / passo) / passo
+            densidade = np.trapz(nucleo * densidade[None, :], grade, axis=1)
+        grade, t_anterior = nova_grade, t
+    return fronteiras, gasto_acumulado
+
+
+def primeiro_cruzamento(cruzou):
+    """Índice do primeiro dia em que cada coluna cruzou (-1 se nunca)."""
+    cruzou = np.asarray(cruzou)
+    return np.where(cruzou.any(axis=0), cruzou.argmax(axis=0), -1)
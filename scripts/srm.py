@@ -0,0 +1,108 @@
+# scripts/srm.py
+"""
+Sample Ratio Mismatch (SRM): verifica se o tráfego foi dividido entre as
+variantes na proporção planejada.
+
+O teste qui-quadrado de aderência é aplicado de uma vez sobre a matriz de
+contingência inteira (células x variantes), onde cada célula é um dia ou um
+valor de uma dimensão de segmento. Com milhares de células o custo é o de
+algumas operações de array. Os p-valores das células são corrigidos por
+Benjamini-Hochberg, para que os destaques não sejam só ruído de múltiplos testes.
+"""
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2
+
+# Contagem esperada mínima por variante para a aproximação qui-quadrado valer
+ESPERADO_MINIMO = 5
+
+
+def expected_allocation(alocacao, num_variantes):
+    """Proporções esperadas normalizadas (divisão igual quando `alocacao` é None)."""
+    if alocacao is None:
+        return np.full(num_variantes, 1 / num_variantes)
+    alocacao = np.asarray(alocacao, dtype=float)
+    if len(alocacao) != num_variantes:
+        raise ValueError(f"Informe uma alocação para cada uma das {num_variantes} variantes")
+    if np.any(alocacao < 0) or not alocacao.sum() > 0:
+        raise ValueError("As alocações devem ser não negativas e somar mais que zero")
+    return alocacao / alocacao.sum()
+
+
+def srm_chi2(contagens, alocacao):
+    """
+    Teste qui-quadrado de aderência para cada linha de `contagens`
+    (células x variantes). Retorna as estatísticas, os p-valores e a menor
+    contagem esperada de cada célula.
+    """
+    contagens = np.atleast_2d(np.asarray(contagens, dtype=float))
+    esperado = contagens.sum(axis=1, keepdims=True) * alocacao
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Tráfego em uma variante com alocação zero é SRM por definição
+        parcelas = np.where(esperado > 0, (contagens - esperado) ** 2 / esperado,
+                            np.where(contagens > 0, np.inf, 0.0))
+    estatistica = parcelas.sum(axis=1)
+    graus = max(int(np.count_nonzero(alocacao)) - 1, 1)
+    return estatistica, chi2.sf(estatistica, graus), esperado[:, alocacao > 0].min(axis=1)
+
+
+def benjamini_hochberg(p_values):
+    """q-valores de Benjamini-Hochberg (controle da taxa de falsas descobertas)."""
+    p_values = np.asarray(p_values, dtype=float)
+    n = len(p_values)
+    if n == 0:
+        return p_values
+    ordem = np.argsort(p_values)
+    ajustados = p_values[ordem] * n / np.arange(1, n + 1)
+    q = np.empty(n)
+    q[ordem] = np.minimum(np.minimum.accumulate(ajustados[::-1])[::-1], 1.0)
+    return q
+
+
+def _contingencia(tabela, chave, coluna, variantes):
+    contagens = tabela.pivot_table(index=chave, columns="variante", values=coluna, aggfunc="sum",
+                                   fill_value=0, observed=True)
+    contagens.columns = contagens.columns.astype(str)
+    return contagens.reindex(columns=list(variantes), fill_value=0)
+
+
+def srm_cells(frame, alocacao, coluna="sessoes", alpha=0.05):
+    """
+    SRM por dia (a partir de `frame.daily`) e por valor de cada dimensão de
+    segmento (a partir do cubo). Uma linha por célula com as
+    contagens por variante, a proporção observada, o p-valor, o q-valor e
+    `srm` verdadeiro quando a célula quebra a alocação (q < alpha e contagens
+    suficientes para o teste).
+    """
+    variantes = list(frame.ordem_variantes)
+    blocos = []
+
+    diario = _contingencia(frame.daily, "data", coluna, variantes)
+    diario.index = diario.index.strftime("%Y-%m-%d")
+    blocos.append(diario.assign(dimensao="data"))
+
+    for dimensao in frame.dimensoes:
+        blocos.append(_contingencia(frame.cubo, dimensao, coluna, variantes).assign(dimensao=dimensao))
+
+    contagens = pd.concat(blocos).rename_axis("celula").reset_index()
+    matriz = contagens[variantes].to_numpy(dtype=float)
+    estatistica, p_value, esperado_minimo = srm_chi2(matriz, alocacao)
+    # A correção só considera as células com contagens suficientes para o teste
+    testavel = esperado_minimo >= ESPERADO_MINIMO
+    q_value = np.full(len(p_value), np.nan)
+    q_value[testavel] = benjamini_hochberg(p_value[testavel])
+
+    total = matriz.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        observada = matriz / total[:, None]
+    resultado = pd.DataFrame({"dimensao": contagens["dimensao"], "celula": contagens["celula"].astype(str)})
+    resultado[variantes] = matriz
+    resultado["total"] = total
+    for i, nome in enumerate(variantes):
+        resultado[f"proporcao_{nome}"] = observada[:, i]
+    resultado["qui2"] = estatistica
+    resultado["p_value"] = p_value
+    resultado["q_value"] = q_value
+    resultado["testavel"] = testavel
+    resultado["srm"] = testavel & (q_value < alpha)
+    return resultado
@@ -0,0 +1,192 @@
+# scripts/store.py
+"""
+Histórico local de experimentos e resultados (sobrevive ao fim da sessão).
+
+Em `HISTORICO_DIR`:
+- indice.sqlite: índice dos experimentos (id, nome, período, variantes,
+  dimensões, linhas) e os resultados já calculados de cada método
+- <id>/estatisticas.parquet: as estatísticas suficientes do experimento (o
+  cubo por dia, variante e dimensões, ou as diárias sem dimensões)
+
+O id é o hash do conteúdo do frame (`frame.hash`), o mesmo usado no cache das
+análises: reabrir um experimento devolve um frame com o mesmo hash, e os
+resultados salvos são encontrados sem recálculo. Os resultados ficam em
+pickle, chaveados por (hash do frame, método, parâmetros) e marcados com a
+versão do método (cache.VERSOES_RESULTADO); os de fatias por segmento usam o
+hash da fatia e pertencem ao experimento de origem. O arquivo é local e gerado
+pelo próprio app; um resultado de outra versão do método ou que não pode mais
+ser lido (ex.: classe alterada) é tratado como ausente.
+"""
+import os
+import pickle
+import sqlite3
+from contextlib import closing
+import pandas as pd
+from scripts.preprocessing import combine_daily, frame_from_cube
+
+HISTORICO_DIR = os.path.join(".cache", "historico")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS experimentos (
+    id TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    inicio TEXT NOT NULL,
+    fim TEXT NOT NULL,
+    variantes TEXT NOT NULL,
+    dimensoes TEXT NOT NULL,
+    linhas INTEGER NOT NULL,
+    salvo_em TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS experimentos_periodo ON experimentos (inicio, fim);
+CREATE INDEX IF NOT EXISTS experimentos_nome ON experimentos (nome);
+CREATE TABLE IF NOT EXISTS variantes (
+    experimento TEXT NOT NULL REFERENCES experimentos (id) ON DELETE CASCADE,
+    variante TEXT NOT NULL,
+    PRIMARY KEY (experimento, variante)
+);
+CREATE INDEX IF NOT EXISTS variantes_nome ON variantes (variante);
+CREATE TABLE IF NOT EXISTS resultados (
+    frame_hash TEXT NOT NULL,
+    metodo TEXT NOT NULL,
+    parametros TEXT NOT NULL,
+    experimento TEXT NOT NULL REFERENCES experimentos (id) ON DELETE CASCADE,
+    resultado BLOB NOT NULL,
+    salvo_em TEXT NOT NULL,
+    versao INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (frame_hash, metodo, parametros)
+);
+CREATE INDEX IF NOT EXISTS resultados_experimento ON resultados (experimento);
+"""
+
+
+def _conectar(base):
+    os.makedirs(base, exist_ok=True)
+    conexao = sqlite3.connect(os.path.join(base, "indice.sqlite"), timeout=30)
+    conexao.execute("PRAGMA foreign_keys = ON")
+    conexao.executescript(_ESQUEMA)
+    # Índices criados antes da versão dos resultados: as linhas antigas ficam na versão 1
+    colunas = [linha[1] for linha in conexao.execute("PRAGMA table_info(resultados)")]
+    if "versao" not in colunas:
+        conexao.execute("ALTER TABLE resultados ADD COLUMN versao INTEGER NOT NULL DEFAULT 1")
+    return conexao
+
+
+def _agora():
+    return pd.Timestamp.now().isoformat(timespec="seconds")
+
+
+def _estatisticas(experimento, base):
+    return os.path.join(base, experimento, "estatisticas.parquet")
+
+
+def save_experiment(frame, nome, base=HISTORICO_DIR):
+    """
+    Salva as estatísticas suficientes do frame e o registra no índice. Salvar
+    de novo o mesmo conteúdo só atualiza o nome. Devolve o id do experimento.
+    """
+    experimento = frame.hash
+    estatisticas = frame.cubo if frame.cubo is not None else frame.daily
+    caminho = _estatisticas(experimento, base)
+    if not os.path.exists(caminho):
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = caminho + ".tmp"
+        colunas_texto = ["variante", *frame.dimensoes]
+        estatisticas.assign(**{c: estatisticas[c].astype(str) for c in colunas_texto}).to_parquet(
+            temporario, index=False)
+        os.replace(temporario, caminho)
+
+    datas = frame.daily["data"]
+    with closing(_conectar(base)) as conexao, conexao:
+        conexao.execute(
+            "INSERT INTO experimentos VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET nome = excluded.nome",
+            (experimento, nome, datas.min().strftime("%Y-%m-%d"), datas.max().strftime("%Y-%m-%d"),
+             ",".join(frame.ordem_variantes), ",".join(frame.dimensoes),
+             int(frame.daily["linhas"].sum()), _agora()),
+        )
+        conexao.executemany("INSERT OR IGNORE INTO variantes VALUES (?, ?)",
+                            [(experimento, v) for v in frame.ordem_variantes])
+    return experimento
+
+
+def list_saved_experiments(variante=None, desde=None, ate=None, base=HISTORICO_DIR):
+    """
+    Experimentos salvos, do mais recente para o mais antigo, com a quantidade
+    de resultados guardados. Filtra por nome de variante e por período
+    (experimentos que tiveram dados entre `desde` e `ate`, datas AAAA-MM-DD).
+    """
+    condicoes, parametros = [], []
+    if variante:
+        condicoes.append("id IN (SELECT experimento FROM variantes WHERE variante = ?)")
+        parametros.append(variante)
+    if desde:
+        condicoes.append("fim >= ?")
+        parametros.append(str(desde))
+    if ate:
+        condicoes.append("inicio <= ?")
+        parametros.append(str(ate))
+    filtro = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    with closing(_conectar(base)) as conexao:
+        return pd.read_sql_query(
+            "SELECT e.*, (SELECT COUNT(*) FROM resultados r WHERE r.experimento = e.id) AS resultados "
+            f"FROM experimentos e {filtro} ORDER BY salvo_em DESC, nome",
+            conexao, params=parametros,
+        )
+
+
+def load_saved_frame(experimento, base=HISTORICO_DIR):
+    """ExperimentFrame de um experimento salvo (sem as linhas brutas), com o hash original."""
+    with closing(_conectar(base)) as conexao:
+        linha = conexao.execute("SELECT dimensoes FROM experimentos WHERE id = ?", (experimento,)).fetchone()
+    if linha is None or not os.path.exists(_estatisticas(experimento, base)):
+        raise ValueError("Experimento não encontrado no histórico")
+    dimensoes = tuple(d for d in linha[0].split(",") if d)
+    cubo = combine_daily([pd.read_parquet(_estatisticas(experimento, base))], dimensoes)
+    return frame_from_cube(cubo, dimensoes, experimento)
+
+
+def save_result(experimento, frame_hash, metodo, parametros, resultado, versao=1, base=HISTORICO_DIR):
+    """
+    Guarda o resultado de um método, na `versao` do método, para o frame (ou
+    fatia) de um experimento salvo. Substitui o de qualquer outra versão.
+    """
+    with closing(_conectar(base)) as conexao, conexao:
+        conexao.execute(
+            "INSERT OR REPLACE INTO resultados (frame_hash, metodo, parametros, experimento, resultado, salvo_em, "
+            "versao) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (frame_hash, metodo, repr(parametros), experimento,
+             pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL), _agora(), versao),
+        )
+
+
+def load_result(frame_hash, metodo, parametros, versao=1, base=HISTORICO_DIR):
+    """Resultado salvo para (frame, método, parâmetros) na `versao` do método, ou None."""
+    if not os.path.exists(os.path.join(base, "indice.sqlite")):
+        return None
+    with closing(_conectar(base)) as conexao:
+        linha = conexao.execute(
+            "SELECT resultado FROM resultados WHERE frame_hash = ? AND metodo = ? AND parametros = ? AND versao = ?",
+            (frame_hash, metodo, repr(parametros), versao),
+        ).fetchone()
+    if linha is None:
+        return None
+    try:
+        return pickle.loads(linha[0])
+    except (pickle.UnpicklingError, AttributeError, ImportError, EOFError, TypeError):
+        return None
+
+
+def remove_results(experimento, base=HISTORICO_DIR):
+    """Apaga os resultados salvos do experimento (as estatísticas continuam)."""
+    with closing(_conectar(base)) as conexao, conexao:
+        conexao.execute("DELETE FROM resultados WHERE experimento = ?", (experimento,))
+
+
+def remove_saved_experiment(experimento, base=HISTORICO_DIR):
+    """Remove o experimento do índice, seus resultados e suas estatísticas."""
+    with closing(_conectar(base)) as conexao, conexao:
+        conexao.execute("DELETE FROM experimentos WHERE id = ?", (experimento,))
+    caminho = _estatisticas(experimento, base)
+    if os.path.exists(caminho):
+        os.remove(caminho)
+        os.rmdir(os.path.dirname(caminho))
@@ -0,0 +1,109 @@
+# scripts/streaming.py
+import hashlib
+import io
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc
+import pyarrow.parquet as pq
+from scripts.loader import DTYPES
+from scripts.preprocessing import (aggregate_daily, combine_daily, dimension_columns, frame_from_cube,
+                                   limit_dimensions, prepare_rows)
+
+# Linhas lidas por bloco; a memória de pico é proporcional a este valor
+TAMANHO_BLOCO_LINHAS = 250_000
+
+# A partir deste tamanho (em MB) o app usa a leitura em blocos automaticamente
+LIMITE_STREAMING_MB = 100
+
+# Quantos resultados parciais acumular antes de consolidar (mantém a memória em dias x variantes)
+_CONSOLIDAR_A_CADA = 32
+
+
+def _nome(source):
+    return str(getattr(source, "name", source)).lower()
+
+
+def _abrir(source):
+    # Aceita caminho em disco ou objeto de arquivo (ex.: UploadedFile do Streamlit).
+    # Buffers em memória ganham um cursor próprio: análises em segundo plano
+    # podem reler o mesmo upload ao mesmo tempo (o conteúdo não é copiado)
+    if hasattr(source, "getvalue"):
+        return io.BytesIO(source.getvalue())
+    if hasattr(source, "read"):
+        source.seek(0)
+        return source
+    return open(source, "rb")
+
+
+def hash_source(source, tamanho=1 << 20):
+    """Hash SHA-256 do arquivo, lido em partes de 1 MB."""
+    h = hashlib.sha256()
+    arquivo = _abrir(source)
+    for parte in iter(lambda: arquivo.read(tamanho), b""):
+        h.update(parte)
+    if arquivo is not source:
+        arquivo.close()
+    return h.hexdigest()
+
+
+def supports_streaming(source):
+    return _nome(source).endswith((".csv", ".csv.gz", ".gz", ".parquet", ".arrow", ".feather", ".ipc"))
+
+
+def iter_blocks(source, tamanho_bloco=TAMANHO_BLOCO_LINHAS):
+    """Itera sobre o arquivo em DataFrames de até `tamanho_bloco` linhas."""
+    if not supports_streaming(source):
+        raise ValueError("Leitura em blocos disponível apenas para CSV, CSV.gz, Parquet e Arrow")
+
+    nome = _nome(source)
+    arquivo = _abrir(source)
+    try:
+        if nome.endswith((".csv.gz", ".gz", ".csv")):
+            compression = "gzip" if nome.endswith(".gz") else None
+            with pd.read_csv(arquivo, dtype=DTYPES, compression=compression, chunksize=tamanho_bloco) as leitor:
+                yield from leitor
+        elif nome.endswith(".parquet"):
+            for lote in pq.ParquetFile(arquivo).iter_batches(batch_size=tamanho_bloco):
+                yield lote.to_pandas()
+        else:
+            try:
+                leitor = pa.ipc.open_file(arquivo)
+                lotes = (leitor.get_batch(i) for i in range(leitor.num_record_batches))
+            except pa.ArrowInvalid:
+                arquivo.seek(0)
+                lotes = pa.ipc.open_stream(arquivo)
+            for lote in lotes:
+                yield lote.to_pandas()
+    finally:
+        if arquivo is not source:
+            arquivo.close()
+
+
+def aggregate_stream(blocos):
+    """
+    Consolida os blocos em estatísticas suficientes por (data, variante,
+    dimensões): linhas, receita, sessões, conversões, soma e soma dos quadrados
+    do RPV e os produtos cruzados. As dimensões de segmento são detectadas no
+    primeiro bloco. Retorna (cubo, dimensões); o cubo é o mesmo da agregação
+    feita sobre o arquivo inteiro.
+    """
+    parciais = []
+    dimensoes = None
+    for bloco in blocos:
+        if dimensoes is None:
+            dimensoes = dimension_columns(bloco)
+        parciais.append(aggregate_daily(prepare_rows(bloco, dimensoes), dimensoes))
+        if len(parciais) >= _CONSOLIDAR_A_CADA:
+            parciais = [combine_daily(parciais, dimensoes)]
+    if not parciais:
+        raise ValueError("O arquivo não contém registros")
+    return combine_daily(parciais, dimensoes), dimensoes
+
+
+def build_experiment_frame_streaming(source, tamanho_bloco=TAMANHO_BLOCO_LINHAS):
+    """ExperimentFrame sem as linhas brutas, lido bloco a bloco."""
+    cubo, dimensoes = aggregate_stream(iter_blocks(source, tamanho_bloco))
+    validas = limit_dimensions(cubo, dimensoes)
+    if validas != dimensoes:
+        cubo = combine_daily([cubo], validas)
+    return frame_from_cube(cubo, validas, hash_source(source))
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(params=[2, 3])
+def n_workers(request):
+    """Número de processos comparado à execução serial nos testes de determinismo."""
+    return request.param
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import integrate
+from scipy.stats import beta, norm
+from scripts.bayes_exact import (compare_posteriors, compare_samples, normal_gama_inversa, posterior_rpv,
+                                 prob_beta_superior, prob_normal_superior)
+
+
+@pytest.mark.parametrize("a1, b1, a2, b2", [(3, 5, 4, 4), (40, 60, 48, 52), (200, 800, 215, 785)])
+def test_duas_betas_usam_a_forma_fechada(a1, b1, a2, b2):
+    prob_vs_controle, prob_melhor = compare_posteriors(beta(np.array([[a1], [a2]]), np.array([[b1], [b2]])))
+    exata = prob_beta_superior(a2, b2, a1, b1)
+    assert prob_vs_controle[1] == exata
+    assert prob_melhor == pytest.approx([1 - exata, exata])
+    # Conferência independente da soma: quadratura adaptativa
+    quadratura, _ = integrate.quad(lambda x: beta.pdf(x, a2, b2) * beta.cdf(x, a1, b1), 0, 1, limit=200)
+    assert exata == pytest.approx(quadratura, abs=1e-8)
+
+
+def test_grade_igual_a_forma_fechada():
+    # Três variantes: P(X_i > X_controle) sai da grade
+    alphas, betas = np.array([40, 48, 37]), np.array([60, 52, 63])
+    prob_vs_controle, _ = compare_posteriors(beta(alphas[:, None], betas[:, None]))
+    for i in (1, 2):
+        assert prob_vs_controle[i] == pytest.approx(
+            prob_beta_superior(alphas[i], betas[i], alphas[0], betas[0]), abs=1e-6)
+
+
+def test_alfa_real_usa_a_grade():
+    alphas, betas = np.array([40.3, 48.6]), np.array([60.2, 52.1])
+    prob_vs_controle, _ = compare_posteriors(beta(alphas[:, None], betas[:, None]))
+    quadratura, _ = integrate.quad(lambda x: beta.pdf(x, alphas[1], betas[1]) * beta.cdf(x, alphas[0], betas[0]),
+                                   0, 1, limit=200)
+    assert prob_vs_controle[1] == pytest.approx(quadratura, abs=1e-6)
+    with pytest.raises(ValueError):
+        prob_beta_superior(alphas[1], betas[1], alphas[0], betas[0])
+
+
+def test_normal_igual_a_forma_fechada():
+    medias, desvios = np.array([10.0, 10.4, 9.5]), np.array([0.3, 0.2, 0.5])
+    prob_vs_controle, _ = compare_posteriors(norm(medias[:, None], desvios[:, None]))
+    for i in (1, 2):
+        exata = prob_normal_superior(medias[i], desvios[i], medias[0], desvios[0])
+        assert prob_vs_controle[i] == pytest.approx(exata, abs=1e-6)
+        duas, _ = compare_posteriors(norm(medias[[0, i], None], desvios[[0, i], None]))
+        assert duas[1] == exata
+
+
+def test_prob_melhor_igual_ao_monte_carlo():
+    alphas, betas = np.array([30.0, 34.5, 28.2]), np.array([70.0, 66.5, 71.8])
+    _, prob_melhor = compare_posteriors(beta(alphas[:, None], betas[:, None]))
+    amostras = np.random.default_rng(0).beta(alphas[:, None], betas[:, None], size=(3, 400_000))
+    _, prob_melhor_mc = compare_samples(amostras)
+    assert prob_melhor.sum() == pytest.approx(1.0, abs=1e-6)
+    assert prob_melhor == pytest.approx(prob_melhor_mc, abs=3e-3)
+
+
+def test_familias_de_posterior():
+    resumo = pd.DataFrame({"dias": [14, 14], "soma": [140.0, 147.0], "soma_quad": [1420.0, 1560.0],
+                           "minimo": [8.0, 8.5], "maximo": [12.0, 12.5]}, index=["Controle", "Nova"])
+    escalada = posterior_rpv(resumo, ["Controle", "Nova"], "beta_escalada")
+    assert escalada.dist.name == "beta" and escalada.mean().shape == (2, 1)
+    student = posterior_rpv(resumo, ["Controle", "Nova"], "normal_gama_inversa")
+    assert student.dist.name == "t"
+    assert student.mean().ravel() == pytest.approx(normal_gama_inversa(resumo, ["Controle", "Nova"])[0])
+    with pytest.raises(ValueError):
+        posterior_rpv(resumo, ["Controle", "Nova"], "lognormal")
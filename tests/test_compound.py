@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.compound import (MIN_CONVERSOES, adaptive_samples, compound_totals, erro_monte_carlo,
+                              posterior_conversao, posterior_valor)
+from scripts.preprocessing import build_experiment_frame
+
+
+def _sessoes(n=3000, taxas=(0.05, 0.06), dias=10, seed=0):
+    """Exportação por sessão: uma linha por sessão, receita zero nas que não converteram."""
+    rng = np.random.default_rng(seed)
+    partes = []
+    for i, taxa in enumerate(taxas):
+        converteu = rng.uniform(size=n) < taxa
+        partes.append(pd.DataFrame({
+            "data": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, dias, size=n), unit="D"),
+            "variante": "Controle" if i == 0 else f"Variante {i}",
+            "receita": np.where(converteu, np.round(rng.lognormal(4.0, 1.0, size=n), 2), 0.0),
+            "sessoes": 1.0,
+        }))
+    return pd.concat(partes, ignore_index=True)
+
+
+def test_totais_por_sessao():
+    df = _sessoes()
+    totais = compound_totals(build_experiment_frame(df))
+    assert list(totais.index) == ["Controle", "Variante 1"]
+
+    convertidas = df[df["receita"] > 0]
+    grupos = df.groupby("variante")
+    np.testing.assert_allclose(totais["sessoes"], grupos["sessoes"].sum())
+    np.testing.assert_allclose(totais["conversoes"], convertidas.groupby("variante").size())
+    np.testing.assert_allclose(totais["receita"], grupos["receita"].sum())
+    log_valor = np.log(convertidas["receita"]).groupby(convertidas["variante"]).sum()
+    np.testing.assert_allclose(totais["log_valor"], log_valor)
+
+    a, b = posterior_conversao(totais)
+    np.testing.assert_allclose(a + b, 2 + grupos.size().to_numpy())
+
+
+@pytest.mark.parametrize("sessoes", [
+    lambda n, rng: rng.poisson(1000, size=n).clip(min=1),  # diário agregado
+    lambda n, rng: rng.integers(1, 3, size=n),              # algumas linhas com duas sessões
+    lambda n, rng: np.r_[np.zeros(n // 2), np.full(n - n // 2, 2)],  # média 1, mas sem uma sessão por linha
+])
+def test_arquivo_agregado_e_recusado(sessoes):
+    df = _sessoes()
+    df["sessoes"] = sessoes(len(df), np.random.default_rng(1)).astype(float)
+    with pytest.raises(ValueError, match="uma linha por sessão"):
+        compound_totals(build_experiment_frame(df))
+
+
+def test_poucas_conversoes():
+    df = _sessoes(n=200, taxas=(0.05, 0.0))
+    with pytest.raises(ValueError, match=f"{MIN_CONVERSOES} conversões.*Variante 1"):
+        compound_totals(build_experiment_frame(df))
+
+
+@pytest.fixture(scope="module")
+def posteriores():
+    totais = compound_totals(build_experiment_frame(_sessoes(taxas=(0.05, 0.06, 0.04))))
+    return posterior_conversao(totais), posterior_valor(totais, "lognormal"), totais
+
+
+def test_amostragem_adaptativa_para_na_precisao(posteriores):
+    conversao, valor, _ = posteriores
+    taxa, valor_medio, rpv, erro = adaptive_samples(conversao, valor, precisao=0.01, seed=0, inicial=500)
+    assert erro <= 0.01
+    assert erro == pytest.approx(erro_monte_carlo(rpv))
+    # Os lotes dobram o total: 500, 1000, 2000...
+    n = rpv.shape[1]
+    assert n >= 500 and n / 500 == 2 ** round(np.log2(n / 500))
+    assert taxa.shape == valor_medio.shape == rpv.shape == (3, n)
+    np.testing.assert_allclose(rpv, taxa * valor_medio)
+
+    # Se a precisão pedida já vale no lote anterior, a amostragem teria parado nele
+    if n > 500:
+        assert erro_monte_carlo(rpv[:, :n // 2]) > 0.01
+
+
+def test_amostragem_adaptativa_para_no_maximo(posteriores):
+    conversao, valor, _ = posteriores
+    *_, rpv, erro = adaptive_samples(conversao, valor, precisao=1e-9, seed=0, inicial=1000, maximo=6000)
+    assert rpv.shape[1] == 6000
+    assert erro > 1e-9
+
+
+@pytest.mark.parametrize("modelo", ["lognormal", "gama"])
+def test_amostragem_adaptativa_reprodutivel(posteriores, modelo):
+    conversao, _, totais = posteriores
+    valor = posterior_valor(totais, modelo)
+    primeira = adaptive_samples(conversao, valor, modelo, precisao=0.01, seed=7)
+    segunda = adaptive_samples(conversao, valor, modelo, precisao=0.01, seed=7)
+    for x, y in zip(primeira, segunda):
+        np.testing.assert_array_equal(x, y)
+
+
+def test_amostras_seguem_a_posterior(posteriores):
+    (a, b), valor, totais = posteriores
+    taxa, valor_medio, _, _ = adaptive_samples((a, b), valor, precisao=0.0, seed=0, maximo=64_000)
+    np.testing.assert_allclose(taxa.mean(axis=1), a / (a + b), rtol=0.01)
+    np.testing.assert_allclose(taxa.var(axis=1), a * b / ((a + b) ** 2 * (a + b + 1)), rtol=0.05)
+    # O valor médio do pedido fica perto da média observada nas conversões
+    np.testing.assert_allclose(valor_medio.mean(axis=1), totais["receita"] / totais["conversoes"], rtol=0.15)
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from scipy.stats import beta, gaussian_kde
+from scripts.density import banda_scott, densidade_analitica, kde_binned
+
+
+@pytest.mark.parametrize("amostras", [
+    np.random.default_rng(0).normal(10.0, 2.0, 20_000),
+    np.random.default_rng(1).gamma(2.0, 50.0, 5_000),
+    np.concatenate([np.random.default_rng(2).normal(0, 1, 3_000), np.random.default_rng(3).normal(6, 0.5, 1_000)]),
+])
+def test_kde_binned_igual_ao_gaussian_kde(amostras):
+    densidade = kde_binned(amostras)
+    exata = gaussian_kde(amostras, bw_method="scott")(densidade.grade)
+    assert banda_scott(amostras) == pytest.approx(np.sqrt(gaussian_kde(amostras).covariance[0, 0]))
+    # Erro do binning linear pequeno frente ao pico da densidade
+    assert np.abs(densidade.valores - exata).max() <= 1e-3 * exata.max()
+    assert densidade.integral() == pytest.approx(1.0, abs=1e-3)
+
+
+def test_kde_de_amostras_constantes():
+    densidade = kde_binned(np.full(100, 3.0))
+    assert np.isfinite(densidade.valores).all()
+    assert densidade.integral() == pytest.approx(1.0, abs=1e-2)
+
+
+def test_densidade_analitica():
+    posterior = beta(np.array([[20.0], [30.0]]), np.array([[80.0], [70.0]]))
+    for (a, b), densidade in zip([(20, 80), (30, 70)], densidade_analitica(posterior)):
+        np.testing.assert_allclose(densidade.valores, beta.pdf(densidade.grade, a, b))
+        assert densidade.integral() == pytest.approx(1.0, abs=1e-3)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from scripts.empirical_bayes import LiftPrior, fit_lift_prior, shrink_lifts
+
+
+def _lifts_historicos():
+    # Lifts de 8 experimentos anteriores com dispersão toda explicada pelo erro: τ̂ = 0
+    return np.array([2.0, -1.0, 0.5, 3.0, -2.5, 1.0, 0.0, 1.5]), np.full(8, 3.0)
+
+
+@pytest.mark.parametrize("metodo", ["momentos", "verossimilhanca"])
+def test_tau_zero_mantem_incerteza_da_media(metodo):
+    lifts, erros = _lifts_historicos()
+    prior = fit_lift_prior(lifts, erros, metodo)
+    assert prior.desvio < 1e-2
+    assert prior.erro_media == pytest.approx(3 / np.sqrt(8), rel=1e-3)
+
+    media, desvio, prob = shrink_lifts([-4.0], [3.0], prior)
+    # Puxado todo para μ̂, mas com o erro de μ̂: nada de certeza sobre o sinal
+    assert media[0] == pytest.approx(prior.media, abs=1e-3)
+    assert desvio[0] == pytest.approx(prior.erro_media, rel=1e-3)
+    assert 0.05 < prob[0] < 0.95
+
+
+def test_posterior_degenerada_devolve_nan():
+    prior = LiftPrior(media=1.0, desvio=0.0, metodo="momentos", lifts=8, erro_media=0.0)
+    media, desvio, prob = shrink_lifts([-4.0, 2.0], [3.0, 0.0], prior)
+    assert np.isnan(prob).all()
+
+
+def test_encolhimento_normal_normal():
+    prior = LiftPrior(media=1.0, desvio=2.0, metodo="verossimilhanca", lifts=10, erro_media=0.0)
+    media, desvio, prob = shrink_lifts([5.0], [2.0], prior)
+    assert media[0] == pytest.approx(3.0)
+    assert desvio[0] == pytest.approx(np.sqrt(2.0))
+    assert prob[0] == pytest.approx(0.9831, abs=1e-4)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.preprocessing import build_experiment_frame, get_frame_slice
+
+
+def _linhas(n=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "data": pd.date_range("2024-01-01", periods=10).strftime("%Y-%m-%d")[rng.integers(0, 10, n)],
+        "variante": rng.choice(["Controle", "Nova"], n),
+        "dispositivo": rng.choice(["desktop", "mobile"], n),
+        "pais": rng.choice(["BR", "PT", "AR"], n),
+        "receita": np.where(rng.random(n) < 0.3, rng.gamma(2.0, 40.0, n).round(2), 0.0),
+        "sessoes": rng.integers(1, 4, n).astype(float),
+    })
+
+
+def _ordenado(daily):
+    daily = daily.sort_values(["data", "variante"]).reset_index(drop=True)
+    return daily.astype({"variante": str})
+
+
+@pytest.mark.parametrize("filtros", [(("dispositivo", "mobile"),), (("pais", "PT"), ("dispositivo", "desktop"))])
+def test_fatia_igual_a_refiltrar_as_linhas(filtros):
+    df = _linhas()
+    frame = build_experiment_frame(df)
+    fatia = get_frame_slice(frame, filtros)
+    mascara = np.logical_and.reduce([df[dimensao] == valor for dimensao, valor in filtros])
+    esperado = build_experiment_frame(df[mascara].reset_index(drop=True))
+
+    assert fatia.filtros == filtros
+    assert fatia.hash != frame.hash
+    assert len(fatia.raw) == mascara.sum()
+    pd.testing.assert_frame_equal(_ordenado(fatia.daily), _ordenado(esperado.daily), check_dtype=False)
+    pd.testing.assert_frame_equal(fatia.resumo_rpv(), esperado.resumo_rpv(), check_dtype=False)
+    # Fatias encadeadas acumulam os filtros
+    assert frame.fatia(filtros[:1]).fatia(filtros[1:]).daily.equals(fatia.daily)
+
+
+def test_fatia_sem_filtros_e_o_proprio_frame():
+    frame = build_experiment_frame(_linhas())
+    assert frame.fatia(()) is frame and get_frame_slice(frame, ()) is frame
+
+
+@pytest.mark.parametrize("filtros", [(("navegador", "chrome"),), (("dispositivo", "tv"),)])
+def test_dimensao_ou_valor_desconhecido(filtros):
+    frame = build_experiment_frame(_linhas())
+    with pytest.raises(ValueError):
+        frame.fatia(filtros)
+
+
+def test_frame_sem_segmentos():
+    frame = build_experiment_frame(_linhas().drop(columns=["dispositivo", "pais"]))
+    with pytest.raises(ValueError):
+        frame.fatia((("dispositivo", "mobile"),))
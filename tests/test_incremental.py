@@ -0,0 +1,79 @@
+import json
+import os
+import pandas as pd
+import pytest
+from scripts import incremental
+from scripts.incremental import append_daily, list_experiments, load_incremental_frame
+from scripts.preprocessing import build_experiment_frame, summarize_daily_rpv
+
+
+def _daily(dias, receita=100.0):
+    datas = pd.date_range("2024-01-01", periods=10)[dias].strftime("%Y-%m-%d")
+    df = pd.DataFrame({"data": [d for d in datas for _ in range(2)], "variante": ["Controle", "Nova"] * len(datas),
+                       "receita": receita, "sessoes": 1000.0})
+    return build_experiment_frame(df).daily
+
+
+def test_reenvio_interrompido_preserva_o_historico(tmp_path, monkeypatch):
+    append_daily("exp", _daily(slice(0, 3)), "a", base=tmp_path)
+    append_daily("exp", _daily(slice(3, 4)), "b", base=tmp_path)
+
+    def falha(*_):
+        raise OSError("disco cheio")
+    escrever = incremental._escrever_json
+    monkeypatch.setattr(incremental, "_escrever_json", falha)
+    with pytest.raises(OSError):
+        append_daily("exp", _daily(slice(1, 5), receita=200.0), "c", base=tmp_path)
+    frame = load_incremental_frame("exp", base=tmp_path)
+    assert frame.daily["receita"].sum() == 8 * 100.0
+
+    monkeypatch.setattr(incremental, "_escrever_json", escrever)
+    estado = append_daily("exp", _daily(slice(1, 5), receita=200.0), "c", base=tmp_path)
+    frame = load_incremental_frame("exp", base=tmp_path)
+    assert len(estado["dias"]) == 5
+    assert frame.daily["receita"].sum() == 2 * 100.0 + 8 * 200.0
+    pasta = incremental._pasta("exp", tmp_path)
+    assert os.listdir(os.path.join(pasta, "diarias")) == [f"{estado['versao']:06d}.parquet"]
+
+
+def test_envio_le_so_o_arquivo_acumulado(tmp_path, monkeypatch):
+    for dia in range(6):
+        append_daily("exp", _daily(slice(dia, dia + 1)), str(dia), base=tmp_path)
+    leituras = []
+    ler = pd.read_parquet
+    monkeypatch.setattr(pd, "read_parquet", lambda *args, **kwargs: leituras.append(args) or ler(*args, **kwargs))
+    estado = append_daily("exp", _daily(slice(6, 7)), "6", base=tmp_path)
+    assert len(leituras) == 1
+    assert len(estado["dias"]) == 7
+
+    # O resumo somado envio a envio é o mesmo das estatísticas diárias acumuladas
+    frame = load_incremental_frame("exp", base=tmp_path)
+    pd.testing.assert_frame_equal(frame.resumo_rpv(), summarize_daily_rpv(frame.daily), check_dtype=False)
+
+
+def test_nomes_parecidos_em_pastas_diferentes(tmp_path):
+    append_daily("a/b", _daily(slice(0, 2)), "x", base=tmp_path)
+    append_daily("a_b", _daily(slice(0, 3), receita=50.0), "y", base=tmp_path)
+    assert load_incremental_frame("a/b", base=tmp_path).daily["receita"].sum() == 4 * 100.0
+    assert load_incremental_frame("a_b", base=tmp_path).daily["receita"].sum() == 6 * 50.0
+    assert sorted(e["experimento"] for e in list_experiments(base=tmp_path)) == ["a/b", "a_b"]
+
+
+def test_experimento_no_formato_anterior(tmp_path):
+    # Pasta sem hash no nome e uma parte por envio
+    pasta = tmp_path / "exp"
+    (pasta / "partes").mkdir(parents=True)
+    for parte, dias in enumerate([slice(0, 2), slice(2, 3)]):
+        daily = _daily(dias)
+        daily.assign(variante=daily["variante"].astype(str)).to_parquet(pasta / "partes" / f"{parte:06d}.parquet")
+    resumo = summarize_daily_rpv(_daily(slice(0, 3)))
+    (pasta / "estado.json").write_text(json.dumps({
+        "experimento": "exp", "dias": ["2024-01-01", "2024-01-02", "2024-01-03"], "hash": "h",
+        "primeira_parte": 0, "partes": 2, "atualizado_em": "", "resumo": resumo.to_dict(orient="index"),
+    }))
+
+    assert load_incremental_frame("exp", base=tmp_path).daily["receita"].sum() == 6 * 100.0
+    estado = append_daily("exp", _daily(slice(3, 4)), "z", base=tmp_path)
+    assert len(estado["dias"]) == 4
+    assert os.listdir(tmp_path) == [os.path.basename(incremental._pasta("exp", tmp_path))]
+    assert not os.path.exists(os.path.join(incremental._pasta("exp", tmp_path), "partes"))
@@ -0,0 +1,71 @@
+import threading
+import pytest
+from scripts.jobs import MAX_ANALISES_SIMULTANEAS, AnaliseCancelada, relatar_progresso, submeter
+
+
+def _analise(liberar, etapas=5, progresso=None):
+    # Relata o progresso e espera `liberar` a cada etapa
+    def func():
+        for feitos in range(1, etapas + 1):
+            relatar_progresso(feitos, etapas)
+            if progresso is not None:
+                progresso.set()
+            liberar.wait(timeout=10)
+        return "ok"
+    return func
+
+
+def test_pedidos_iguais_compartilham_o_job():
+    liberar = threading.Event()
+    primeiro = submeter(("dedup", 1), _analise(liberar))
+    segundo = submeter(("dedup", 1), _analise(liberar))
+    outro = submeter(("dedup", 2), _analise(liberar))
+    assert segundo is primeiro and outro is not primeiro
+    assert primeiro.assinantes == 2
+    liberar.set()
+    assert primeiro.aguardar(10) and primeiro.resultado() == "ok"
+    assert outro.aguardar(10)
+    # Terminado, o job sai da lista: um novo pedido calcula de novo
+    assert submeter(("dedup", 1), lambda: "novo").resultado() == "novo"
+
+
+def test_progresso_visto_por_todos_os_interessados():
+    liberar, progresso = threading.Event(), threading.Event()
+    job = submeter(("progresso",), _analise(liberar, etapas=4, progresso=progresso))
+    outra_sessao = submeter(("progresso",), _analise(liberar))
+    assert progresso.wait(10)
+    assert outra_sessao.iniciado and outra_sessao.total == 4
+    assert outra_sessao.fracao() == job.fracao() > 0
+    liberar.set()
+    assert job.aguardar(10) and outra_sessao.fracao() == 1.0
+
+
+def test_cancelamento_so_sem_interessados():
+    liberar, progresso = threading.Event(), threading.Event()
+    job = submeter(("cancelar",), _analise(liberar, progresso=progresso))
+    submeter(("cancelar",), _analise(liberar))
+    assert progresso.wait(10)
+
+    job.cancelar()
+    assert not job.cancelado
+    job.cancelar()
+    assert job.cancelado
+    liberar.set()
+    with pytest.raises(AnaliseCancelada):
+        job.resultado()
+
+
+def test_cancelamento_na_fila():
+    liberar = threading.Event()
+    ocupados = [submeter(("ocupado", i), _analise(liberar)) for i in range(MAX_ANALISES_SIMULTANEAS)]
+    na_fila = submeter(("fila",), lambda: "nunca")
+    assert not na_fila.iniciado
+    na_fila.cancelar()
+    assert na_fila.future.cancelled()
+    liberar.set()
+    for job in ocupados:
+        assert job.aguardar(10)
+
+
+def test_progresso_fora_de_um_job():
+    relatar_progresso(1, 2)
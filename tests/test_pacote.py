@@ -0,0 +1,28 @@
+import importlib
+import subprocess
+import sys
+import types
+from unittest import mock
+import scripts
+
+
+def test_importar_o_pacote_nao_carrega_as_analises():
+    codigo = "import sys, scripts; print(sorted(m for m in ('scipy', 'matplotlib', 'seaborn') if m in sys.modules))"
+    saida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True, check=True)
+    assert saida.stdout.strip() == "[]"
+
+
+def test_acesso_preguicoso_devolve_o_submodulo():
+    for nome in scripts.__all__:
+        modulo = getattr(scripts, nome)
+        assert isinstance(modulo, types.ModuleType)
+        assert modulo is importlib.import_module(f"scripts.{nome}")
+        assert callable(getattr(modulo, nome))
+
+
+def test_patch_e_reload_do_submodulo():
+    from scripts.run_bootstrap import compute_bootstrap
+    assert scripts.run_bootstrap.compute_bootstrap is compute_bootstrap
+    with mock.patch("scripts.run_bootstrap.compute_bootstrap") as falso:
+        assert scripts.run_bootstrap.compute_bootstrap is falso
+    assert importlib.reload(scripts.run_bootstrap) is scripts.run_bootstrap
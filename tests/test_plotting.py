@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from streamlit.testing.v1 import AppTest
+from scripts import plotting
+from scripts.plotting import _png, distribuicoes, exibir_figura, grafico_distribuicoes, pyplot
+
+
+def _dists():
+    amostras = np.random.default_rng(0).normal([[10.0], [10.5]], 1.0, size=(2, 2000))
+    return distribuicoes(["Controle", "Nova"], amostras, ["#3498db", "#2ecc71"], cis=[(9, 11), (9.5, 11.5)])
+
+
+def _pagina():
+    # Script do AppTest: o cache do st.cache_data só existe com o runtime do Streamlit
+    import streamlit as st
+    from scripts.plotting import _png, pyplot
+
+    def desenhar():
+        st.session_state.desenhos = st.session_state.get("desenhos", 0) + 1
+        fig, ax = pyplot().subplots()
+        ax.plot([0, 1], [0, 1])
+        return fig
+
+    st.session_state.png = _png("teste-png", desenhar)
+    st.session_state.figuras_abertas = len(pyplot().get_fignums())
+
+
+def test_png_em_cache_e_figura_fechada():
+    at = AppTest.from_function(_pagina)
+    at.run()
+    png = at.session_state.png
+    assert png.startswith(b"\x89PNG")
+    at.run()
+    assert at.session_state.png == png
+    assert at.session_state.desenhos == 1
+    assert at.session_state.figuras_abertas == 0
+
+
+def test_figura_fechada_mesmo_com_erro():
+    plt = pyplot()
+
+    def desenhar():
+        fig = plt.figure()
+        fig.savefig = None
+        return fig
+
+    with pytest.raises(TypeError):
+        _png("teste-erro", desenhar)
+    assert plt.get_fignums() == []
+
+
+@pytest.mark.parametrize("estilo, tracos", [("hist", 4), ("kde", 2)])
+def test_backend_plotly(monkeypatch, estilo, tracos):
+    figuras, imagens = [], []
+    monkeypatch.setattr(plotting, "backend_atual", lambda: "plotly")
+    monkeypatch.setattr(plotting.st, "plotly_chart", lambda fig, **_: figuras.append(fig))
+    monkeypatch.setattr(plotting.st, "image", lambda png, **_: imagens.append(png))
+
+    grafico_distribuicoes(_dists(), "RPV", "x", "y", estilo=estilo, referencia=0.0)
+    assert imagens == [] and len(figuras) == 1
+    fig = figuras[0]
+    assert len(fig.data) == tracos
+    # Dois intervalos com duas linhas cada, mais a referência
+    assert len(fig.layout.shapes) == 5
+    # Só bins e grade da densidade vão para o navegador, nunca as 2000 amostras
+    assert max(len(traco.x) for traco in fig.data) <= max(plotting.BINS, len(_dists()[0].densidade.grade))
+
+
+def test_backend_matplotlib_sem_plotly(monkeypatch):
+    imagens = []
+    monkeypatch.setattr(plotting, "backend_atual", lambda: "plotly")
+    monkeypatch.setattr(plotting.st, "image", lambda png, **_: imagens.append(png))
+    # Sem figura plotly a figura matplotlib é usada mesmo no backend interativo
+    exibir_figura("sem-plotly", lambda: pyplot().figure())
+    assert len(imagens) == 1 and imagens[0].startswith(b"\x89PNG")
@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+from scripts.power import SIMULACOES_POR_BLOCO, simulated_power
+
+
+@pytest.mark.parametrize("metodo", ["bootstrap", "bayesiano"])
+def test_poder_igual_com_qualquer_numero_de_processos(metodo, n_workers):
+    historico = np.random.default_rng(0).gamma(20.0, 5.0, 60)
+    lifts, duracoes = np.array([0.0, 0.05, 0.2]), [7, 14]
+    # Três blocos de simulações por duração
+    argumentos = dict(metodo=metodo, num_simulacoes=3 * SIMULACOES_POR_BLOCO, seed=11, replicas=200)
+    serial = simulated_power(historico, lifts, duracoes, n_workers=1, **argumentos)
+    paralelo = simulated_power(historico, lifts, duracoes, n_workers=n_workers, **argumentos)
+    np.testing.assert_array_equal(paralelo, serial)
+    assert serial.shape == (len(lifts), len(duracoes))
+    # Poder cresce com o lift
+    assert (np.diff(serial, axis=0) >= 0).all()
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.preprocessing import build_experiment_frame
+from scripts.ratio import cuped_ratio, delta_ratio, ratio_totals, segment_totals
+
+
+def _usuarios(n, rng, lift=0.0):
+    # Uma linha por usuário: sessões variáveis e receita correlacionada com a do período anterior
+    sessoes = rng.poisson(2.0, 2 * n) + 1.0
+    receita_pre = rng.gamma(2.0, 5.0, 2 * n)
+    receita = np.maximum(sessoes * (1.0 + 0.8 * receita_pre + rng.normal(0, 4.0, 2 * n)), 0.0)
+    receita[n:] *= 1 + lift
+    return pd.DataFrame({"data": "2024-01-01", "variante": ["Controle"] * n + ["Nova"] * n,
+                         "receita": receita, "sessoes": sessoes, "receita_pre": receita_pre})
+
+
+def test_erro_delta_igual_ao_monte_carlo():
+    # 200 réplicas independentes como segmentos do mesmo experimento
+    rng = np.random.default_rng(1)
+    df = pd.concat([_usuarios(300, rng).assign(replica=f"r{i}") for i in range(200)], ignore_index=True)
+    _, totais = segment_totals(build_experiment_frame(df), "replica")
+    razao, variancia, _ = delta_ratio(totais)
+    # Erro relativo do desvio de Monte Carlo em torno de 5%
+    assert np.sqrt(variancia).mean(axis=0) == pytest.approx(razao.std(axis=0, ddof=1), rel=0.15)
+
+
+def test_cuped_reduz_variancia_em_rho_quadrado():
+    df = _usuarios(20_000, np.random.default_rng(2))
+    totais = ratio_totals(build_experiment_frame(df))
+    razao, variancia, cov_lz = delta_ratio(totais)
+    _, variancia_ajustada, theta = cuped_ratio(totais, razao, variancia, cov_lz)
+    assert theta > 0
+
+    for i, (_, linhas) in enumerate(df.groupby("variante", sort=True)):
+        # Razão linearizada por linha e sua correlação com a covariável
+        linearizada = (linhas["receita"] - razao[i] * linhas["sessoes"]) / linhas["sessoes"].mean()
+        rho = np.corrcoef(linearizada, linhas["receita_pre"])[0, 1]
+        assert 1 - variancia_ajustada[i] / variancia[i] == pytest.approx(rho ** 2, abs=0.01)
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from scripts.parallel import TAMANHO_BLOCO
+from scripts.resampling import METODOS, PESOS, bootstrap_means, parallel_bootstrap_matrix, streaming_bootstrap_means
+
+# Mais de um bloco de reamostragens, para que cada processo receba parte do trabalho
+NUM_SAMPLES = 3 * TAMANHO_BLOCO + 17
+
+
+@pytest.mark.parametrize("method", METODOS)
+def test_matriz_igual_com_qualquer_numero_de_processos(method, n_workers):
+    rng = np.random.default_rng(0)
+    datasets = [rng.gamma(2.0, 50.0, 30), rng.gamma(2.0, 55.0, 40)]
+    serial = parallel_bootstrap_matrix(datasets, NUM_SAMPLES, seed=7, method=method, n_workers=1)
+    paralelo = parallel_bootstrap_matrix(datasets, NUM_SAMPLES, seed=7, method=method, n_workers=n_workers)
+    np.testing.assert_array_equal(paralelo, serial)
+    assert serial.shape == (2, NUM_SAMPLES)
+
+
+def _dados():
+    return np.random.default_rng(3).gamma(2.0, 50.0, 60)
+
+
+@pytest.mark.parametrize("method", METODOS)
+def test_media_e_variancia_do_bootstrap(method):
+    dados = _dados()
+    medias = bootstrap_means(dados, 40_000, rng=1, method=method)
+    # Bootstrap clássico: E = x̄ e Var = s²/n, com s² da população reamostrada (ddof=0)
+    variancia = dados.var() / len(dados)
+    assert medias.mean() == pytest.approx(dados.mean(), abs=4 * np.sqrt(variancia / len(medias)))
+    assert medias.var() == pytest.approx(variancia, rel=0.05)
+
+
+@pytest.mark.parametrize("method", METODOS)
+def test_bootstrap_nao_depende_do_tamanho_do_bloco(method):
+    dados = _dados()
+    inteiro = bootstrap_means(dados, 1000, rng=1, method=method)
+    # Blocos de 1, 7 e 113 reamostragens (16 bytes por célula da matriz)
+    for linhas in (1, 7, 113):
+        em_blocos = bootstrap_means(dados, 1000, rng=1, method=method,
+                                    memoria_max_mb=linhas * len(dados) * 16 / 1024 ** 2)
+        np.testing.assert_allclose(em_blocos, inteiro, rtol=1e-12)
+
+
+@pytest.mark.parametrize("pesos", PESOS)
+def test_media_e_variancia_do_bootstrap_em_passada_unica(pesos):
+    dados = _dados()
+    codigos = np.zeros(len(dados), dtype=np.int64)
+    medias = streaming_bootstrap_means([(codigos, dados)], 1, 40_000, seed=1, pesos=pesos)[0]
+    # Pesos de Dirichlet: Var = s²/(n + 1)
+    variancia = dados.var() / (len(dados) + (pesos == "bayesiano"))
+    assert medias.mean() == pytest.approx(dados.mean(), abs=4 * np.sqrt(variancia / len(medias)))
+    assert medias.var() == pytest.approx(variancia, rel=0.05)
+
+
+def test_metodo_desconhecido():
+    with pytest.raises(ValueError):
+        bootstrap_means(_dados(), method="jackknife")
+    with pytest.raises(ValueError):
+        bootstrap_means([])
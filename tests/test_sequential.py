@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from scripts.sequential import group_sequential_bounds
+
+FRACOES = np.arange(1, 6) / 5
+
+# Fronteiras de Lan-DeMets publicadas para 5 análises igualmente espaçadas, α = 0,05 bilateral
+FRONTEIRAS = {
+    "obrien_fleming": [4.877, 3.357, 2.680, 2.290, 2.031],
+    "pocock": [2.438, 2.427, 2.410, 2.397, 2.386],
+}
+
+
+@pytest.mark.parametrize("gasto", FRONTEIRAS)
+def test_fronteiras_publicadas(gasto):
+    fronteiras, gasto_acumulado = group_sequential_bounds(FRACOES, alpha=0.05, gasto=gasto)
+    assert fronteiras == pytest.approx(FRONTEIRAS[gasto], abs=1e-3)
+    assert gasto_acumulado[-1] == pytest.approx(0.05)
+
+
+@pytest.mark.parametrize("gasto", FRONTEIRAS)
+def test_erro_tipo_1_simulado(gasto):
+    fronteiras, _ = group_sequential_bounds(FRACOES, alpha=0.05, gasto=gasto)
+    # Escore acumulado sob H0 em 200 mil testes: Z_k = S_k / √t_k
+    incrementos = np.random.default_rng(0).normal(0, np.sqrt(0.2), size=(200_000, 5))
+    z = np.cumsum(incrementos, axis=1) / np.sqrt(FRACOES)
+    assert (np.abs(z) >= fronteiras).any(axis=1).mean() == pytest.approx(0.05, abs=2e-3)
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import chisquare, false_discovery_control
+from scripts.preprocessing import build_experiment_frame
+from scripts.srm import benjamini_hochberg, expected_allocation, srm_cells, srm_chi2
+
+
+@pytest.mark.parametrize("alocacao", [None, [0.5, 0.25, 0.25], [0.2, 0.3, 0.5]])
+def test_qui2_igual_ao_chisquare(alocacao):
+    contagens = np.random.default_rng(0).integers(50, 5000, size=(40, 3))
+    proporcoes = expected_allocation(alocacao, 3)
+    estatistica, p_value, esperado_minimo = srm_chi2(contagens, proporcoes)
+    for linha, q, p, minimo in zip(contagens, estatistica, p_value, esperado_minimo):
+        esperado = linha.sum() * proporcoes
+        referencia = chisquare(linha, esperado)
+        assert q == pytest.approx(referencia.statistic)
+        assert p == pytest.approx(referencia.pvalue, rel=1e-9, abs=1e-300)
+        assert minimo == pytest.approx(esperado.min())
+
+
+def test_trafego_em_variante_sem_alocacao():
+    estatistica, p_value, _ = srm_chi2([[500, 480, 3], [500, 480, 0]], expected_allocation([1, 1, 0], 3))
+    assert np.isinf(estatistica[0]) and p_value[0] == 0
+    assert p_value[1] == pytest.approx(chisquare([500, 480]).pvalue)
+
+
+def test_benjamini_hochberg():
+    p_values = np.random.default_rng(1).uniform(size=200) ** 3
+    q_values = benjamini_hochberg(p_values)
+    np.testing.assert_allclose(q_values, false_discovery_control(p_values, method="bh"))
+    # Na ordem dos p-valores os q-valores não diminuem, e nunca ficam abaixo do p-valor
+    ordem = np.argsort(p_values)
+    assert (np.diff(q_values[ordem]) >= 0).all()
+    assert (q_values >= p_values).all() and (q_values <= 1).all()
+    np.testing.assert_allclose(benjamini_hochberg([0.01, 0.04, 0.03, 0.005]), [0.02, 0.04, 0.04, 0.02])
+    assert benjamini_hochberg([]).size == 0
+
+
+def test_srm_por_dia_e_segmento():
+    rng = np.random.default_rng(2)
+    linhas = []
+    for dia in pd.date_range("2024-01-01", periods=10).strftime("%Y-%m-%d"):
+        for dispositivo in ("desktop", "mobile"):
+            # Em 05/01 no mobile a Nova recebe 30% a menos de tráfego
+            falta = 0.7 if (dia, dispositivo) == ("2024-01-05", "mobile") else 1.0
+            for variante, sessoes in (("Controle", 5000), ("Nova", 5000 * falta)):
+                linhas.append({"data": dia, "variante": variante, "dispositivo": dispositivo,
+                               "sessoes": rng.poisson(sessoes), "receita": 100.0})
+    resultado = srm_cells(build_experiment_frame(pd.DataFrame(linhas)), expected_allocation(None, 2))
+
+    assert set(resultado["dimensao"]) == {"data", "dispositivo"}
+    assert len(resultado) == 10 + 2
+    destacadas = resultado.loc[resultado["srm"], ["dimensao", "celula"]].values.tolist()
+    assert ["data", "2024-01-05"] in destacadas and ["dispositivo", "mobile"] in destacadas
+    assert ["dispositivo", "desktop"] not in destacadas
+    assert resultado["testavel"].all()
+    np.testing.assert_allclose(resultado["q_value"], benjamini_hochberg(resultado["p_value"]))
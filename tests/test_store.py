@@ -0,0 +1,37 @@
+import pickle
+import sqlite3
+import pandas as pd
+from scripts.preprocessing import build_experiment_frame
+from scripts.store import load_result, save_experiment, save_result
+
+CHAVE = ("hash", "scripts.run_bayes_beta.compute_bayes_beta", (("seed", 42),))
+
+
+def _experimento(base):
+    df = pd.DataFrame({"data": ["2024-01-01", "2024-01-02"] * 2, "variante": ["Controle"] * 2 + ["Nova"] * 2,
+                       "receita": [10.0, 12.0, 11.0, 13.0], "sessoes": [100.0] * 4})
+    return save_experiment(build_experiment_frame(df), "teste", base=base)
+
+
+def test_resultado_de_outra_versao_e_ausente(tmp_path):
+    experimento = _experimento(tmp_path)
+    save_result(experimento, *CHAVE, {"modelo": "beta_escalada"}, versao=1, base=tmp_path)
+    assert load_result(*CHAVE, versao=1, base=tmp_path) == {"modelo": "beta_escalada"}
+    assert load_result(*CHAVE, versao=3, base=tmp_path) is None
+
+    save_result(experimento, *CHAVE, {"modelo": "normal_gama_inversa"}, versao=3, base=tmp_path)
+    assert load_result(*CHAVE, versao=3, base=tmp_path) == {"modelo": "normal_gama_inversa"}
+    assert load_result(*CHAVE, versao=1, base=tmp_path) is None
+
+
+def test_indice_antigo_sem_versao(tmp_path):
+    # Índice gravado antes da coluna `versao`: as linhas existentes contam como versão 1
+    with sqlite3.connect(tmp_path / "indice.sqlite") as conexao:
+        conexao.execute("CREATE TABLE resultados (frame_hash TEXT NOT NULL, metodo TEXT NOT NULL, "
+                        "parametros TEXT NOT NULL, experimento TEXT NOT NULL, resultado BLOB NOT NULL, "
+                        "salvo_em TEXT NOT NULL, PRIMARY KEY (frame_hash, metodo, parametros))")
+        conexao.execute("INSERT INTO resultados VALUES (?, ?, ?, ?, ?, ?)",
+                        (CHAVE[0], CHAVE[1], repr(CHAVE[2]), "exp", pickle.dumps("antigo"), "2024"))
+    conexao.close()
+    assert load_result(*CHAVE, versao=3, base=tmp_path) is None
+    assert load_result(*CHAVE, versao=1, base=tmp_path) == "antigo"
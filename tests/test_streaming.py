@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.preprocessing import build_experiment_frame
+from scripts.streaming import build_experiment_frame_streaming
+
+
+def _sessoes(n=3000, seed=0):
+    # Uma linha por sessão, com coluna de segmento e covariável do período anterior
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "data": pd.date_range("2024-01-01", periods=14).strftime("%Y-%m-%d")[rng.integers(0, 14, n)],
+        "variante": rng.choice(["Controle", "Nova", "Nova B"], n),
+        "dispositivo": rng.choice(["desktop", "mobile", "tablet"], n),
+        "receita": np.where(rng.random(n) < 0.3, rng.gamma(2.0, 40.0, n).round(2), 0.0),
+        "sessoes": rng.integers(1, 4, n),
+        "receita_pre": rng.gamma(2.0, 20.0, n).round(2),
+    })
+
+
+def _ordenado(tabela):
+    colunas = [c for c in ("data", "variante", "dispositivo") if c in tabela.columns]
+    tabela = tabela.sort_values(colunas).reset_index(drop=True)
+    return tabela.astype({c: str for c in colunas if c != "data"})
+
+
+@pytest.mark.parametrize("extensao", [".csv", ".csv.gz", ".parquet"])
+# 61 linhas por bloco: mais blocos que _CONSOLIDAR_A_CADA, então os parciais são consolidados no meio
+@pytest.mark.parametrize("tamanho_bloco", [61, 777, 100_000])
+def test_leitura_em_blocos_igual_a_em_memoria(tmp_path, extensao, tamanho_bloco):
+    caminho = tmp_path / f"sessoes{extensao}"
+    df = _sessoes()
+    if extensao == ".parquet":
+        df.to_parquet(caminho, index=False)
+        esperado = build_experiment_frame(pd.read_parquet(caminho))
+    else:
+        df.to_csv(caminho, index=False)
+        esperado = build_experiment_frame(pd.read_csv(caminho))
+
+    frame = build_experiment_frame_streaming(caminho, tamanho_bloco=tamanho_bloco)
+    assert frame.raw is None
+    assert frame.variantes == esperado.variantes and frame.dimensoes == esperado.dimensoes == ("dispositivo",)
+    pd.testing.assert_frame_equal(_ordenado(frame.daily), _ordenado(esperado.daily), check_dtype=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(_ordenado(frame.cubo), _ordenado(esperado.cubo), check_dtype=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(frame.resumo_rpv(), esperado.resumo_rpv(), check_dtype=False, rtol=1e-9)